@@ -0,0 +1,64 @@
+"""Aquecimento das conexões em segundo plano.
+
+Enquanto o menu espera o usuário, uma thread abre e autentica uma sessão de
+cada protocolo ao mesmo tempo (os três connects e AUTHs em paralelo, não um
+depois do outro) e deixa cada uma ociosa no pool do módulo. A primeira
+operação do menu recebe essas sessões prontas, então a latência percebida
+não inclui o handshake TCP nem o AUTH; se ela chegar antes do fim do
+aquecimento, espera por ele em vez de abrir outra conexão.
+
+Depois, a cada `intervalo` segundos, a mesma thread verifica as sessões
+ociosas (token expirado, conexão fechada pelo servidor) e reabre o que for
+preciso para manter uma sessão quente por protocolo.
+
+    aquecedor = Aquecedor({"json": trabalho_distribuidos_json.aquecer_sessoes, ...}).iniciar()
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+INTERVALO = 15      # segundos entre as verificações das sessões ociosas
+
+
+class Aquecedor:
+    """Mantém sessões quentes; aquecedores é {nome: função que aquece o pool do protocolo}."""
+
+    def __init__(self, aquecedores, intervalo=INTERVALO):
+        self.aquecedores = dict(aquecedores)
+        self.intervalo = intervalo
+        self.erros = {}             # nome -> última exceção do aquecimento, se houve
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._rodar, name="aquecimento", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def aquecer(self, executor):
+        """Uma rodada: aquece os protocolos em paralelo; devolve {nome: sessões abertas}."""
+        futuros = {nome: executor.submit(funcao) for nome, funcao in self.aquecedores.items()}
+        abertas = {}
+        for nome, futuro in futuros.items():
+            try:
+                abertas[nome] = futuro.result()
+                self.erros.pop(nome, None)
+            except Exception as e:      # servidor fora do ar: a operação do menu mostra o erro
+                abertas[nome] = 0
+                self.erros[nome] = e
+        return abertas
+
+    def _rodar(self):
+        with ThreadPoolExecutor(max_workers=len(self.aquecedores),
+                                thread_name_prefix="aquecimento") as executor:
+            while not self._parar.is_set():
+                self.aquecer(executor)
+                self._parar.wait(self.intervalo)
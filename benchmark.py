@@ -0,0 +1,274 @@
+"""Benchmark repetível dos três clientes, gerando as tabelas do Relatorio.md.
+
+Cada operação é executada N vezes por protocolo com as próprias funções dos
+módulos trabalho_distribuidos_*, numa sessão autenticada, e medida pelos
+registros por fase de medicoes.py. O resultado vai para
+<saida>.csv, <saida>.json e <saida>.md (mesmo layout das tabelas do relatório).
+
+Uso:
+    python benchmark.py --alvo local --repeticoes 100
+    python benchmark.py --alvo remoto --repeticoes 20 --operacoes soma,echo
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import math
+import os
+import socket
+from datetime import datetime
+
+import medicoes
+import saida
+import trabalho_distribuidos_json
+import trabalho_distribuidos_protobuff
+import trabalho_distribuidos_string
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+PROTOCOLOS = {
+    "string": trabalho_distribuidos_string,
+    "json": trabalho_distribuidos_json,
+    "protobuf": trabalho_distribuidos_protobuff,
+}
+NOMES_PROTOCOLOS = {"string": "Strings", "json": "JSON", "protobuf": "Protobuf"}
+
+# nome -> (op_code do menu, título no relatório)
+OPERACOES = {
+    "soma": (1, "Soma"),
+    "echo": (2, "Echo"),
+    "timestamp": (3, "Timestamp"),
+    "status": (4, "Status"),
+    "historico": (5, "Histórico"),
+    "info": (6, "Info"),
+}
+PERCENTIS = (50, 90, 99)
+
+
+# ---------------------------------------
+# Estatísticas
+# ---------------------------------------
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(math.ceil(p / 100 * len(valores_ordenados)) - 1, 0)
+    return valores_ordenados[indice]
+
+
+def resumir(protocolo, operacao, amostras):
+    """Agrega as amostras de uma operação numa linha de resultado."""
+    latencias = sorted(a["latencia_ms"] for a in amostras)
+    linha = {
+        "protocolo": protocolo,
+        "operacao": operacao,
+        "n": len(amostras),
+        "sucesso_pct": round(100.0 * sum(a["sucesso"] for a in amostras) / len(amostras), 2) if amostras else 0.0,
+        "bytes_requisicao": round(sum(a["bytes_enviados"] for a in amostras) / len(amostras), 1) if amostras else 0,
+        "bytes_resposta": round(sum(a["bytes_recebidos"] for a in amostras) / len(amostras), 1) if amostras else 0,
+        # fases de CPU: microssegundos ou menos, então guardadas até o ns
+        "serializacao_ms": round(_media(a["serializacao_ms"] for a in amostras), 6),
+        "parse_ms": round(_media(a["parse_ms"] for a in amostras), 6),
+        "formatacao_ms": round(_media(a["formatacao_ms"] for a in amostras), 6),
+        "log_ms": round(_media(a["log_ms"] for a in amostras), 6),
+        "total_ms": round(_media(a["total_ms"] for a in amostras), 3),
+        "media_ms": round(_media(latencias), 3),
+    }
+    for p in PERCENTIS:
+        linha[f"p{p}_ms"] = round(percentil(latencias, p), 3)
+    linha["max_ms"] = round(latencias[-1], 3) if latencias else 0.0
+    return linha
+
+
+def _media(valores):
+    valores = list(valores)
+    return sum(valores) / len(valores) if valores else 0.0
+
+
+# ---------------------------------------
+# Execução
+# ---------------------------------------
+def medir_protocolo(protocolo, operacoes, repeticoes, parametros, aquecimento=1):
+    """Executa cada operação `repeticoes` vezes numa sessão e devolve as amostras.
+
+    Os tempos vêm dos registros de medicoes: latência é o tempo no fio
+    (envio + primeiro byte + leitura), serialização e parse são as fases de
+    codificação e decodificação do próprio cliente.
+    """
+    modulo = PROTOCOLOS[protocolo]
+    amostras = {op: [] for op in operacoes}
+    silencio = io.StringIO()
+
+    sock = socket.create_connection(_endereco(modulo), timeout=modulo.TIMEOUT)
+    try:
+        # modo detalhado: a coluna de formatação mede o format_*_response
+        with contextlib.redirect_stdout(silencio), saida.usar_modo("detalhado"):
+            token = modulo.autenticar(sock, datetime.now().isoformat())
+            for op in operacoes:
+                op_code = OPERACOES[op][0]
+                for i in range(aquecimento + repeticoes):
+                    silencio.seek(0)
+                    silencio.truncate()
+                    modulo.executar_operacao(sock, token, op_code, parametros.get(op))
+                    if i < aquecimento:
+                        continue
+
+                    registro = medicoes.ultimo()
+                    fases = registro.fases
+                    amostras[op].append({
+                        "latencia_ms": registro.rede_ns / 1e6,
+                        "serializacao_ms": fases["codificacao"] / 1e6,
+                        "parse_ms": fases["decodificacao"] / 1e6,
+                        "formatacao_ms": fases["formatacao"] / 1e6,
+                        "log_ms": fases["log"] / 1e6,
+                        "total_ms": registro.total_ns / 1e6,
+                        "bytes_enviados": registro.bytes_enviados,
+                        "bytes_recebidos": registro.bytes_recebidos,
+                        "sucesso": bool(registro.sucesso),
+                    })
+            if protocolo == "json":
+                modulo.logout(sock, token, datetime.now().isoformat())
+            else:
+                modulo.logout(sock, token)
+    finally:
+        sock.close()
+    return amostras
+
+
+def _endereco(modulo):
+    if hasattr(modulo, "SERVER_IP"):
+        return modulo.SERVER_IP, modulo.SERVER_PORT
+    return modulo.server_ip, modulo.server_port
+
+
+def executar_benchmark(protocolos, operacoes, repeticoes, parametros, diretorio_logs=None):
+    """Roda o benchmark e devolve (linhas agregadas, amostras brutas)."""
+    linhas = []
+    brutas = {}
+    for protocolo in protocolos:
+        modulo = PROTOCOLOS[protocolo]
+        log_original = modulo.LOG_FILE
+        if diretorio_logs is not None:
+            modulo.LOG_FILE = os.path.join(diretorio_logs, f"respostas_benchmark_{protocolo}.txt")
+        try:
+            amostras = medir_protocolo(protocolo, operacoes, repeticoes, parametros)
+        finally:
+            modulo.LOG_FILE = log_original
+        brutas[protocolo] = amostras
+        for op in operacoes:
+            linhas.append(resumir(protocolo, op, amostras[op]))
+    return linhas, brutas
+
+
+# ---------------------------------------
+# Saída
+# ---------------------------------------
+def gerar_markdown(linhas, operacoes, protocolos):
+    """Gera as tabelas por operação e o comparativo geral no layout do Relatorio.md."""
+    por_chave = {(l["protocolo"], l["operacao"]): l for l in linhas}
+    md = []
+
+    for i, op in enumerate(operacoes, 1):
+        md.append(f"**{i}. {OPERACOES[op][1]}**\n")
+        # p50/p90/p99/máx são só do tempo no fio; o total médio inclui as fases de CPU
+        md.append("| Protocolo | Tamanho (bytes) | Serialização (µs) | Rede p50 (ms) "
+                  "| Rede p90 (ms) | Rede p99 (ms) | Rede máx (ms) | Parse (µs) | Total médio (ms) |")
+        md.append("|-----------|------------------|-------------------|---------------"
+                  "|---------------|---------------|---------------|------------|------------------|")
+        for protocolo in protocolos:
+            l = por_chave[(protocolo, op)]
+            md.append(f"| {NOMES_PROTOCOLOS[protocolo]:<9} | {l['bytes_requisicao']:<16g} "
+                      f"| {l['serializacao_ms'] * 1000:<17.1f} | {l['p50_ms']:<13.2f} "
+                      f"| {l['p90_ms']:<13.2f} | {l['p99_ms']:<13.2f} | {l['max_ms']:<13.2f} "
+                      f"| {l['parse_ms'] * 1000:<10.1f} | {l['total_ms']:<16.2f} |")
+        md.append("")
+
+    md.append("**Comparativo geral**\n")
+    md.append("| Métrica              | " + " | ".join(f"{NOMES_PROTOCOLOS[p]:<13}" for p in protocolos) + " |")
+    md.append("|---------------------|" + "|".join("---------------" for _ in protocolos) + "|")
+    resumo = (
+        ("Tamanho Médio", "bytes_requisicao", 1, "~{:.0f} bytes"),
+        ("Serialização Média", "serializacao_ms", 1000, "~{:.1f} µs"),
+        ("Rede Média", "media_ms", 1, "~{:.2f} ms"),
+        ("Rede p99", "p99_ms", 1, "~{:.2f} ms"),
+        ("Total Médio", "total_ms", 1, "~{:.2f} ms"),
+        ("Sucesso", "sucesso_pct", 1, "{:.0f}%"),
+    )
+    for titulo, campo, escala, formato in resumo:
+        celulas = []
+        for protocolo in protocolos:
+            valores = [por_chave[(protocolo, op)][campo] for op in operacoes]
+            celulas.append(f"{formato.format(_media(valores) * escala):<13}")
+        md.append(f"| {titulo:<19} | " + " | ".join(celulas) + " |")
+    md.append("")
+    return "\n".join(md)
+
+
+def salvar_resultados(prefixo, linhas, brutas, markdown, metadados):
+    campos = list(linhas[0].keys()) if linhas else []
+    with open(prefixo + ".csv", "w", newline="", encoding="utf-8") as f:
+        escritor = csv.DictWriter(f, fieldnames=campos)
+        escritor.writeheader()
+        escritor.writerows(linhas)
+
+    with open(prefixo + ".json", "w", encoding="utf-8") as f:
+        json.dump({"metadados": metadados, "resultados": linhas, "amostras": brutas},
+                  f, ensure_ascii=False, indent=2)
+
+    with open(prefixo + ".md", "w", encoding="utf-8") as f:
+        f.write(markdown)
+
+
+def _lista(texto, validos):
+    itens = [x.strip() for x in texto.split(",") if x.strip()]
+    invalidos = [x for x in itens if x not in validos]
+    if invalidos:
+        raise argparse.ArgumentTypeError(f"valores inválidos: {', '.join(invalidos)}")
+    return itens
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos clientes string/JSON/protobuf.")
+    parser.add_argument("--alvo", choices=("local", "remoto"), default="local",
+                        help="servidor_local.py em portas livres ou o servidor remoto da disciplina")
+    parser.add_argument("--repeticoes", "-n", type=int, default=50)
+    parser.add_argument("--protocolos", type=lambda t: _lista(t, PROTOCOLOS), default=list(PROTOCOLOS))
+    parser.add_argument("--operacoes", type=lambda t: _lista(t, OPERACOES), default=list(OPERACOES))
+    parser.add_argument("--numeros", default="1,2", help="números usados na soma")
+    parser.add_argument("--mensagem", default="Hello", help="mensagem usada no echo")
+    parser.add_argument("--saida", default="benchmark_resultados",
+                        help="prefixo dos arquivos .csv/.json/.md gerados")
+    args = parser.parse_args(argv)
+
+    parametros = {"soma": args.numeros, "echo": args.mensagem}
+    diretorio = os.path.dirname(os.path.abspath(args.saida))
+    os.makedirs(diretorio, exist_ok=True)
+    metadados = {
+        "alvo": args.alvo,
+        "repeticoes": args.repeticoes,
+        "data": datetime.now().isoformat(),
+        "parametros": parametros,
+    }
+
+    servidor = None
+    if args.alvo == "local":
+        from servidor_local import ServidorLocal
+        servidor = ServidorLocal().iniciar()
+        servidor.configurar_clientes({p: PROTOCOLOS[p] for p in args.protocolos})
+    try:
+        linhas, brutas = executar_benchmark(args.protocolos, args.operacoes, args.repeticoes,
+                                            parametros, diretorio)
+    finally:
+        if servidor is not None:
+            servidor.parar()
+
+    markdown = gerar_markdown(linhas, args.operacoes, args.protocolos)
+    salvar_resultados(args.saida, linhas, brutas, markdown, metadados)
+    print(markdown)
+    print(f"Resultados salvos em {args.saida}.csv, {args.saida}.json e {args.saida}.md")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Micro-benchmark dos codecs, sem rede.
+
+Para cada protocolo, mede codificação e decodificação de todas as
+requisições (como o cliente monta e o servidor lê) e de todas as respostas
+(como o servidor_local monta e o cliente lê), repetindo cada chamada no
+estilo do timeit. O echo varia o tamanho da mensagem (10 B a 1 MB) e a soma
+a quantidade de números (1 a 1M), para ver como cada formato escala.
+
+Colunas: ns/op (melhor de N rodadas), bytes no fio e pico de memória
+alocada por operação (tracemalloc). O backend do protobuf (python, cpp ou
+upb) aparece no cabeçalho, porque muda os números em uma ordem de grandeza.
+
+Uso:
+    python benchmark_codecs.py
+    python benchmark_codecs.py --protocolos protobuf --max-echo 10000 --max-soma 1000
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from google.protobuf.internal import api_implementation
+
+import mensagens_pb2
+import servidor_local
+from benchmark import NOMES_PROTOCOLOS, PROTOCOLOS, _lista, salvar_resultados
+from codificadores import ALUNO_ID
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+TAMANHOS_ECHO = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+QUANTIDADES_SOMA = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+OPERACOES_FIXAS = ("autenticacao", "timestamp", "status", "historico", "info")
+REPETICOES = 5
+TEMPO_RODADA = 0.05     # segundos por rodada de medição
+IP, PORTA = "127.0.0.1", 0
+
+
+def backend_protobuf():
+    """Implementação do runtime protobuf em uso: "python", "cpp" ou "upb"."""
+    return api_implementation.Type()
+
+
+# ---------------------------------------
+# Medição
+# ---------------------------------------
+def medir_ns(funcao, repeticoes=REPETICOES, tempo_rodada=TEMPO_RODADA):
+    """ns por chamada: o melhor de `repeticoes` rodadas de pelo menos `tempo_rodada` cada."""
+    timer = timeit.Timer(funcao)
+    numero = 1
+    while True:
+        decorrido = timer.timeit(numero)
+        if decorrido >= tempo_rodada:
+            break
+        numero *= 10 if decorrido < tempo_rodada / 10 else 2
+    melhor = min([decorrido] + timer.repeat(repeticoes - 1, numero))
+    return melhor / numero * 1e9
+
+
+def medir_alocacao(funcao):
+    """Pico de bytes alocados durante uma chamada (resultado incluído)."""
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        resultado = funcao()
+        pico = tracemalloc.get_traced_memory()[1]
+        del resultado
+    finally:
+        tracemalloc.stop()
+    return pico - antes
+
+
+# ---------------------------------------
+# Mensagens de cada protocolo
+# ---------------------------------------
+def _ler_requisicao(protocolo, bruto):
+    """Decodifica uma requisição do jeito que o servidor_local faz."""
+    if protocolo == "string":
+        return servidor_local._campos_string(bruto.decode("utf-8"))
+    if protocolo == "json":
+        return json.loads(bruto)
+    req = mensagens_pb2.Requisicao()
+    req.ParseFromString(bruto[4:])
+    return req
+
+
+def _processar(protocolo, estado, bruto):
+    """Executa a requisição no EstadoServidor e devolve a função que codifica a resposta."""
+    if protocolo == "string":
+        campos = servidor_local._processar_string(estado, bruto.decode("utf-8"), IP, PORTA)
+        return lambda: servidor_local._resposta_string(campos)
+    if protocolo == "json":
+        campos = servidor_local._processar_json(estado, json.loads(bruto), IP, PORTA)
+        return lambda: servidor_local._resposta_json(campos)
+    req = _ler_requisicao(protocolo, bruto)
+    comando = servidor_local.COMANDOS_PROTOBUF[req.WhichOneof("tipo")]
+    campos = servidor_local._processar_protobuf(estado, req, IP, PORTA)
+    return lambda: servidor_local._resposta_protobuf(comando, campos)
+
+
+def _ler_resposta(protocolo, codec):
+    """Função que decodifica a resposta bruta como o cliente (leitor + codec)."""
+    if protocolo == "string":
+        return lambda bruto: codec.decodificar(bruto.rstrip(b"\n"))
+    if protocolo == "json":
+        return lambda bruto: codec.decodificar(json.loads(bruto))
+    return lambda bruto: codec.decodificar(memoryview(bruto)[4:])
+
+
+def casos(tamanhos_echo=TAMANHOS_ECHO, quantidades_soma=QUANTIDADES_SOMA):
+    """Gera (operacao, tamanho, parametro); tamanho é None nas operações sem parâmetro."""
+    for operacao in OPERACOES_FIXAS:
+        yield operacao, None, None
+    for tamanho in tamanhos_echo:
+        yield "echo", tamanho, "x" * tamanho
+    for quantidade in quantidades_soma:
+        yield "soma", quantidade, [i + 0.5 for i in range(quantidade)]
+    yield "logout", None, None
+
+
+def medir_protocolo(protocolo, tamanhos_echo, quantidades_soma, repeticoes=REPETICOES):
+    """Devolve as linhas de resultado (requisição e resposta) de cada caso do protocolo."""
+    codec = PROTOCOLOS[protocolo]._codec
+    estado = servidor_local.EstadoServidor()
+    token = estado.autenticar(ALUNO_ID, IP)["token"]
+    ler_resposta = _ler_resposta(protocolo, codec)
+    linhas = []
+
+    for operacao, tamanho, param in casos(tamanhos_echo, quantidades_soma):
+        if operacao == "autenticacao":
+            montar = lambda: codec.montar_auth(ALUNO_ID, datetime.now().isoformat())
+        else:
+            montar = lambda: codec.preparar(token, operacao, param)
+        codificar_requisicao = lambda: codec.codificar(montar())
+        requisicao = b"".join(codificar_requisicao())
+        ler_requisicao = lambda: _ler_requisicao(protocolo, requisicao)
+
+        codificar_resposta = _processar(protocolo, estado, requisicao)
+        resposta = codificar_resposta()
+        decodificar_resposta = lambda: ler_resposta(resposta)
+
+        base = {"protocolo": protocolo, "operacao": operacao, "tamanho": tamanho}
+        for mensagem, bruto, codificar, decodificar in (
+                ("requisicao", requisicao, codificar_requisicao, ler_requisicao),
+                ("resposta", resposta, codificar_resposta, decodificar_resposta)):
+            linhas.append({
+                **base,
+                "mensagem": mensagem,
+                "bytes": len(bruto),
+                "codificacao_ns": round(medir_ns(codificar, repeticoes)),
+                "decodificacao_ns": round(medir_ns(decodificar, repeticoes)),
+                "alocacao_codificacao": medir_alocacao(codificar),
+                "alocacao_decodificacao": medir_alocacao(decodificar),
+            })
+    return linhas
+
+
+# ---------------------------------------
+# Saída
+# ---------------------------------------
+def gerar_markdown(linhas, backend):
+    md = [f"Backend protobuf: **{backend}**\n",
+          "| Protocolo | Operação     | Tamanho   | Mensagem   | Bytes      | Codificação (ns/op) "
+          "| Decodificação (ns/op) | Alocação cod. (B) | Alocação decod. (B) |",
+          "|-----------|--------------|-----------|------------|------------|---------------------"
+          "|-----------------------|-------------------|---------------------|"]
+    for l in linhas:
+        tamanho = "-" if l["tamanho"] is None else l["tamanho"]
+        md.append(f"| {NOMES_PROTOCOLOS[l['protocolo']]:<9} | {l['operacao']:<12} | {tamanho:<9} "
+                  f"| {l['mensagem']:<10} | {l['bytes']:<10} | {l['codificacao_ns']:<19} "
+                  f"| {l['decodificacao_ns']:<21} | {l['alocacao_codificacao']:<17} "
+                  f"| {l['alocacao_decodificacao']:<19} |")
+    md.append("")
+    return "\n".join(md)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark dos codecs string/JSON/protobuf.")
+    parser.add_argument("--protocolos", type=lambda t: _lista(t, PROTOCOLOS), default=list(PROTOCOLOS))
+    parser.add_argument("--max-echo", type=int, default=TAMANHOS_ECHO[-1],
+                        help="maior mensagem de echo medida (bytes)")
+    parser.add_argument("--max-soma", type=int, default=QUANTIDADES_SOMA[-1],
+                        help="maior quantidade de números medida na soma")
+    parser.add_argument("--repeticoes", "-n", type=int, default=REPETICOES)
+    parser.add_argument("--saida", help="prefixo dos arquivos .csv/.json/.md gerados")
+    args = parser.parse_args(argv)
+
+    tamanhos_echo = [t for t in TAMANHOS_ECHO if t <= args.max_echo]
+    quantidades_soma = [q for q in QUANTIDADES_SOMA if q <= args.max_soma]
+    backend = backend_protobuf()
+    print(f"Backend protobuf: {backend}")
+
+    linhas = []
+    for protocolo in args.protocolos:
+        medidas = medir_protocolo(protocolo, tamanhos_echo, quantidades_soma, args.repeticoes)
+        linhas.extend(medidas)
+        print(f"{protocolo}: {len(medidas)} medições")
+
+    markdown = gerar_markdown(linhas, backend)
+    print()
+    print(markdown)
+    if args.saida:
+        metadados = {"data": datetime.now().isoformat(), "backend_protobuf": backend,
+                     "repeticoes": args.repeticoes}
+        salvar_resultados(args.saida, linhas, {}, markdown, metadados)
+        print(f"Resultados salvos em {args.saida}.csv, {args.saida}.json e {args.saida}.md")
+
+
+if __name__ == "__main__":
+    main()
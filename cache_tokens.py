@@ -0,0 +1,154 @@
+"""Cache em disco dos tokens de autenticação, compartilhado entre processos.
+
+O AUTH devolve um token válido por timeout_segundos (3600 no servidor da
+disciplina). Cada token é guardado com a data de expiração, por aluno_id,
+protocolo e endereço do servidor; ao abrir uma sessão o transporte tenta o
+token do cache antes de autenticar e, se o servidor o recusar, o descarta e
+autentica de novo. Execuções curtas (lote, um comando do menu) economizam
+um AUTH inteiro por protocolo.
+
+Acesso concorrente: leituras pegam um arquivo sempre inteiro, porque cada
+escrita grava um temporário e o troca com os.replace(); leitura-alteração-
+escrita acontece sob um lock de arquivo (fcntl.flock no Linux/macOS,
+msvcrt.locking no Windows) mais um threading.Lock para as threads do
+próprio processo.
+
+O arquivo fica em ~/.cache/trabalho_distribuidos/tokens.json, ou no caminho
+da variável de ambiente CACHE_TOKENS; configurar(None) desliga o cache.
+"""
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+from sessoes import MARGEM_EXPIRACAO
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+ARQUIVO = os.environ.get("CACHE_TOKENS") or os.path.join(
+    os.path.expanduser("~"), ".cache", "trabalho_distribuidos", "tokens.json")
+
+
+class CacheTokens:
+    """Tokens por (aluno_id, protocolo, endereço), com expiração em tempo de parede."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(aluno_id, protocolo, endereco):
+        host, porta = endereco
+        return f"{aluno_id}|{protocolo}|{host}:{porta}"
+
+    def obter(self, aluno_id, protocolo, endereco):
+        """(token, segundos de validade restantes) ou None se não houver token utilizável."""
+        entrada = self._ler().get(self.chave(aluno_id, protocolo, endereco))
+        if not isinstance(entrada, dict):
+            return None
+        try:
+            restante = float(entrada["expira"]) - time.time()
+            token = entrada["token"]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if restante <= MARGEM_EXPIRACAO or not token:
+            return None
+        return token, int(restante)
+
+    def guardar(self, aluno_id, protocolo, endereco, token, validade_segundos):
+        expira = time.time() + validade_segundos
+        with self._alterando() as tokens:
+            tokens[self.chave(aluno_id, protocolo, endereco)] = {"token": token, "expira": expira}
+
+    def remover(self, aluno_id, protocolo, endereco, token=None):
+        """Esquece o token do endereço (só se ainda for `token`, quando informado).
+
+        Falha de disco é ignorada: no pior caso o token é recusado de novo.
+        """
+        chave = self.chave(aluno_id, protocolo, endereco)
+        try:
+            with self._alterando() as tokens:
+                entrada = tokens.get(chave)
+                if entrada is not None and (token is None or entrada.get("token") == token):
+                    del tokens[chave]
+        except OSError:
+            pass
+
+    # ---- arquivo ----
+    def _ler(self):
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                tokens = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return tokens if isinstance(tokens, dict) else {}
+
+    @contextlib.contextmanager
+    def _alterando(self):
+        """Dict dos tokens para alterar; gravado (sem os expirados) ao sair do with."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+        with self._lock, open(self.caminho + ".lock", "a+b") as trava:
+            _travar(trava)
+            try:
+                tokens = self._ler()
+                yield tokens
+                agora = time.time()
+                self._gravar({k: v for k, v in tokens.items()
+                              if isinstance(v, dict) and float(v.get("expira", 0)) > agora})
+            finally:
+                _destravar(trava)
+
+    def _gravar(self, tokens):
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        fd, temporario = tempfile.mkstemp(prefix=".tokens", dir=diretorio)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(tokens, f)
+            os.chmod(temporario, 0o600)     # são credenciais
+            os.replace(temporario, self.caminho)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(temporario)
+            raise
+
+
+def _travar(arquivo):
+    if fcntl is not None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+    else:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _destravar(arquivo):
+    if fcntl is not None:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+    else:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# ---------------------------------------
+# Instância usada pelos clientes
+# ---------------------------------------
+_cache = CacheTokens(ARQUIVO)
+
+
+def configurar(caminho):
+    """Passa a usar o arquivo `caminho`; None desliga o cache."""
+    global _cache
+    _cache = CacheTokens(caminho) if caminho else None
+
+
+def atual():
+    """O CacheTokens em uso, ou None se desligado."""
+    return _cache
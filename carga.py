@@ -0,0 +1,270 @@
+"""Gerador de carga em malha fechada, com vários processos.
+
+Cada processo roda sessões em sequência (AUTH -> K operações -> LOGOUT) com
+as funções dos módulos trabalho_distribuidos_*, sorteando as operações
+conforme o mix pedido. Cada worker devolve um histograma de latências; os
+histogramas são somados e o relatório mostra ops/s e percentis para cada
+quantidade de workers (ex.: 1, 2, 4, 8), o que deixa ver onde o cliente
+ou o servidor satura.
+
+Uso:
+    python carga.py --alvo local --protocolos json --workers 1,2,4,8 --duracao 5
+    python carga.py --protocolos protobuf --mix soma=3,echo=1 --operacoes-por-sessao 20
+"""
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import random
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import medicoes
+import saida
+from benchmark import OPERACOES, PROTOCOLOS, _endereco, _lista
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+WORKERS = (1, 2, 4, 8)
+DURACAO = 5.0                 # segundos por quantidade de workers
+OPERACOES_POR_SESSAO = 10
+ESPERA_RECONEXAO = 0.01       # primeira espera (s) depois de um connect recusado; dobra a cada falha
+ESPERA_MAXIMA_RECONEXAO = 1.0
+PERCENTIS = (50, 90, 99)
+
+
+# ---------------------------------------
+# Histograma de latências
+# ---------------------------------------
+class Histograma:
+    """Contagens por faixa de latência (µs) com dois dígitos significativos.
+
+    Erro relativo de no máximo ~10%, tamanho limitado e junção por soma, o
+    que permite combinar os resultados de processos diferentes.
+    """
+
+    __slots__ = ("faixas", "total", "maximo_us")
+
+    def __init__(self, faixas=None):
+        self.faixas = dict(faixas or {})
+        self.total = sum(self.faixas.values())
+        self.maximo_us = max(self.faixas, default=0)
+
+    @staticmethod
+    def faixa(us):
+        if us < 100:
+            return int(us)
+        escala = 10 ** (int(math.log10(us)) - 1)
+        return int(us // escala) * escala
+
+    def registrar(self, ns):
+        faixa = self.faixa(ns / 1000)
+        self.faixas[faixa] = self.faixas.get(faixa, 0) + 1
+        self.total += 1
+        self.maximo_us = max(self.maximo_us, faixa)
+
+    def juntar(self, outro):
+        for faixa, n in outro.faixas.items():
+            self.faixas[faixa] = self.faixas.get(faixa, 0) + n
+        self.total += outro.total
+        self.maximo_us = max(self.maximo_us, outro.maximo_us)
+
+    def percentil(self, p):
+        """Percentil (nearest-rank) em ms."""
+        if not self.total:
+            return 0.0
+        alvo = max(math.ceil(p / 100 * self.total), 1)
+        acumulado = 0
+        for faixa in sorted(self.faixas):
+            acumulado += self.faixas[faixa]
+            if acumulado >= alvo:
+                return faixa / 1000
+        return self.maximo_us / 1000
+
+
+# ---------------------------------------
+# Worker (roda em outro processo)
+# ---------------------------------------
+def _logout(protocolo, modulo, sock, token):
+    if protocolo == "json":
+        modulo.logout(sock, token, datetime.now().isoformat())
+    else:
+        modulo.logout(sock, token)
+
+
+def _worker(protocolo, endereco, mix, operacoes_por_sessao, parametros, inicio, fim, semente,
+            gravar_log, opcoes):
+    """Roda sessões de `inicio` até `fim` (time.time()) e devolve os contadores e o histograma."""
+    modulo = PROTOCOLOS[protocolo]
+    modulo.configurar_servidor(*endereco, **opcoes)
+    # sem --log, nada vai para os logs (no protobuf, nem para o .bin)
+    logs = contextlib.nullcontext() if gravar_log else modulo.logs_desviados()
+    sorteio = random.Random(semente)
+    nomes, pesos = zip(*mix.items())
+    histograma = Histograma()
+    operacoes = sessoes = erros = 0
+
+    espera = inicio - time.time()
+    if espera > 0:
+        time.sleep(espera)
+
+    espera_conexao = ESPERA_RECONEXAO
+    with logs, saida.usar_modo("silencioso"):
+        while time.time() < fim:
+            try:
+                sock = socket.create_connection(endereco, timeout=modulo.TIMEOUT)
+            except OSError:
+                # servidor fora do ar: espera antes de tentar de novo, em vez de girar a CPU
+                erros += 1
+                time.sleep(max(min(espera_conexao, fim - time.time()), 0))
+                espera_conexao = min(espera_conexao * 2, ESPERA_MAXIMA_RECONEXAO)
+                continue
+            espera_conexao = ESPERA_RECONEXAO
+            try:
+                token = modulo.autenticar(sock, datetime.now().isoformat())
+                for _ in range(operacoes_por_sessao):
+                    if time.time() >= fim:
+                        break
+                    op = sorteio.choices(nomes, pesos)[0]
+                    t0 = time.perf_counter_ns()
+                    modulo.executar_operacao(sock, token, OPERACOES[op][0], parametros.get(op))
+                    registro = medicoes.ultimo()
+                    histograma.registrar(registro.total_ns if registro else time.perf_counter_ns() - t0)
+                    operacoes += 1
+                    if registro is not None and not registro.sucesso:
+                        erros += 1
+                _logout(protocolo, modulo, sock, token)
+                sessoes += 1
+            except (modulo.ErroRede, modulo.ErroProtocolo, OSError):
+                erros += 1
+            finally:
+                sock.close()
+
+    return {"operacoes": operacoes, "sessoes": sessoes, "erros": erros,
+            "faixas": histograma.faixas, "duracao": time.time() - inicio}
+
+
+# ---------------------------------------
+# Execução
+# ---------------------------------------
+def medir(protocolo, endereco, workers, mix, operacoes_por_sessao, parametros,
+          duracao=DURACAO, gravar_log=False, opcoes=None):
+    """Roda `workers` processos por `duracao` segundos e devolve uma linha do relatório.
+
+    opcoes: argumentos extras de configurar_servidor (ServidorLocal.opcoes_cliente).
+    """
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+        # dá tempo de os processos subirem antes de começar a contar
+        inicio = time.time() + 1.0 + 0.1 * workers
+        fim = inicio + duracao
+        futuros = [executor.submit(_worker, protocolo, endereco, mix, operacoes_por_sessao,
+                                   parametros, inicio, fim, i, gravar_log, opcoes or {})
+                   for i in range(workers)]
+        resultados = [f.result() for f in futuros]
+
+    histograma = Histograma()
+    for r in resultados:
+        histograma.juntar(Histograma(r["faixas"]))
+    decorrido = max(r["duracao"] for r in resultados)
+    linha = {
+        "protocolo": protocolo,
+        "workers": workers,
+        "operacoes": sum(r["operacoes"] for r in resultados),
+        "sessoes": sum(r["sessoes"] for r in resultados),
+        "erros": sum(r["erros"] for r in resultados),
+        "duracao_s": round(decorrido, 3),
+    }
+    linha["ops_por_s"] = round(linha["operacoes"] / decorrido, 1) if decorrido else 0.0
+    for p in PERCENTIS:
+        linha[f"p{p}_ms"] = round(histograma.percentil(p), 3)
+    linha["max_ms"] = round(histograma.maximo_us / 1000, 3)
+    return linha
+
+
+def gerar_tabela(linhas):
+    md = ["| Protocolo | Workers | ops/s    | Sessões | Erros | p50 (ms) | p90 (ms) | p99 (ms) | Máx (ms) |",
+          "|-----------|---------|----------|---------|-------|----------|----------|----------|----------|"]
+    for l in linhas:
+        md.append(f"| {l['protocolo']:<9} | {l['workers']:<7} | {l['ops_por_s']:<8} | {l['sessoes']:<7} "
+                  f"| {l['erros']:<5} | {l['p50_ms']:<8.2f} | {l['p90_ms']:<8.2f} | {l['p99_ms']:<8.2f} "
+                  f"| {l['max_ms']:<8.2f} |")
+    return "\n".join(md)
+
+
+def _workers(texto):
+    try:
+        quantidades = [int(x) for x in texto.split(",") if x.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"quantidade de workers inválida: {texto}")
+    if not quantidades or any(q < 1 for q in quantidades):
+        raise argparse.ArgumentTypeError(f"as quantidades de workers devem ser inteiros >= 1: {texto}")
+    return quantidades
+
+
+def _mix(texto):
+    mix = {}
+    for item in texto.split(","):
+        nome, _, peso = item.strip().partition("=")
+        if nome not in OPERACOES:
+            raise argparse.ArgumentTypeError(f"operação inválida: {nome}")
+        try:
+            mix[nome] = float(peso) if peso else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"peso inválido: {item}")
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerador de carga multiprocesso dos clientes.")
+    parser.add_argument("--alvo", choices=("local", "remoto"), default="local")
+    parser.add_argument("--protocolos", type=lambda t: _lista(t, PROTOCOLOS), default=["json"])
+    parser.add_argument("--workers", type=_workers, default=list(WORKERS),
+                        help="quantidades de processos a medir, ex.: 1,2,4,8")
+    parser.add_argument("--duracao", type=float, default=DURACAO, help="segundos por quantidade de workers")
+    parser.add_argument("--mix", type=_mix, default={"soma": 1, "echo": 1, "timestamp": 1})
+    parser.add_argument("--operacoes-por-sessao", "-k", type=int, default=OPERACOES_POR_SESSAO)
+    parser.add_argument("--numeros", default="1,2")
+    parser.add_argument("--mensagem", default="Hello")
+    parser.add_argument("--log", action="store_true", help="grava as respostas nos arquivos de log")
+    parser.add_argument("--saida", help="arquivo .json para os resultados")
+    args = parser.parse_args(argv)
+
+    parametros = {"soma": args.numeros, "echo": args.mensagem}
+    servidor = None
+    if args.alvo == "local":
+        from servidor_local import ServidorLocal
+        servidor = ServidorLocal().iniciar()
+    linhas = []
+    try:
+        for protocolo in args.protocolos:
+            opcoes = {}
+            if servidor is not None:
+                endereco = (servidor.host, servidor.portas[protocolo])
+                opcoes = servidor.opcoes_cliente(protocolo)
+            else:
+                endereco = _endereco(PROTOCOLOS[protocolo])
+            for workers in args.workers:
+                linha = medir(protocolo, endereco, workers, args.mix, args.operacoes_por_sessao,
+                              parametros, args.duracao, args.log, opcoes)
+                linhas.append(linha)
+                print(f"{protocolo} x{workers}: {linha['ops_por_s']} ops/s, p99 {linha['p99_ms']} ms, "
+                      f"{linha['erros']} erro(s)")
+    finally:
+        if servidor is not None:
+            servidor.parar()
+
+    print()
+    print(gerar_tabela(linhas))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"mix": args.mix, "operacoes_por_sessao": args.operacoes_por_sessao,
+                       "resultados": linhas}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Clientes asyncio para os protocolos string, JSON e protobuf.
+
+Mesmos codecs dos clientes síncronos (codificadores.py), mas sobre asyncio
+streams: um único processo consegue manter centenas de sessões simultâneas.
+
+    async with ClienteAsyncJson() as cliente:      # conecta e autentica
+        resp = await cliente.soma([1, 2, 3])
+
+As exceções são as ErroRede/ErroProtocolo do módulo síncrono correspondente.
+"""
+import asyncio
+import json
+import struct
+from datetime import datetime
+
+import trabalho_distribuidos_json
+import trabalho_distribuidos_protobuff
+import trabalho_distribuidos_string
+from codificadores import ALUNO_ID, ErroDecodificacao
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+LIMITE_LEITURA = 16 * 1024 * 1024     # maior resposta aceita (bytes)
+CONEXOES_SIMULTANEAS = 100            # connects em paralelo em abrir_varios()
+
+
+# ---------------------------------------
+# Base comum
+# ---------------------------------------
+class _ClienteAsync:
+    """Conversa com o servidor numa conexão; uma requisição por vez."""
+
+    modulo = None
+
+    def __init__(self, host=None, porta=None, timeout=None):
+        self.host = host or self._host_padrao()
+        self.porta = porta or self._porta_padrao()
+        self.timeout = timeout or self.modulo.TIMEOUT
+        self.token = None
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def codec(self):
+        return self.modulo._codec
+
+    @property
+    def ErroRede(self):
+        return self.modulo.ErroRede
+
+    @property
+    def ErroProtocolo(self):
+        return self.modulo.ErroProtocolo
+
+    def _host_padrao(self):
+        return self.modulo.server_ip
+
+    def _porta_padrao(self):
+        return self.modulo.server_port
+
+    # ---- conexão ----
+    async def conectar(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.porta, limit=LIMITE_LEITURA),
+                self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise self.ErroRede(f"Erro ao conectar ({self.host}:{self.porta}): {e!r}")
+        return self
+
+    async def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = self._reader = None
+
+    def _abandonar(self):
+        """Fecha sem esperar; a conexão não pode mais ser usada."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = self._reader = None
+
+    async def __aenter__(self):
+        await self.conectar()
+        try:
+            await self.autenticar()
+        except BaseException:
+            await self.fechar()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        try:
+            if self.token and self._writer is not None:
+                await self.logout()
+        except (self.ErroRede, self.ErroProtocolo):
+            pass
+        finally:
+            await self.fechar()
+
+    async def _requisitar(self, msg):
+        partes = self.codec.codificar(msg)
+        async with self._lock:
+            if self._writer is None:
+                raise self.ErroRede("Cliente não conectado.")
+            lida = False
+            try:
+                self._writer.writelines(partes)
+                await self._writer.drain()
+                bruto = await asyncio.wait_for(self._ler(), self.timeout)
+                lida = True
+                return self.codec.decodificar(bruto)
+            except ErroDecodificacao as e:
+                raise self.ErroProtocolo(str(e))
+            except asyncio.TimeoutError:
+                raise self.ErroRede("Timeout ao receber resposta do servidor.")
+            except asyncio.IncompleteReadError:
+                raise self.ErroRede("Conexão fechada antes de completar a resposta.")
+            except (OSError, asyncio.LimitOverrunError) as e:
+                raise self.ErroRede(f"Erro de rede: {e!r}")
+            finally:
+                if not lida:
+                    # timeout, cancelamento ou erro no meio da leitura: o resto da
+                    # resposta chegaria como resposta da próxima requisição
+                    self._abandonar()
+
+    # ---- comandos ----
+    async def autenticar(self, aluno_id=ALUNO_ID):
+        resp = await self._requisitar(self.codec.montar_auth(aluno_id, datetime.now().isoformat()))
+        try:
+            self.token = self.codec.extrair_autenticacao(resp)[0]
+        except ErroDecodificacao as e:
+            raise self.ErroProtocolo(str(e))
+        if not self.token:
+            raise self.ErroProtocolo("Autenticação falhou.")
+        return self.token
+
+    async def _operacao(self, operacao, param=None):
+        return await self._requisitar(self.codec.preparar(self.token, operacao, param))
+
+    async def soma(self, numeros):
+        return await self._operacao("soma", numeros)
+
+    async def echo(self, mensagem="Hello"):
+        return await self._operacao("echo", mensagem)
+
+    async def op_timestamp(self):
+        return await self._operacao("timestamp")
+
+    async def status(self):
+        return await self._operacao("status")
+
+    async def historico(self):
+        return await self._operacao("historico")
+
+    async def info(self, tipo="basico"):
+        return await self._operacao("info", tipo)
+
+    async def logout(self):
+        resp = await self._operacao("logout")
+        self.token = None
+        return resp
+
+
+# ---------------------------------------
+# Strings (porta 8080)
+# ---------------------------------------
+class ClienteAsyncString(_ClienteAsync):
+    modulo = trabalho_distribuidos_string
+
+    async def _ler(self):
+        return await self._reader.readuntil(self.codec.delimitador)
+
+
+# ---------------------------------------
+# JSON (porta 8081)
+# ---------------------------------------
+class ClienteAsyncJson(_ClienteAsync):
+    modulo = trabalho_distribuidos_json
+
+    async def _ler(self):
+        linha = await self._reader.readline()
+        if not linha:
+            raise self.ErroRede("Nenhum dado recebido (socket fechado).")
+        try:
+            return json.loads(linha)
+        except ValueError:
+            raise self.ErroProtocolo(f"JSON inválido recebido: {linha!r}")
+
+
+# ---------------------------------------
+# Protobuf (porta 8082)
+# ---------------------------------------
+class ClienteAsyncProtobuf(_ClienteAsync):
+    modulo = trabalho_distribuidos_protobuff
+
+    def _host_padrao(self):
+        return self.modulo.SERVER_IP
+
+    def _porta_padrao(self):
+        return self.modulo.SERVER_PORT
+
+    async def _ler(self):
+        header = await self._reader.readexactly(4)
+        tamanho = struct.unpack(">I", header)[0]
+        if tamanho > LIMITE_LEITURA:
+            raise self.ErroProtocolo(f"Frame protobuf grande demais: {tamanho} bytes.")
+        return await self._reader.readexactly(tamanho)
+
+
+CLIENTES = {
+    "string": ClienteAsyncString,
+    "json": ClienteAsyncJson,
+    "protobuf": ClienteAsyncProtobuf,
+}
+
+
+# ---------------------------------------
+# Várias sessões
+# ---------------------------------------
+async def abrir_varios(classe, quantidade, host=None, porta=None,
+                       simultaneas=CONEXOES_SIMULTANEAS):
+    """Conecta e autentica `quantidade` clientes, limitando connects em paralelo."""
+    limite = asyncio.Semaphore(simultaneas)
+
+    async def abrir():
+        async with limite:
+            cliente = classe(host, porta)
+            await cliente.conectar()
+            try:
+                await cliente.autenticar()
+            except BaseException:
+                await cliente.fechar()
+                raise
+            return cliente
+
+    resultados = await asyncio.gather(*(abrir() for _ in range(quantidade)),
+                                      return_exceptions=True)
+    clientes = [r for r in resultados if isinstance(r, _ClienteAsync)]
+    erros = [r for r in resultados if not isinstance(r, _ClienteAsync)]
+    if erros:
+        await fechar_varios(clientes)
+        raise erros[0]
+    return clientes
+
+
+async def fechar_varios(clientes):
+    """Faz logout e fecha todos os clientes, ignorando falhas individuais."""
+    await asyncio.gather(*(c.__aexit__(None, None, None) for c in clientes),
+                         return_exceptions=True)
@@ -0,0 +1,511 @@
+"""Codecs dos três protocolos: montagem das mensagens, framing e decodificação.
+
+Um codec não faz I/O; transporte.Transporte usa o codec para falar com o
+socket e os módulos trabalho_distribuidos_* só escolhem qual codec usar.
+
+    codec.montar(token, operacao, param)  -> mensagem (str, dict ou Requisicao)
+    codec.preparar(token, operacao, param)-> RequisicaoPronta (modelo pré-codificado da sessão)
+    codec.codificar(mensagem)             -> tupla de buffers prontos para o socket
+    codec.leitor(sock, tamanho_maximo)    -> leitor persistente da conexão
+    codec.decodificar(bruto)              -> resposta (str, dict ou Resposta)
+
+Modelos: numa sessão, o token e quase todo o resto da requisição não mudam.
+codec.modelo(token) guarda os bytes já codificados em volta do token (no
+protobuf, inclusive as tags e prefixos de tamanho do ComandoOperacao) e, a
+cada requisição, só o campo variável (números, mensagem, timestamp) é
+codificado e encaixado.
+"""
+import json
+import struct
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import mensagens_pb2
+import protocolo_string
+from leitores import leitor_de, leitor_frames_de, leitor_ndjson_de
+from sessoes import VALIDADE_PADRAO
+
+ALUNO_ID = "554229"
+OPERACOES_SIMPLES = ("timestamp", "status", "historico")
+MODELOS_EM_CACHE = 64       # sessões (tokens) com modelo guardado por codec (LRU)
+
+
+class ErroDecodificacao(ValueError):
+    """Resposta que chegou inteira mas não pôde ser interpretada."""
+
+
+def _texto_numeros(numeros):
+    return numeros if isinstance(numeros, str) else ",".join(str(n) for n in numeros)
+
+
+def _lista_numeros(numeros):
+    if isinstance(numeros, str):
+        return [float(x.strip()) for x in numeros.split(",") if x.strip()]
+    if not isinstance(numeros, list):
+        return list(numeros)
+    return numeros
+
+
+class RequisicaoPronta(tuple):
+    """(modelo, operacao, param, timestamp): codificada pelo modelo da sessão no envio.
+
+    É uma tupla para que criar uma custe menos que montar a mensagem que ela substitui.
+    """
+
+    __slots__ = ()
+
+    def codificar(self):
+        modelo, operacao, param, timestamp = self
+        return modelo.codificar(operacao, param, timestamp)
+
+
+class Codec:
+    protocolo = None     # chave usada em medicoes, gravacao e benchmark
+    nome = None          # como aparece nos prints ("STRING", "JSON", "PROTOBUF")
+    descricao = None     # como aparece nas mensagens de erro
+    classe_modelo = None
+
+    def __init__(self):
+        self._modelos = OrderedDict()
+        self._lock_modelos = threading.Lock()
+
+    def modelo(self, token):
+        """Modelo da sessão de `token`, criado na primeira requisição e reaproveitado.
+
+        Passando de MODELOS_EM_CACHE tokens, sai só o usado há mais tempo; as
+        sessões ativas continuam com o seu modelo.
+        """
+        with self._lock_modelos:
+            modelo = self._modelos.get(token)
+            if modelo is not None:
+                self._modelos.move_to_end(token)
+                return modelo
+            modelo = self._modelos[token] = self._criar_modelo(token)
+            if len(self._modelos) > MODELOS_EM_CACHE:
+                self._modelos.popitem(last=False)
+        return modelo
+
+    def _criar_modelo(self, token):
+        return self.classe_modelo(token)
+
+    def preparar(self, token, operacao, param=None, timestamp=None):
+        """Requisição que será codificada pelo modelo da sessão de `token`."""
+        return tuple.__new__(RequisicaoPronta, (self.modelo(token), operacao, param, timestamp))
+
+    def codificar(self, mensagem):
+        if isinstance(mensagem, RequisicaoPronta):
+            return mensagem.codificar()
+        return self._codificar(mensagem)
+
+    def _codificar(self, mensagem):
+        raise NotImplementedError
+
+    def tamanho_exibido(self, partes):
+        """Tamanho mostrado no print "Tamanho da mensagem"."""
+        return sum(len(p) for p in partes)
+
+    def leitor(self, sock, tamanho_maximo):
+        raise NotImplementedError
+
+    def ns_decodificacao_na_leitura(self, leitor):
+        """Tempo de decodificação já gasto pelo leitor (NDJSON decodifica ao ler)."""
+        return 0
+
+    def bytes_recebidos(self, bruto, leitor):
+        return len(bruto)
+
+    def decodificar(self, bruto):
+        raise NotImplementedError
+
+    def sucesso(self, resp):
+        raise NotImplementedError
+
+    def token_rejeitado(self, resp):
+        raise NotImplementedError
+
+
+# ---------------------------------------
+# Strings (porta 8080)
+# ---------------------------------------
+def _sem_escape(valor):
+    return valor
+
+
+def _nums_string(numeros, escapar):
+    # números formatados por str() nunca têm caracteres a escapar
+    return escapar(numeros) if isinstance(numeros, str) else ",".join(str(n) for n in numeros)
+
+
+class RespostaString(str):
+    """Resposta do protocolo de strings (o texto como veio, sem o \\n).
+
+    comando e campos (dict com os valores, desescapados se escapada) são lidos
+    numa passada só, no primeiro acesso, e reaproveitados pelo token, pela
+    formatação e por quem mais precisar deles.
+    """
+
+    escapada = False
+    _lida = None
+
+    def _ler(self):
+        if self._lida is None:
+            self._lida = protocolo_string.ler(self, self.escapada)
+        return self._lida
+
+    @property
+    def comando(self):
+        return self._ler()[0]
+
+    @property
+    def campos(self):
+        return self._ler()[1]
+
+
+class ModeloString:
+    """Bytes de cada comando já montados com o token de uma sessão."""
+
+    FIM = b"|FIM\n"
+
+    def __init__(self, token, escapar=_sem_escape):
+        self._escapar = escapar
+        token = escapar(str(token)).encode("utf-8")
+        base = b"OP|token=" + token + b"|operacao="
+        self._fixas = {op: base + op.encode("ascii") + self.FIM for op in OPERACOES_SIMPLES}
+        self._fixas["logout"] = b"LOGOUT|token=" + token + self.FIM
+        self._soma = base + b"soma|nums="
+        self._echo = base + b"echo|mensagem="
+        self._info = b"INFO|token=" + token + b"|tipo="
+
+    def codificar(self, operacao, param=None, timestamp=None):
+        fixa = self._fixas.get(operacao)
+        if fixa is not None:
+            return (fixa,)
+        if operacao == "soma":
+            return self._soma, _nums_string(param, self._escapar).encode("utf-8"), self.FIM
+        if operacao == "echo":
+            conteudo = self._escapar(param if param is not None else "Hello")
+            return self._echo, conteudo.encode("utf-8"), self.FIM
+        if operacao == "info":
+            return self._info, self._escapar(param or "basico").encode("utf-8"), self.FIM
+        raise ValueError(f"Operação desconhecida (strings): {operacao}")
+
+
+class CodecString(Codec):
+    """escapar: usa o escape de protocolo_string nos valores enviados e recebidos.
+
+    Só o servidor_local o entende; com o servidor da disciplina (padrão) os
+    valores vão e voltam como estão.
+    """
+
+    protocolo = "string"
+    nome = "STRING"
+    descricao = "strings"
+    delimitador = b"|FIM"
+    classe_modelo = ModeloString
+
+    def __init__(self, escapar=False):
+        super().__init__()
+        self.configurar_escape(escapar)
+
+    def configurar_escape(self, escapar):
+        """Liga ou desliga o escape; se mudou, os modelos já montados são descartados."""
+        with self._lock_modelos:
+            if getattr(self, "escapar", None) == bool(escapar):
+                return
+            self.escapar = bool(escapar)
+            self._escapar = protocolo_string.escapar if escapar else _sem_escape
+            self._modelos.clear()
+
+    def _criar_modelo(self, token):
+        return ModeloString(token, self._escapar)
+
+    def montar_auth(self, aluno_id, timestamp):
+        return f'AUTH|aluno_id={self._escapar(aluno_id)}|TIMESTAMP={self._escapar(timestamp)}|FIM'
+
+    def montar(self, token, operacao, param=None, timestamp=None):
+        token = self._escapar(str(token))
+        if operacao == 'soma':
+            return f'OP|token={token}|operacao=soma|nums={_nums_string(param, self._escapar)}|FIM'
+        if operacao == 'echo':
+            conteudo = self._escapar(param if param is not None else "Hello")
+            return f'OP|token={token}|operacao=echo|mensagem={conteudo}|FIM'
+        if operacao in OPERACOES_SIMPLES:
+            return f'OP|token={token}|operacao={operacao}|FIM'
+        if operacao == 'info':
+            return f'INFO|token={token}|tipo={self._escapar(param or "basico")}|FIM'
+        if operacao == 'logout':
+            return f'LOGOUT|token={token}|FIM'
+        raise ValueError(f"Operação desconhecida (strings): {operacao}")
+
+    def _codificar(self, mensagem):
+        return ((mensagem + "\n").encode('utf-8'),)
+
+    def leitor(self, sock, tamanho_maximo):
+        return leitor_de(sock, self.delimitador, tamanho_maximo=tamanho_maximo)
+
+    def decodificar(self, bruto):
+        try:
+            resp = RespostaString(bruto.decode('utf-8').strip())
+        except UnicodeDecodeError as e:
+            raise ErroDecodificacao(f"Resposta strings não é UTF-8: {e}")
+        if self.escapar:
+            resp.escapada = True
+        return resp
+
+    def extrair_autenticacao(self, resp):
+        """(token, validade em segundos) de uma resposta AUTH."""
+        if not isinstance(resp, RespostaString):
+            resp = self.decodificar(resp.encode("utf-8"))
+        campos = resp.campos
+        if not campos:
+            raise ErroDecodificacao("AUTH malformado (strings).")
+
+        try:
+            validade = int(campos.get("timeout_segundos") or VALIDADE_PADRAO)
+        except ValueError:
+            validade = VALIDADE_PADRAO
+
+        token = campos.get("token")
+        if token is None:
+            # sem "token=": vale o primeiro campo, como "OK|<token>|..."
+            chave, valor = next(iter(campos.items()))
+            token = chave if valor is None else valor
+        return token, validade
+
+    def sucesso(self, resp):
+        return resp.startswith("OK")
+
+    def token_rejeitado(self, resp):
+        if not resp:
+            return False
+        return not resp.startswith("OK|") and "token" in resp.lower()
+
+
+# ---------------------------------------
+# JSON (porta 8081)
+# ---------------------------------------
+class ModeloJSON:
+    """Pedaços do JSON de cada comando já montados com o token de uma sessão.
+
+    Os campos saem na mesma ordem e formato do json.dumps do dict de montar().
+    """
+
+    def __init__(self, token):
+        token = json.dumps(token).encode("utf-8")
+        operacao = b'{"tipo": "operacao", "token": ' + token + b', "operacao": '
+        self._simples = {op: operacao + json.dumps(op).encode("utf-8") + b', "timestamp": '
+                         for op in OPERACOES_SIMPLES}
+        self._soma = operacao + b'"soma", "parametros": {"numeros": '
+        self._echo = operacao + b'"echo", "parametros": {"mensagem": '
+        self._info = b'{"tipo": "info", "token": ' + token + b', "timestamp": '
+        self._logout = b'{"tipo": "logout", "token": ' + token + b', "timestamp": '
+
+    def codificar(self, operacao, param=None, timestamp=None):
+        fim = json.dumps(timestamp or datetime.now().isoformat()).encode("utf-8") + b"}\n"
+        prefixo = self._simples.get(operacao)
+        if prefixo is not None:
+            return prefixo, fim
+        if operacao == "soma":
+            valor = json.dumps(_lista_numeros(param)).encode("utf-8")
+            return self._soma, valor, b'}, "timestamp": ', fim
+        if operacao == "echo":
+            valor = json.dumps(param if param is not None else "Hello").encode("utf-8")
+            return self._echo, valor, b'}, "timestamp": ', fim
+        if operacao == "info":
+            return self._info, fim
+        if operacao == "logout":
+            return self._logout, fim
+        raise ValueError(f"Operação desconhecida (json): {operacao}")
+
+
+class CodecJSON(Codec):
+    protocolo = "json"
+    nome = "JSON"
+    descricao = "json"
+    classe_modelo = ModeloJSON
+
+    def montar_auth(self, aluno_id, timestamp):
+        return {'tipo': 'autenticar', 'aluno_id': aluno_id, 'timestamp': timestamp}
+
+    def montar(self, token, operacao, param=None, timestamp=None):
+        timestamp = timestamp or datetime.now().isoformat()
+        if operacao == 'soma':
+            return {'tipo': 'operacao', 'token': token, 'operacao': 'soma',
+                    'parametros': {'numeros': _lista_numeros(param)}, 'timestamp': timestamp}
+        if operacao == 'echo':
+            texto = param if param is not None else "Hello"
+            return {'tipo': 'operacao', 'token': token, 'operacao': 'echo',
+                    'parametros': {'mensagem': texto}, 'timestamp': timestamp}
+        if operacao in OPERACOES_SIMPLES:
+            return {'tipo': 'operacao', 'token': token, 'operacao': operacao, 'timestamp': timestamp}
+        if operacao == 'info':
+            return {'tipo': 'info', 'token': token, 'timestamp': timestamp}
+        if operacao == 'logout':
+            return {'tipo': 'logout', 'token': token, 'timestamp': timestamp}
+        raise ValueError(f"Operação desconhecida (json): {operacao}")
+
+    def _codificar(self, mensagem):
+        return ((json.dumps(mensagem) + '\n').encode('utf-8'),)
+
+    def leitor(self, sock, tamanho_maximo):
+        return leitor_ndjson_de(sock, tamanho_maximo=tamanho_maximo)
+
+    def ns_decodificacao_na_leitura(self, leitor):
+        return leitor.ultimo_ns_decodificacao
+
+    def bytes_recebidos(self, bruto, leitor):
+        return leitor.ultimo_tamanho
+
+    def decodificar(self, bruto):
+        # o LeitorNDJSON já entrega o objeto decodificado
+        if not isinstance(bruto, dict):
+            raise ErroDecodificacao("Resposta JSON malformada (esperado objeto).")
+        return bruto
+
+    def extrair_autenticacao(self, resp):
+        try:
+            validade = int(resp.get('timeout_segundos', VALIDADE_PADRAO))
+        except (TypeError, ValueError):
+            validade = VALIDADE_PADRAO
+        return resp.get('token'), validade
+
+    def sucesso(self, resp):
+        return resp.get('status') not in ('erro', 'error') and resp.get('sucesso', True) is not False
+
+    def token_rejeitado(self, resp):
+        if not isinstance(resp, dict) or resp.get('status') not in ('erro', 'error'):
+            return False
+        return 'token' in str(resp.get('mensagem', '')).lower()
+
+
+# ---------------------------------------
+# Protobuf (porta 8082)
+# ---------------------------------------
+def _varint(n):
+    saida = bytearray()
+    while n > 0x7F:
+        saida.append((n & 0x7F) | 0x80)
+        n >>= 7
+    saida.append(n)
+    return bytes(saida)
+
+
+def _delimitado(numero, dados):
+    """Campo length-delimited (wire type 2): tag, tamanho e dados."""
+    return _varint(numero << 3 | 2) + _varint(len(dados)) + dados
+
+
+def _quadro(requisicao):
+    return struct.pack(">I", len(requisicao)) + requisicao
+
+
+class ModeloProtobuf:
+    """Requisicao serializada à mão em volta do token de uma sessão.
+
+    Requisicao.operacao (campo 2) = ComandoOperacao{token=1, operacao=2,
+    parametros=3 (map: entrada{key=1, value=2})}. Token e nome da operação
+    ficam pré-codificados; para soma/echo só o valor do parâmetro e os
+    prefixos de tamanho que dependem dele são calculados a cada envio.
+    """
+
+    def __init__(self, token):
+        token = _delimitado(1, str(token or "").encode("utf-8"))
+        self._fixas = {op: _quadro(_delimitado(2, token + _delimitado(2, op.encode("ascii"))))
+                       for op in OPERACOES_SIMPLES}
+        self._fixas["logout"] = _quadro(_delimitado(4, token))
+        self._corpos = {
+            "soma": (token + _delimitado(2, b"soma"), _delimitado(1, b"numeros") + b"\x12"),
+            "echo": (token + _delimitado(2, b"echo"), _delimitado(1, b"mensagem") + b"\x12"),
+        }
+
+    def codificar(self, operacao, param=None, timestamp=None):
+        fixa = self._fixas.get(operacao)
+        if fixa is not None:
+            return (fixa,)
+        if operacao == "info":
+            return (_quadro(_delimitado(3, _delimitado(1, (param or "basico").encode("utf-8")))),)
+        if operacao == "soma":
+            valor = _texto_numeros(param).encode("utf-8")
+        elif operacao == "echo":
+            valor = (param if param is not None else "Hello").encode("utf-8")
+        else:
+            raise ValueError(f"Operação desconhecida (protobuf): {operacao}")
+
+        corpo, chave = self._corpos[operacao]
+        entrada = chave + _varint(len(valor))                       # entrada do map sem o valor
+        mapa = b"\x1a" + _varint(len(entrada) + len(valor))          # parametros (campo 3)
+        tamanho_corpo = len(corpo) + len(mapa) + len(entrada) + len(valor)
+        operacao_ = b"\x12" + _varint(tamanho_corpo)                  # Requisicao.operacao (campo 2)
+        cabecalho = struct.pack(">I", len(operacao_) + tamanho_corpo)
+        return b"".join((cabecalho, operacao_, corpo, mapa, entrada)), valor
+
+
+class CodecProtobuf(Codec):
+    protocolo = "protobuf"
+    nome = "PROTOBUF"
+    descricao = "protobuf"
+    classe_modelo = ModeloProtobuf
+
+    def montar_auth(self, aluno_id, timestamp):
+        req = mensagens_pb2.Requisicao()
+        req.auth.aluno_id = aluno_id
+        req.auth.timestamp_cliente = timestamp
+        return req
+
+    def montar(self, token, operacao, param=None, timestamp=None):
+        req = mensagens_pb2.Requisicao()
+        if operacao == "info":
+            req.info.tipo = param or "basico"
+        elif operacao == "logout":
+            req.logout.token = token
+        elif operacao in ("soma", "echo") + OPERACOES_SIMPLES:
+            req.operacao.token = token
+            req.operacao.operacao = operacao
+            if operacao == "soma":
+                numeros = param if isinstance(param, str) else ",".join(str(n) for n in param)
+                req.operacao.parametros["numeros"] = numeros
+            elif operacao == "echo":
+                req.operacao.parametros["mensagem"] = param if param is not None else "Hello"
+        else:
+            raise ValueError(f"Operação desconhecida (protobuf): {operacao}")
+        return req
+
+    def _codificar(self, mensagem):
+        payload = mensagem.SerializeToString()
+        return struct.pack(">I", len(payload)), payload
+
+    def tamanho_exibido(self, partes):
+        return sum(len(p) for p in partes) - 4
+
+    def leitor(self, sock, tamanho_maximo):
+        return leitor_frames_de(sock, tamanho_maximo=tamanho_maximo)
+
+    def bytes_recebidos(self, bruto, leitor):
+        return 4 + len(bruto)
+
+    def decodificar(self, bruto):
+        resp = mensagens_pb2.Resposta()
+        try:
+            resp.ParseFromString(bruto)
+        except Exception:
+            raise ErroDecodificacao("Falha ao decodificar protobuf (payload inválido).")
+        return resp
+
+    def extrair_autenticacao(self, resp):
+        if not resp.HasField("ok"):
+            raise ErroDecodificacao("Resposta AUTH não possui campo OK.")
+        dados = resp.ok.dados
+        if "token" not in dados:
+            raise ErroDecodificacao("Token não encontrado na resposta de autenticação.")
+        try:
+            validade = int(dados.get("timeout_segundos", VALIDADE_PADRAO))
+        except ValueError:
+            validade = VALIDADE_PADRAO
+        return dados["token"], validade
+
+    def sucesso(self, resp):
+        return resp.HasField("ok")
+
+    def token_rejeitado(self, resp):
+        return resp is not None and resp.HasField("erro") and "token" in resp.erro.mensagem.lower()
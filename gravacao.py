@@ -0,0 +1,386 @@
+"""Gravação e reprodução dos bytes trocados com o servidor.
+
+Gravação: com iniciar_gravacao(arquivo) ativa, todo socket aberto pelos
+clientes (via envolver()) registra no arquivo de captura o que foi enviado e
+recebido, separado por conexão.
+
+Reprodução: reproduzir(arquivo) recria cada conexão com um SocketReplay,
+que ignora os envios e devolve os bytes gravados nos recv/recv_into, e
+refaz as operações gravadas pelas funções públicas dos clientes
+(autenticar, executar_operacao e logout: modelos da sessão, codificação,
+Transporte.requisitar com leitura, decodificação, log e format_*), sem rede.
+Assim o custo de CPU do cliente por operação pode ser medido sem o ruído da
+rede.
+
+Formato da captura, por evento: [tipo:1][conexão:4][tamanho:4][dados]
+  A = abertura (dados: nome do protocolo, mais ";escapado" se o cliente de
+  strings escapava os valores), E = enviado, R = recebido
+
+Uso:
+    python gravacao.py gravar captura.bin --alvo local --repeticoes 5
+    python gravacao.py gravar captura.bin --alvo local --escapar       # strings escapadas
+    python gravacao.py reproduzir captura.bin --repeticoes 1000
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import struct
+import threading
+from datetime import datetime
+
+# ---------------------------------------
+# Formato
+# ---------------------------------------
+EVENTO = struct.Struct(">cII")
+ABERTURA, ENVIADO, RECEBIDO = b"A", b"E", b"R"
+ESCAPADO = ";escapado"
+
+_gravador = None
+
+
+# ---------------------------------------
+# Gravação
+# ---------------------------------------
+class Gravador:
+    """Arquivo de captura compartilhado por todos os sockets gravados."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, "wb")
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def nova_conexao(self, protocolo, escapado=False):
+        conexao = next(self._ids)
+        self.evento(ABERTURA, conexao, (protocolo + (ESCAPADO if escapado else "")).encode("ascii"))
+        return conexao
+
+    def evento(self, tipo, conexao, dados):
+        with self._lock:
+            self._arquivo.write(EVENTO.pack(tipo, conexao, len(dados)))
+            self._arquivo.write(dados)
+
+    def fechar(self):
+        with self._lock:
+            self._arquivo.close()
+
+
+class SocketGravador:
+    """Repassa tudo ao socket real, gravando os bytes enviados e recebidos."""
+
+    def __init__(self, sock, gravador, protocolo, escapado=False):
+        self._sock = sock
+        self._gravador = gravador
+        self._conexao = gravador.nova_conexao(protocolo, escapado)
+
+    def __getattr__(self, nome):
+        return getattr(self._sock, nome)
+
+    def sendall(self, dados):
+        self._sock.sendall(dados)
+        self._gravador.evento(ENVIADO, self._conexao, bytes(dados))
+
+    def sendmsg(self, buffers, *args):
+        dados = b"".join(buffers)
+        if not hasattr(self._sock, "sendmsg"):
+            self.sendall(dados)
+            return len(dados)
+        enviados = self._sock.sendmsg([dados], *args)
+        self._gravador.evento(ENVIADO, self._conexao, dados[:enviados])
+        return enviados
+
+    def recv(self, n, *args):
+        dados = self._sock.recv(n, *args)
+        self._gravador.evento(RECEBIDO, self._conexao, dados)
+        return dados
+
+    def recv_into(self, buffer, n=0, *args):
+        lidos = self._sock.recv_into(buffer, n, *args)
+        self._gravador.evento(RECEBIDO, self._conexao, bytes(memoryview(buffer)[:lidos]))
+        return lidos
+
+
+def iniciar_gravacao(caminho):
+    """Passa a gravar os sockets abertos pelos clientes em `caminho`."""
+    global _gravador
+    parar_gravacao()
+    _gravador = Gravador(caminho)
+    return _gravador
+
+
+def parar_gravacao():
+    global _gravador
+    if _gravador is not None:
+        _gravador.fechar()
+        _gravador = None
+
+
+@contextlib.contextmanager
+def gravando(caminho):
+    iniciar_gravacao(caminho)
+    try:
+        yield
+    finally:
+        parar_gravacao()
+
+
+def envolver(sock, protocolo, escapado=False):
+    """Chamado pelos clientes ao criar o socket; devolve-o gravado se houver gravação ativa.
+
+    escapado: o codec de strings escapa os valores (CodecString.escapar).
+    """
+    if _gravador is None:
+        return sock
+    return SocketGravador(sock, _gravador, protocolo, escapado)
+
+
+# ---------------------------------------
+# Reprodução
+# ---------------------------------------
+class ConexaoGravada:
+    __slots__ = ("protocolo", "escapado", "enviado", "recebido")
+
+    def __init__(self, protocolo, escapado=False):
+        self.protocolo = protocolo
+        self.escapado = escapado
+        self.enviado = bytearray()
+        self.recebido = bytearray()
+
+
+def ler_captura(caminho):
+    """Devolve as ConexaoGravada do arquivo, na ordem em que foram abertas."""
+    conexoes = {}
+    with open(caminho, "rb") as f:
+        while True:
+            cabecalho = f.read(EVENTO.size)
+            if len(cabecalho) < EVENTO.size:
+                break
+            tipo, conexao, tamanho = EVENTO.unpack(cabecalho)
+            dados = f.read(tamanho)
+            if tipo == ABERTURA:
+                protocolo, _, opcao = dados.decode("ascii").partition(";")
+                conexoes[conexao] = ConexaoGravada(protocolo, opcao == ESCAPADO[1:])
+            elif tipo == ENVIADO:
+                conexoes[conexao].enviado += dados
+            elif tipo == RECEBIDO:
+                conexoes[conexao].recebido += dados
+    return list(conexoes.values())
+
+
+class SocketReplay:
+    """Socket falso: descarta os envios e devolve os bytes gravados, sem esperar."""
+
+    def __init__(self, recebido):
+        self._dados = memoryview(bytes(recebido))
+        self._posicao = 0
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        pass
+
+    def sendall(self, dados):
+        pass
+
+    def sendmsg(self, buffers, *args):
+        return sum(len(b) for b in buffers)
+
+    def recv(self, n, *args):
+        parte = self._dados[self._posicao:self._posicao + n]
+        self._posicao += len(parte)
+        return parte.tobytes()
+
+    def recv_into(self, buffer, n=0, *args):
+        destino = memoryview(buffer)
+        n = min(n or len(destino), len(self._dados) - self._posicao)
+        destino[:n] = self._dados[self._posicao:self._posicao + n]
+        self._posicao += n
+        return n
+
+
+def _requisicoes(conexao):
+    """Separa os bytes enviados numa conexão em (rótulo, token, parâmetro) de cada requisição.
+
+    O rótulo é "autenticacao", "logout", "info" ou a operação; o parâmetro é o
+    que executar_operacao recebe (números da soma, mensagem do echo) ou None.
+    """
+    dados = bytes(conexao.enviado)
+    if conexao.protocolo == "protobuf":
+        import mensagens_pb2
+        posicao = 0
+        while posicao + 4 <= len(dados):
+            tamanho = struct.unpack_from(">I", dados, posicao)[0]
+            req = mensagens_pb2.Requisicao()
+            req.ParseFromString(dados[posicao + 4:posicao + 4 + tamanho])
+            posicao += 4 + tamanho
+            tipo = req.WhichOneof("tipo")
+            if tipo == "operacao":
+                parametros = req.operacao.parametros
+                yield (req.operacao.operacao, req.operacao.token,
+                       parametros.get("numeros", parametros.get("mensagem")))
+            elif tipo == "logout":
+                yield "logout", req.logout.token, None
+            else:
+                yield ("autenticacao" if tipo == "auth" else tipo), None, None
+        return
+
+    if conexao.protocolo == "json":
+        for linha in dados.decode("utf-8").splitlines():
+            if not linha.strip():
+                continue
+            msg = json.loads(linha)
+            tipo = msg.get("tipo")
+            if tipo == "operacao":
+                parametros = msg.get("parametros") or {}
+                yield (msg.get("operacao"), msg.get("token"),
+                       parametros.get("numeros", parametros.get("mensagem")))
+            else:
+                yield ("autenticacao" if tipo == "autenticar" else tipo), msg.get("token"), None
+        return
+
+    import protocolo_string
+    # valores escapados nunca contêm "|", então "|FIM" só aparece no fim de cada mensagem;
+    # sem escape, vale o fim de linha que o cliente põe depois do "|FIM"
+    for corpo in dados.decode("utf-8").split("|FIM" if conexao.escapado else "|FIM\n"):
+        corpo = corpo.strip()
+        if not corpo:
+            continue
+        comando, campos = protocolo_string.ler(corpo, conexao.escapado)
+        if comando == "OP":
+            yield (campos.get("operacao"), campos.get("token"),
+                   campos.get("nums", campos.get("mensagem")))
+        else:
+            yield ("autenticacao" if comando == "AUTH" else comando.lower()), campos.get("token"), None
+
+
+def _refazer(protocolo, modulo, sock, requisicoes, codigos):
+    """Refaz as requisições de uma conexão pelas funções públicas do cliente."""
+    for rotulo, token, param in requisicoes:
+        try:
+            if rotulo == "autenticacao":
+                modulo.autenticar(sock, datetime.now().isoformat())
+            elif rotulo == "logout":
+                if protocolo == "json":
+                    modulo.logout(sock, token, datetime.now().isoformat())
+                else:
+                    modulo.logout(sock, token)
+            elif rotulo in codigos:
+                modulo.executar_operacao(sock, token, codigos[rotulo], param)
+        except (modulo.ErroRede, modulo.ErroProtocolo):
+            return
+
+
+def reproduzir(caminho, repeticoes=1):
+    """Refaz as requisições gravadas `repeticoes` vezes e devolve médias por (protocolo, operação).
+
+    Cada linha do resultado traz n e as médias em ms das fases de CPU do
+    cliente (codificacao, decodificacao, formatacao, log) e do total.
+    """
+    import medicoes
+    import saida
+    from benchmark import OPERACOES, PROTOCOLOS
+    codigos = {op: codigo for op, (codigo, _) in OPERACOES.items()}
+
+    conexoes = [(c, list(_requisicoes(c))) for c in ler_captura(caminho)]
+    acumulado = {}
+
+    def coletar(registro):
+        chave = (registro.protocolo, registro.operacao)
+        soma = acumulado.setdefault(chave, dict.fromkeys(
+            ("n", "codificacao", "decodificacao", "formatacao", "log", "total"), 0))
+        soma["n"] += 1
+        for fase in ("codificacao", "decodificacao", "formatacao", "log"):
+            soma[fase] += registro.fases[fase]
+        soma["total"] += registro.total_ns
+
+    medicoes.assinar(coletar)
+    try:
+        # modo detalhado: a formatação faz parte do custo de CPU medido
+        with contextlib.ExitStack() as pilha, open(os.devnull, "w") as nulo, \
+                contextlib.redirect_stdout(nulo), saida.usar_modo("detalhado"):
+            for modulo in PROTOCOLOS.values():
+                pilha.enter_context(modulo.logs_desviados())
+            for _ in range(repeticoes):
+                for conexao, requisicoes in conexoes:
+                    modulo = PROTOCOLOS[conexao.protocolo]
+                    sock = SocketReplay(conexao.recebido)
+                    # as respostas são lidas com o mesmo escape da gravação
+                    escape = (modulo.usando_escape(conexao.escapado) if conexao.protocolo == "string"
+                              else contextlib.nullcontext())
+                    with escape:
+                        _refazer(conexao.protocolo, modulo, sock, requisicoes, codigos)
+    finally:
+        medicoes.cancelar(coletar)
+
+    linhas = []
+    for (protocolo, operacao), soma in sorted(acumulado.items()):
+        n = soma.pop("n")
+        linha = {"protocolo": protocolo, "operacao": operacao, "n": n}
+        linha.update({f"{fase}_ms": round(ns / n / 1e6, 4) for fase, ns in soma.items()})
+        linhas.append(linha)
+    return linhas
+
+
+# ---------------------------------------
+# Linha de comando
+# ---------------------------------------
+def _gravar(args):
+    from benchmark import OPERACOES, PROTOCOLOS
+    servidor = None
+    if args.alvo == "local":
+        from servidor_local import ServidorLocal
+        servidor = ServidorLocal(escapar=args.escapar).iniciar()
+        servidor.configurar_clientes(PROTOCOLOS)
+    parametros = {"soma": args.numeros, "echo": args.mensagem}
+    try:
+        with gravando(args.arquivo), open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            for protocolo, modulo in PROTOCOLOS.items():
+                for op, (op_code, _) in OPERACOES.items():
+                    for _ in range(args.repeticoes):
+                        modulo.executar_operacao_pool(op_code, parametros.get(op))
+                modulo.encerrar_sessoes()
+    finally:
+        if servidor is not None:
+            servidor.parar()
+    print(f"Captura salva em {args.arquivo}")
+
+
+def _reproduzir(args):
+    linhas = reproduzir(args.arquivo, args.repeticoes)
+    print("| Protocolo | Operação     | n      | Codificação (ms) | Decodificação (ms) "
+          "| Formatação (ms) | Log (ms) | Total (ms) |")
+    print("|-----------|--------------|--------|------------------|--------------------"
+          "|-----------------|----------|------------|")
+    for l in linhas:
+        print(f"| {l['protocolo']:<9} | {l['operacao']:<12} | {l['n']:<6} | {l['codificacao_ms']:<16.4f} "
+              f"| {l['decodificacao_ms']:<18.4f} | {l['formatacao_ms']:<15.4f} | {l['log_ms']:<8.4f} "
+              f"| {l['total_ms']:<10.4f} |")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grava e reproduz o tráfego dos clientes.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    gravar = sub.add_parser("gravar", help="executa as operações dos três protocolos gravando os bytes")
+    gravar.add_argument("arquivo")
+    gravar.add_argument("--alvo", choices=("local", "remoto"), default="local")
+    gravar.add_argument("--repeticoes", "-n", type=int, default=1)
+    gravar.add_argument("--numeros", default="1,2")
+    gravar.add_argument("--mensagem", default="Hello")
+    gravar.add_argument("--escapar", action="store_true",
+                        help="com --alvo local, escapa os valores do protocolo de strings")
+    gravar.set_defaults(executar=_gravar)
+    reproduzir_ = sub.add_parser("reproduzir", help="refaz a captura sem rede e mede a CPU do cliente")
+    reproduzir_.add_argument("arquivo")
+    reproduzir_.add_argument("--repeticoes", "-n", type=int, default=100)
+    reproduzir_.set_defaults(executar=_reproduzir)
+    args = parser.parse_args(argv)
+    args.executar(args)
+
+
+if __name__ == "__main__":
+    # os clientes fazem "import gravacao"; roda pela mesma instância do módulo
+    import gravacao
+    gravacao.main()
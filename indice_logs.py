@@ -0,0 +1,396 @@
+"""Índice e consultas sobre os logs de respostas dos três protocolos.
+
+Para cada log é mantido um arquivo auxiliar <log>.idx com um registro de
+tamanho fixo por resposta (posição e tamanho no log, timestamp, operação e
+sucesso/erro). O índice é atualizado de forma incremental: só os bytes
+acrescentados ao log desde a última vez são lidos. Se o log foi truncado,
+rotacionado ou regravado, o índice é refeito: o cabeçalho guarda o inode do
+log e um CRC dos bytes logo antes do fim da parte indexada, e a última
+entrada indexada precisa continuar legível na posição guardada. As
+consultas percorrem apenas o índice e leem do log somente as entradas
+encontradas, com seek direto.
+
+Formatos reconhecidos (pelo nome do arquivo):
+  - *string*: uma linha "operacao=OK|...|FIM"
+  - *json*: uma linha "operacao={...}"
+  - *protobuf*/*protbuf* .txt: "operacao=ok {" seguido das linhas de str(resp)
+  - *.bin: log_binario
+
+Uso:
+    python indice_logs.py --operacao echo --erros --desde 2026-10-18T10:00 --ate 2026-10-18T11:00
+    python indice_logs.py respostas_trab_distribuidos_json.txt --operacao soma --ultimos 100 --mostrar
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import zlib
+from datetime import datetime
+
+import log_binario
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+LOGS_PADRAO = (
+    "respostas_trab_distribuidos_string.txt",
+    "respostas_trab_distribuidos_json.txt",
+    "respostas_trab_distribuidos_protobuf.txt",
+    "respostas_trab_distribuidos_protobuf.bin",
+)
+EXTENSAO = ".idx"
+VERSAO = 2
+TAMANHO_CAUDA = 256     # bytes antes de indexado_ate cobertos pelo CRC
+
+# magic, versão, formato, entradas, bytes do log já indexados, inode do log, CRC da cauda
+CABECALHO = struct.Struct(">4sB8sQQQI")
+# posição, tamanho, timestamp (s, NaN se desconhecido), sucesso, operação
+ENTRADA = struct.Struct(">QIdB15s")
+MAGICO = b"IDXR"
+
+_INICIO_ENTRADA = re.compile(rb"^[A-Za-z_][A-Za-z0-9_]*=")
+_TIMESTAMP_STRING = re.compile(rb"\|timestamp=([^|]*)\|FIM")
+_TIMESTAMP_PROTOBUF = re.compile(rb'^  timestamp: "([^"]*)"', re.MULTILINE)
+
+
+class IndiceInvalido(Exception):
+    pass
+
+
+def formato_do_log(caminho):
+    nome = os.path.basename(caminho).lower()
+    if ".bin" in nome:
+        return "binario"
+    for formato, pistas in (("protobuf", ("protobuf", "protbuf")), ("json", ("json",)),
+                            ("string", ("string",))):
+        if any(p in nome for p in pistas):
+            return formato
+    raise IndiceInvalido(f"Não sei o formato do log {caminho!r} (string, json, protobuf ou .bin).")
+
+
+def _protocolo(formato):
+    return "protobuf" if formato == "binario" else formato
+
+
+def _segundos(texto):
+    try:
+        return datetime.fromisoformat(texto.decode("ascii") if isinstance(texto, bytes) else texto).timestamp()
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return math.nan
+
+
+def _data(texto):
+    """--desde/--ate: data ISO obrigatoriamente válida (não vira NaN)."""
+    segundos = _segundos(texto)
+    if math.isnan(segundos):
+        raise argparse.ArgumentTypeError(f"data inválida (use o formato ISO, ex.: 2026-10-18T10:00): {texto}")
+    return segundos
+
+
+# ---------------------------------------
+# Entradas encontradas
+# ---------------------------------------
+class Entrada:
+    """Uma resposta localizada pelo índice; ler() busca o conteúdo no log."""
+
+    __slots__ = ("caminho", "protocolo", "formato", "posicao", "tamanho", "timestamp",
+                 "operacao", "sucesso")
+
+    def __init__(self, caminho, formato, posicao, tamanho, timestamp, operacao, sucesso):
+        self.caminho = caminho
+        self.formato = formato
+        self.protocolo = _protocolo(formato)
+        self.posicao = posicao
+        self.tamanho = tamanho
+        self.timestamp = timestamp
+        self.operacao = operacao
+        self.sucesso = sucesso
+
+    def ler(self):
+        """Texto da entrada como está no log (protobuf binário: str(Resposta))."""
+        with open(self.caminho, "rb") as f:
+            f.seek(self.posicao)
+            if self.formato == "binario":
+                return str(log_binario.ler_registro(f).resposta)
+            return f.read(self.tamanho).decode("utf-8", "replace").rstrip("\n")
+
+    def para_dict(self):
+        return {
+            "arquivo": self.caminho,
+            "protocolo": self.protocolo,
+            "posicao": self.posicao,
+            "timestamp": None if math.isnan(self.timestamp) else datetime.fromtimestamp(self.timestamp).isoformat(),
+            "operacao": self.operacao,
+            "sucesso": self.sucesso,
+        }
+
+
+# ---------------------------------------
+# Varredura dos logs (só a parte nova)
+# ---------------------------------------
+def _entradas_texto(f, formato, inicio):
+    """Gera (posicao, tamanho, timestamp, operacao, sucesso) dos logs de texto.
+
+    Só considera linhas terminadas em \\n; devolve (via StopIteration.value)
+    até onde o log foi consumido.
+    """
+    posicao = inicio
+    atual = None     # [posicao, linhas]
+
+    def fechar(entrada):
+        return _analisar_texto(formato, entrada[0], b"".join(entrada[1]))
+
+    for linha in f:
+        if not linha.endswith(b"\n"):
+            if formato == "protobuf" and atual is not None:
+                return atual[0]     # entrada ainda sendo gravada: fica para a próxima
+            break
+        if formato != "protobuf" or _INICIO_ENTRADA.match(linha):
+            if atual is not None:
+                yield fechar(atual)
+            atual = [posicao, [linha]]
+        elif atual is not None:
+            atual[1].append(linha)
+        posicao += len(linha)
+    if atual is not None:
+        yield fechar(atual)
+    return posicao
+
+
+def _analisar_texto(formato, posicao, bruto):
+    operacao, _, corpo = bruto.partition(b"=")
+    operacao = operacao.decode("ascii", "replace")
+    if formato == "string":
+        sucesso = corpo.startswith(b"OK")
+        achado = _TIMESTAMP_STRING.search(corpo)
+        timestamp = _segundos(achado.group(1)) if achado else math.nan
+    elif formato == "json":
+        try:
+            obj = json.loads(corpo)
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict):
+            obj = {}
+        sucesso = obj.get("sucesso") is True or obj.get("status") in ("sucesso", "ok", "success")
+        timestamp = _segundos(obj.get("timestamp"))
+    else:
+        sucesso = corpo.startswith(b"ok")
+        achados = _TIMESTAMP_PROTOBUF.findall(corpo)
+        timestamp = _segundos(achados[-1]) if achados else math.nan
+    return posicao, len(bruto), timestamp, operacao, sucesso
+
+
+def _entradas_binario(f, inicio):
+    f.seek(inicio)
+    posicao = inicio
+    while True:
+        try:
+            registro = log_binario.ler_registro(f)
+        except ValueError:      # registro ainda sendo gravado
+            break
+        if registro is None:
+            break
+        yield (registro.posicao, registro.tamanho, registro.timestamp_ns / 1e9,
+               registro.operacao, registro.sucesso)
+        posicao = registro.posicao + registro.tamanho
+    return posicao
+
+
+def _crc_cauda(log, fim):
+    """CRC32 dos até TAMANHO_CAUDA bytes do log que terminam em `fim`."""
+    inicio = max(fim - TAMANHO_CAUDA, 0)
+    log.seek(inicio)
+    return zlib.crc32(log.read(fim - inicio))
+
+
+# ---------------------------------------
+# Índice de um log
+# ---------------------------------------
+class IndiceLog:
+    """Índice de um arquivo de log; atualizar() acrescenta as entradas novas."""
+
+    def __init__(self, caminho, formato=None):
+        self.caminho = caminho
+        self.formato = formato or formato_do_log(caminho)
+        self.caminho_indice = caminho + EXTENSAO
+        self.entradas = 0
+        self.indexado_ate = 0
+
+    def atualizar(self):
+        """Indexa o que foi acrescentado ao log; devolve quantas entradas novas."""
+        if not os.path.exists(self.caminho):
+            self.entradas = self.indexado_ate = 0
+            return 0
+        with open(self.caminho, "rb") as log:
+            estado = os.fstat(log.fileno())
+            tamanho_log, inode = estado.st_size, estado.st_ino
+            if not self._carregar(log, tamanho_log, inode):
+                self._recriar(inode)
+            if tamanho_log == self.indexado_ate:
+                return 0
+
+            log.seek(self.indexado_ate)
+            if self.formato == "binario":
+                gerador = _entradas_binario(log, self.indexado_ate)
+            else:
+                gerador = _entradas_texto(log, self.formato, self.indexado_ate)
+            novas = bytearray()
+            quantidade = 0
+            while True:
+                try:
+                    posicao, tamanho, timestamp, operacao, sucesso = next(gerador)
+                except StopIteration as fim:
+                    consumido = fim.value
+                    break
+                novas += ENTRADA.pack(posicao, tamanho, timestamp, 1 if sucesso else 0,
+                                      operacao.encode("ascii", "replace")[:15])
+                quantidade += 1
+            cauda = _crc_cauda(log, consumido)
+
+        with open(self.caminho_indice, "r+b") as idx:
+            idx.seek(CABECALHO.size + self.entradas * ENTRADA.size)
+            idx.write(novas)
+            idx.truncate()
+            self.entradas += quantidade
+            self.indexado_ate = consumido
+            idx.seek(0)
+            idx.write(self._cabecalho(inode, cauda))
+        return quantidade
+
+    def _cabecalho(self, inode, cauda):
+        return CABECALHO.pack(MAGICO, VERSAO, self.formato.encode("ascii"), self.entradas,
+                              self.indexado_ate, inode, cauda)
+
+    def _carregar(self, log, tamanho_log, inode):
+        """Lê o cabeçalho do índice; False se ele não serve para este log.
+
+        O log pode ter sido truncado e regravado até passar do tamanho antigo
+        (main.py zera os logs ao iniciar); por isso, além do tamanho, conferem
+        o inode, o CRC da cauda indexada e a última entrada indexada.
+        """
+        try:
+            with open(self.caminho_indice, "rb") as idx:
+                dados = idx.read(CABECALHO.size)
+                magico, versao, formato, entradas, indexado_ate, inode_indice, cauda = (
+                    CABECALHO.unpack(dados))
+                if (magico != MAGICO or versao != VERSAO
+                        or formato.rstrip(b"\0").decode("ascii") != self.formato
+                        or indexado_ate > tamanho_log or inode_indice != inode
+                        or _crc_cauda(log, indexado_ate) != cauda):
+                    return False
+                if entradas:
+                    idx.seek(CABECALHO.size + (entradas - 1) * ENTRADA.size)
+                    ultima = ENTRADA.unpack(idx.read(ENTRADA.size))
+                    if not self._entrada_confere(log, ultima, indexado_ate):
+                        return False
+        except (FileNotFoundError, struct.error, UnicodeDecodeError):
+            return False
+        self.entradas, self.indexado_ate = entradas, indexado_ate
+        return True
+
+    def _entrada_confere(self, log, entrada, indexado_ate):
+        """A entrada do índice ainda aponta para uma resposta da mesma operação no log."""
+        posicao, tamanho, _, _, operacao = entrada
+        operacao = operacao.rstrip(b"\0")
+        if posicao + tamanho > indexado_ate:
+            return False
+        log.seek(posicao)
+        if self.formato == "binario":
+            try:
+                registro = log_binario.ler_registro(log)
+            except (ValueError, UnicodeDecodeError):
+                return False
+            return (registro is not None and registro.tamanho == tamanho
+                    and registro.operacao.encode("ascii", "replace")[:15] == operacao)
+        bruto = log.read(tamanho)
+        prefixo = bruto.partition(b"=")[0].decode("ascii", "replace")
+        return bruto.endswith(b"\n") and prefixo.encode("ascii", "replace")[:15] == operacao
+
+    def _recriar(self, inode):
+        self.entradas = self.indexado_ate = 0
+        with open(self.caminho_indice, "wb") as idx:
+            idx.write(self._cabecalho(inode, 0))
+
+    # ---- consultas ----
+    def consultar(self, operacao=None, sucesso=None, desde=None, ate=None, ultimos=None):
+        """Gera as Entradas que casam com os filtros, em ordem de gravação.
+
+        desde/ate são timestamps em segundos (time.time()). Com `ultimos`, o
+        índice é lido de trás para frente e a busca para ao achar N entradas.
+        """
+        if not self.entradas:
+            return []
+        alvo = operacao.encode("ascii")[:15] if operacao else None
+        achadas = []
+        with open(self.caminho_indice, "rb") as idx, \
+                mmap.mmap(idx.fileno(), 0, access=mmap.ACCESS_READ) as dados:
+            ordem = range(self.entradas - 1, -1, -1) if ultimos else range(self.entradas)
+            for i in ordem:
+                posicao, tamanho, timestamp, ok, op = ENTRADA.unpack_from(
+                    dados, CABECALHO.size + i * ENTRADA.size)
+                if alvo is not None and op.rstrip(b"\0") != alvo:
+                    continue
+                if sucesso is not None and bool(ok) != sucesso:
+                    continue
+                if desde is not None and not timestamp >= desde:
+                    continue
+                if ate is not None and not timestamp <= ate:
+                    continue
+                achadas.append(Entrada(self.caminho, self.formato, posicao, tamanho, timestamp,
+                                       op.rstrip(b"\0").decode("ascii"), bool(ok)))
+                if ultimos and len(achadas) >= ultimos:
+                    break
+        if ultimos:
+            achadas.reverse()
+        return achadas
+
+
+def consultar(caminhos=LOGS_PADRAO, protocolo=None, ultimos=None, **filtros):
+    """Atualiza os índices de `caminhos` e junta as Entradas encontradas, por timestamp."""
+    achadas = []
+    for caminho in caminhos:
+        if not os.path.exists(caminho):
+            continue
+        indice = IndiceLog(caminho)
+        if protocolo is not None and _protocolo(indice.formato) != protocolo:
+            continue
+        indice.atualizar()
+        achadas.extend(indice.consultar(ultimos=ultimos, **filtros))
+    achadas.sort(key=lambda e: (math.isnan(e.timestamp), e.timestamp))
+    if ultimos:
+        achadas = achadas[-ultimos:]
+    return achadas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta os logs de respostas pelo índice.")
+    parser.add_argument("arquivos", nargs="*", default=list(LOGS_PADRAO))
+    parser.add_argument("--operacao")
+    parser.add_argument("--protocolo", choices=("string", "json", "protobuf"))
+    situacao = parser.add_mutually_exclusive_group()
+    situacao.add_argument("--erros", action="store_true", help="só respostas de erro")
+    situacao.add_argument("--sucessos", action="store_true", help="só respostas de sucesso")
+    parser.add_argument("--desde", type=_data, help="timestamp ISO inicial")
+    parser.add_argument("--ate", type=_data, help="timestamp ISO final")
+    parser.add_argument("--ultimos", type=int)
+    parser.add_argument("--mostrar", action="store_true", help="imprime o conteúdo de cada entrada")
+    args = parser.parse_args(argv)
+
+    sucesso = False if args.erros else True if args.sucessos else None
+    entradas = consultar(args.arquivos, protocolo=args.protocolo, ultimos=args.ultimos,
+                         operacao=args.operacao, sucesso=sucesso, desde=args.desde, ate=args.ate)
+    for entrada in entradas:
+        d = entrada.para_dict()
+        situacao_entrada = "ok" if entrada.sucesso else "erro"
+        print(f"{d['timestamp'] or '?'} {entrada.protocolo:<8} {entrada.operacao:<12} "
+              f"{situacao_entrada:<4} {entrada.caminho}@{entrada.posicao}")
+        if args.mostrar:
+            print(entrada.ler())
+    print(f"{len(entradas)} entrada(s)")
+
+
+if __name__ == "__main__":
+    main()
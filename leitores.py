@@ -0,0 +1,269 @@
+"""Leitura bufferizada de mensagens a partir de um socket.
+
+Cada conexão tem um único leitor (leitor_de / leitor_ndjson_de /
+leitor_frames_de), com um buffer persistente: bytes que chegam depois do fim
+de uma mensagem ficam guardados para a próxima, e mensagens divididas em
+vários segmentos TCP são remontadas.
+"""
+import json
+import struct
+import time
+import weakref
+from collections import deque
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+TAMANHO_RECV = 64 * 1024
+TAMANHO_MAXIMO = 16 * 1024 * 1024   # maior mensagem aceita (bytes)
+LIMITE_COMPACTACAO = 64 * 1024      # descarta bytes já consumidos a partir daqui
+CAPACIDADE_FRAMES = 64 * 1024       # buffer inicial do leitor de frames
+
+
+class MensagemGrandeDemais(Exception):
+    pass
+
+
+class LinhaJSONInvalida(ValueError):
+    def __init__(self, linha, erro):
+        super().__init__(f"JSON inválido recebido: {bytes(linha)!r} ({erro})")
+        self.linha = bytes(linha)
+
+
+# ---------------------------------------
+# Leitor por delimitador
+# ---------------------------------------
+class LeitorDelimitado:
+    """Separa mensagens terminadas por `delimitador`, guardando o que sobrar para a próxima.
+
+    A busca pelo delimitador é incremental: bytes já examinados sem sucesso
+    não são varridos de novo quando chega mais dado.
+    """
+
+    def __init__(self, sock, delimitador, tamanho_recv=TAMANHO_RECV, tamanho_maximo=TAMANHO_MAXIMO):
+        self.sock = sock
+        self.delimitador = delimitador
+        self.tamanho_recv = tamanho_recv
+        self.tamanho_maximo = tamanho_maximo
+        self.primeiro_recv_ns = None
+        self._buffer = bytearray()
+        self._inicio = 0    # início da mensagem atual no buffer
+        self._busca = 0     # a partir daqui o delimitador ainda não foi procurado
+
+    def pendente(self):
+        """Quantidade de bytes já recebidos e ainda não entregues."""
+        return len(self._buffer) - self._inicio
+
+    def proxima(self):
+        """Devolve a próxima mensagem (com o delimitador), lendo do socket se preciso.
+
+        primeiro_recv_ns guarda o instante (perf_counter_ns) do primeiro recv
+        feito nesta chamada, ou None se a mensagem já estava no buffer.
+        """
+        self.primeiro_recv_ns = None
+        tamanho_delim = len(self.delimitador)
+        while True:
+            fim = self._buffer.find(self.delimitador, max(self._busca, self._inicio))
+            if fim >= 0:
+                fim += tamanho_delim
+                mensagem = bytes(self._buffer[self._inicio:fim])
+                self._consumir(fim)
+                return mensagem
+
+            # o delimitador pode começar nos últimos bytes e terminar no próximo recv
+            self._busca = max(len(self._buffer) - tamanho_delim + 1, self._inicio)
+            if self.pendente() > self.tamanho_maximo:
+                raise MensagemGrandeDemais(
+                    f"Mensagem sem {self.delimitador!r} após {self.pendente()} bytes.")
+
+            parte = self.sock.recv(self.tamanho_recv)
+            if self.primeiro_recv_ns is None:
+                self.primeiro_recv_ns = time.perf_counter_ns()
+            if not parte:
+                raise ConnectionResetError("Conexão fechada pelo servidor.")
+            self._buffer += parte
+
+    def _consumir(self, fim):
+        self._inicio = fim
+        self._busca = fim
+        if self._inicio == len(self._buffer):
+            self._buffer.clear()
+            self._inicio = self._busca = 0
+        elif self._inicio >= LIMITE_COMPACTACAO:
+            del self._buffer[:self._inicio]
+            self._busca -= self._inicio
+            self._inicio = 0
+
+
+# ---------------------------------------
+# JSON delimitado por nova linha
+# ---------------------------------------
+class DecodificadorNDJSON:
+    """Decodificador incremental de NDJSON, independente de socket.
+
+    alimentar() recebe bytes em pedaços de qualquer tamanho; cada linha
+    completa é decodificada uma única vez e fica disponível em proximo(),
+    na ordem de chegada. Linhas parciais aguardam o resto no buffer.
+    """
+
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO):
+        self.tamanho_maximo = tamanho_maximo
+        self._buffer = bytearray()
+        self._busca = 0
+        self._prontos = deque()   # (objeto ou LinhaJSONInvalida, bytes, ns de decodificação)
+
+    def alimentar(self, dados):
+        """Acrescenta bytes e decodifica as linhas que ficaram completas; devolve quantas."""
+        self._buffer += dados
+        inicio = 0
+        completas = 0
+        while True:
+            fim = self._buffer.find(b"\n", max(self._busca, inicio))
+            if fim < 0:
+                break
+            with memoryview(self._buffer) as visao:
+                linha = visao[inicio:fim].tobytes()
+            tamanho = fim + 1 - inicio
+            inicio = fim + 1
+            if not linha.strip():
+                continue
+            t_decod = time.perf_counter_ns()
+            try:
+                objeto = json.loads(linha)
+            except ValueError as e:
+                objeto = LinhaJSONInvalida(linha, e)
+            self._prontos.append((objeto, tamanho, time.perf_counter_ns() - t_decod))
+            completas += 1
+
+        if inicio:
+            del self._buffer[:inicio]
+        self._busca = len(self._buffer)
+        if self._busca > self.tamanho_maximo:
+            raise MensagemGrandeDemais(f"Linha JSON sem \\n após {self._busca} bytes.")
+        return completas
+
+    def pronto(self):
+        return bool(self._prontos)
+
+    def proximo(self):
+        """Devolve (objeto, bytes da linha, ns gastos no json.loads) da próxima resposta."""
+        objeto, tamanho, ns = self._prontos.popleft()
+        if isinstance(objeto, LinhaJSONInvalida):
+            raise objeto
+        return objeto, tamanho, ns
+
+
+class LeitorNDJSON:
+    """Lê objetos JSON de um socket; um único recv pode render várias respostas."""
+
+    delimitador = b"\n"
+
+    def __init__(self, sock, tamanho_recv=TAMANHO_RECV, tamanho_maximo=TAMANHO_MAXIMO):
+        self.sock = sock
+        self.tamanho_recv = tamanho_recv
+        self.decodificador = DecodificadorNDJSON(tamanho_maximo)
+        self.primeiro_recv_ns = None
+        self.ultimo_tamanho = 0
+        self.ultimo_ns_decodificacao = 0
+
+    def proxima(self):
+        """Devolve o próximo objeto JSON, lendo do socket só se nenhum estiver pronto."""
+        self.primeiro_recv_ns = None
+        while not self.decodificador.pronto():
+            parte = self.sock.recv(self.tamanho_recv)
+            if self.primeiro_recv_ns is None:
+                self.primeiro_recv_ns = time.perf_counter_ns()
+            if not parte:
+                raise ConnectionResetError("Conexão fechada pelo servidor.")
+            self.decodificador.alimentar(parte)
+        objeto, self.ultimo_tamanho, self.ultimo_ns_decodificacao = self.decodificador.proximo()
+        return objeto
+
+
+# ---------------------------------------
+# Frames com header de 4 bytes (protobuf)
+# ---------------------------------------
+class LeitorFrames:
+    """Lê frames [tamanho:4 bytes big-endian][payload] com recv_into num buffer reutilizado.
+
+    proxima() devolve um memoryview do payload dentro do buffer interno, sem
+    cópia; ele só é válido até a próxima chamada. O buffer cresce apenas
+    quando chega um frame maior que a capacidade, limitado a tamanho_maximo.
+    """
+
+    def __init__(self, sock, tamanho_maximo=TAMANHO_MAXIMO, capacidade=CAPACIDADE_FRAMES):
+        self.sock = sock
+        self.tamanho_maximo = tamanho_maximo
+        self.primeiro_recv_ns = None
+        self._buffer = bytearray(capacidade)
+        self._visao = memoryview(self._buffer)
+        self._inicio = 0    # primeiro byte ainda não entregue
+        self._fim = 0       # fim dos bytes recebidos
+
+    def proxima(self):
+        self.primeiro_recv_ns = None
+        self._garantir(4)
+        tamanho = struct.unpack_from(">I", self._buffer, self._inicio)[0]
+        if tamanho > self.tamanho_maximo:
+            raise MensagemGrandeDemais(
+                f"Frame de {tamanho} bytes excede o máximo de {self.tamanho_maximo}.")
+        self._garantir(4 + tamanho)
+        inicio = self._inicio + 4
+        self._inicio = inicio + tamanho
+        return self._visao[inicio:self._inicio]
+
+    def _garantir(self, n):
+        """Lê do socket até haver pelo menos n bytes pendentes no buffer."""
+        if self._inicio == self._fim:
+            self._inicio = self._fim = 0
+        while self._fim - self._inicio < n:
+            if self._inicio + n > len(self._buffer):
+                self._realocar(n)
+            lidos = self.sock.recv_into(self._visao[self._fim:])
+            if self.primeiro_recv_ns is None:
+                self.primeiro_recv_ns = time.perf_counter_ns()
+            if not lidos:
+                raise ConnectionResetError("Conexão fechada antes de completar o frame.")
+            self._fim += lidos
+
+    def _realocar(self, n):
+        """Move os bytes pendentes para o início, crescendo o buffer se n não couber."""
+        pendente = bytes(self._visao[self._inicio:self._fim])
+        if n > len(self._buffer):
+            self._buffer = bytearray(max(n, 2 * len(self._buffer)))
+            self._visao = memoryview(self._buffer)
+        self._buffer[:len(pendente)] = pendente
+        self._inicio, self._fim = 0, len(pendente)
+
+
+# ---------------------------------------
+# Um leitor por conexão
+# ---------------------------------------
+_leitores = weakref.WeakKeyDictionary()
+
+
+def leitor_de(sock, delimitador, **opcoes):
+    """Devolve o leitor persistente da conexão, criando-o na primeira chamada."""
+    leitor = _leitores.get(sock)
+    if type(leitor) is not LeitorDelimitado or leitor.delimitador != delimitador:
+        leitor = LeitorDelimitado(sock, delimitador, **opcoes)
+        _leitores[sock] = leitor
+    return leitor
+
+
+def leitor_ndjson_de(sock, **opcoes):
+    """Como leitor_de, mas devolvendo objetos JSON já decodificados."""
+    leitor = _leitores.get(sock)
+    if type(leitor) is not LeitorNDJSON:
+        leitor = LeitorNDJSON(sock, **opcoes)
+        _leitores[sock] = leitor
+    return leitor
+
+
+def leitor_frames_de(sock, **opcoes):
+    """Como leitor_de, para frames com header de tamanho de 4 bytes."""
+    leitor = _leitores.get(sock)
+    if type(leitor) is not LeitorFrames:
+        leitor = LeitorFrames(sock, **opcoes)
+        _leitores[sock] = leitor
+    return leitor
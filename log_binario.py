@@ -0,0 +1,113 @@
+"""Log binário compacto das respostas protobuf.
+
+Em vez de str(resp), cada resposta é gravada com os bytes serializados que
+já vieram do socket, precedidos de um cabeçalho fixo:
+
+    [tamanho do payload:4][timestamp ns:8][sucesso:1][tamanho da op:1][op][payload]
+
+(inteiros big-endian). Gravar custa uma cópia do payload; a decodificação
+do Resposta só acontece quando o leitor pede (RegistroBinario.resposta).
+
+Uso:
+    python log_binario.py respostas_trab_distribuidos_protobuf.bin --operacao soma --ultimos 10
+"""
+import argparse
+import struct
+from collections import deque
+from datetime import datetime
+
+import mensagens_pb2
+
+# ---------------------------------------
+# Formato
+# ---------------------------------------
+CABECALHO = struct.Struct(">IqBB")
+
+
+def codificar(operacao, timestamp_ns, sucesso, payload):
+    """Monta um registro; payload são os bytes (ou memoryview) do Resposta serializado."""
+    op = operacao.encode("ascii", "replace")[:255]
+    return b"".join((CABECALHO.pack(len(payload), timestamp_ns, 1 if sucesso else 0, len(op)),
+                     op, payload))
+
+
+class RegistroBinario:
+    """Um registro do log; o Resposta é decodificado só no primeiro acesso."""
+
+    __slots__ = ("posicao", "timestamp_ns", "sucesso", "operacao", "payload", "_resposta")
+
+    def __init__(self, posicao, timestamp_ns, sucesso, operacao, payload):
+        self.posicao = posicao
+        self.timestamp_ns = timestamp_ns
+        self.sucesso = sucesso
+        self.operacao = operacao
+        self.payload = payload
+        self._resposta = None
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+
+    @property
+    def resposta(self):
+        if self._resposta is None:
+            resposta = mensagens_pb2.Resposta()
+            resposta.ParseFromString(self.payload)
+            self._resposta = resposta
+        return self._resposta
+
+    @property
+    def tamanho(self):
+        """Bytes ocupados pelo registro no arquivo."""
+        return CABECALHO.size + len(self.operacao) + len(self.payload)
+
+
+# ---------------------------------------
+# Leitura
+# ---------------------------------------
+def ler_registro(arquivo):
+    """Lê o registro na posição atual de `arquivo` (aberto em 'rb'); None no fim do arquivo."""
+    posicao = arquivo.tell()
+    cabecalho = arquivo.read(CABECALHO.size)
+    if not cabecalho:
+        return None
+    if len(cabecalho) < CABECALHO.size:
+        raise ValueError(f"Registro truncado na posição {posicao}.")
+    tamanho, timestamp_ns, sucesso, tamanho_op = CABECALHO.unpack(cabecalho)
+    operacao = arquivo.read(tamanho_op).decode("ascii")
+    payload = arquivo.read(tamanho)
+    if len(operacao) < tamanho_op or len(payload) < tamanho:
+        raise ValueError(f"Registro truncado na posição {posicao}.")
+    return RegistroBinario(posicao, timestamp_ns, bool(sucesso), operacao, payload)
+
+
+def iterar(caminho, inicio=0):
+    """Gera os registros de `caminho` a partir do byte `inicio`, sem decodificá-los."""
+    with open(caminho, "rb") as arquivo:
+        arquivo.seek(inicio)
+        while True:
+            registro = ler_registro(arquivo)
+            if registro is None:
+                return
+            yield registro
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mostra registros do log binário protobuf.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--operacao", help="só registros desta operação")
+    parser.add_argument("--ultimos", type=int, help="só os N últimos registros")
+    args = parser.parse_args(argv)
+
+    registros = (r for r in iterar(args.arquivo)
+                 if args.operacao is None or r.operacao == args.operacao)
+    if args.ultimos:
+        registros = deque(registros, maxlen=args.ultimos)
+    for r in registros:
+        situacao = "ok" if r.sucesso else "erro"
+        print(f"--- {r.timestamp.isoformat()} {r.operacao} ({situacao}, {len(r.payload)} bytes)")
+        print(r.resposta, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Execução em lote, sem menu, a partir de um arquivo JSONL.
+
+Cada linha da entrada descreve uma operação:
+
+    {"op": "soma", "protocolos": ["json", "protobuf"], "params": {"numeros": [1, 2]}, "repetir": 3}
+    {"op": "echo", "protocolo": "string", "params": {"mensagem": "oi"}}
+    {"op": "status"}                       # sem protocolo: os três
+
+A entrada é lida linha a linha e cada resultado é gravado assim que sai, uma
+linha JSON por execução, então arquivos com milhões de linhas rodam com
+memória constante. As operações usam as sessões reaproveitadas (pool) de
+cada protocolo.
+
+Uso:
+    python lote.py operacoes.jsonl --saida resultados.jsonl
+    python lote.py operacoes.jsonl --alvo local              # resultados no stdout
+"""
+import argparse
+import json
+import sys
+import time
+
+from google.protobuf.json_format import MessageToDict
+
+import medicoes
+from benchmark import OPERACOES, PROTOCOLOS
+from saida import usar_modo
+
+
+class LinhaInvalida(ValueError):
+    pass
+
+
+# ---------------------------------------
+# Entrada
+# ---------------------------------------
+def ler_operacoes(arquivo):
+    """Gera (número da linha, dict ou LinhaInvalida) sem carregar o arquivo todo."""
+    for numero, linha in enumerate(arquivo, 1):
+        if not linha.strip():
+            continue
+        try:
+            item = json.loads(linha)
+            if not isinstance(item, dict):
+                raise LinhaInvalida("esperado um objeto JSON")
+            yield numero, _validar(item)
+        except ValueError as e:
+            yield numero, LinhaInvalida(str(e))
+
+
+def _validar(item):
+    op = item.get("op")
+    if op not in OPERACOES:
+        raise LinhaInvalida(f"op inválida: {op!r}")
+    protocolos = item.get("protocolos", item.get("protocolo", list(PROTOCOLOS)))
+    if isinstance(protocolos, str):
+        protocolos = [protocolos]
+    invalidos = [p for p in protocolos if p not in PROTOCOLOS]
+    if invalidos:
+        raise LinhaInvalida(f"protocolo inválido: {', '.join(map(str, invalidos))}")
+    repetir = item.get("repetir", 1)
+    if not isinstance(repetir, int) or repetir < 1:
+        raise LinhaInvalida("repetir deve ser um inteiro >= 1")
+    return {"op": op, "protocolos": protocolos, "param": _parametro(op, item.get("params")),
+            "repetir": repetir}
+
+
+def _parametro(op, params):
+    """Converte params da linha no parâmetro que executar_operacao espera.
+
+    Números e mensagens são conferidos aqui, para que um valor inválido seja
+    uma LinhaInvalida e não um erro no meio do lote.
+    """
+    if isinstance(params, dict):
+        params = params.get("numeros" if op == "soma" else "mensagem")
+    if op == "soma":
+        if isinstance(params, str):
+            params = [n.strip() for n in params.split(",") if n.strip()]
+        if not isinstance(params, list):
+            raise LinhaInvalida("numeros deve ser uma lista ou um texto separado por vírgulas")
+        for n in params:
+            try:
+                if isinstance(n, bool):
+                    raise TypeError
+                float(n)
+            except (TypeError, ValueError):
+                raise LinhaInvalida(f"número inválido: {n!r}") from None
+        return ",".join(str(n) for n in params)
+    if op == "echo" and params is not None and not isinstance(params, str):
+        raise LinhaInvalida("mensagem deve ser um texto")
+    return params
+
+
+# ---------------------------------------
+# Execução
+# ---------------------------------------
+def _resposta_json(resp):
+    if resp is None or isinstance(resp, (str, dict)):
+        return resp
+    return MessageToDict(resp, preserving_proto_field_name=True)
+
+
+def executar(protocolo, op, param):
+    """Executa uma operação na sessão do pool e devolve o registro de resultado."""
+    modulo = PROTOCOLOS[protocolo]
+    op_code = OPERACOES[op][0]
+    resultado = {"protocolo": protocolo, "op": op}
+    t0 = time.perf_counter_ns()
+    try:
+        resp = modulo.executar_operacao_pool(op_code, param)
+    except (modulo.ErroRede, modulo.ErroProtocolo) as e:
+        resultado.update(sucesso=False, erro=str(e),
+                         tempo_ms=round((time.perf_counter_ns() - t0) / 1e6, 3))
+        return resultado
+    registro = medicoes.ultimo()
+    resultado.update(
+        sucesso=bool(registro.sucesso) if registro else None,
+        tempo_ms=round((registro.total_ns if registro else time.perf_counter_ns() - t0) / 1e6, 3),
+        resposta=_resposta_json(resp),
+    )
+    return resultado
+
+
+def executar_lote(entrada, saida):
+    """Lê operações de `entrada` (arquivo texto) e grava os resultados em `saida`, linha a linha.
+
+    Devolve (execuções, falhas).
+    """
+    execucoes = falhas = 0
+    with usar_modo("silencioso"):
+        for numero, item in ler_operacoes(entrada):
+            if isinstance(item, LinhaInvalida):
+                saida.write(json.dumps({"linha": numero, "sucesso": False, "erro": str(item)},
+                                       ensure_ascii=False) + "\n")
+                falhas += 1
+                continue
+            for repeticao in range(item["repetir"]):
+                for protocolo in item["protocolos"]:
+                    resultado = executar(protocolo, item["op"], item["param"])
+                    saida.write(json.dumps({"linha": numero, "repeticao": repeticao, **resultado},
+                                           ensure_ascii=False) + "\n")
+                    execucoes += 1
+                    falhas += not resultado["sucesso"]
+    return execucoes, falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa operações lidas de um arquivo JSONL.")
+    parser.add_argument("entrada", help="arquivo JSONL com as operações ('-' para stdin)")
+    parser.add_argument("--saida", default="-", help="arquivo JSONL de resultados ('-' para stdout)")
+    parser.add_argument("--alvo", choices=("local", "remoto"), default="remoto")
+    parser.add_argument("--escapar", action="store_true",
+                        help="com --alvo local, escapa os valores do protocolo de strings")
+    args = parser.parse_args(argv)
+
+    servidor = None
+    if args.alvo == "local":
+        from servidor_local import ServidorLocal
+        servidor = ServidorLocal(escapar=args.escapar).iniciar()
+        servidor.configurar_clientes(PROTOCOLOS)
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    try:
+        execucoes, falhas = executar_lote(entrada, saida)
+    finally:
+        for modulo in PROTOCOLOS.values():
+            with usar_modo("silencioso"):
+                modulo.encerrar_sessoes()
+        if servidor is not None:
+            servidor.parar()
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    print(f"{execucoes} execução(ões), {falhas} falha(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
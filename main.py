@@ -1,14 +1,90 @@
-from trabalho_distribuidos_string import servidor_string
-from trabalho_distribuidos_json import servidor_json
-from trabalho_distribuidos_protobuff import servidor_protobuf
+import argparse
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import saida
+from aquecimento import Aquecedor
+from trabalho_distribuidos_string import servidor_string, aquecer_sessoes as aquecer_string
+from trabalho_distribuidos_json import servidor_json, aquecer_sessoes as aquecer_json
+from trabalho_distribuidos_protobuff import servidor_protobuf, aquecer_sessoes as aquecer_protobuf
+from soma_arquivo import soma_arquivo
+
+SERVIDORES = {
+    "string": servidor_string,
+    "json": servidor_json,
+    "protobuf": servidor_protobuf,
+}
+
+AQUECEDORES = {
+    "string": aquecer_string,
+    "json": aquecer_json,
+    "protobuf": aquecer_protobuf,
+}
+
+
+def em_paralelo(tarefas):
+    """Roda as tarefas (nome -> função) ao mesmo tempo e imprime a saída de cada uma,
+    agrupada, na ordem em que terminam."""
+
+    def executar(tarefa):
+        with saida.capturar() as buffer:
+            try:
+                tarefa()
+            except Exception as e:
+                print("Erro inesperado:", e)
+        return buffer.getvalue()
+
+    with ThreadPoolExecutor(max_workers=len(tarefas)) as executor:
+        futuros = {executor.submit(executar, tarefa): nome for nome, tarefa in tarefas.items()}
+        for futuro in as_completed(futuros):
+            print(f"\n########## {futuros[futuro].upper()} ##########")
+            print(futuro.result(), end="")
+    resumo = saida.resumo() if saida.modo_atual() == "resumo" else ""
+    if resumo:
+        print(f"\n{resumo}")
+
+
+def executar_protocolos(op_code, param=None):
+    """Executa a operação do menu nos três protocolos em paralelo."""
+    em_paralelo({nome: (lambda f=f: f(op_code, param)) for nome, f in SERVIDORES.items()})
+
+
+def soma_arquivo_protocolos(caminho):
+    def tarefa(protocolo):
+        try:
+            estatisticas = soma_arquivo(caminho, protocolo)
+        except (OSError, ValueError) as e:
+            print("Erro ao ler o arquivo:", e)
+            return
+        except Exception as e:
+            print(f"Erro ({protocolo}):", e)
+            return
+        print(f"=== SOMA DO ARQUIVO ({protocolo.upper()}) ===")
+        for chave, valor in estatisticas.para_dict().items():
+            print(f"{chave}: {valor}")
+
+    em_paralelo({nome: (lambda nome=nome: tarefa(nome)) for nome in SERVIDORES})
 
 
 if __name__=="__main__":
 
+    parser = argparse.ArgumentParser(description="Menu dos clientes string, JSON e protobuf.")
+    parser.add_argument("--saida", choices=saida.MODOS, default="detalhado",
+                        help="detalhado (padrão), resumo, json ou silencioso")
+    parser.add_argument("--sem-aquecimento", action="store_true",
+                        help="só conecta quando a primeira operação for escolhida")
+    args = parser.parse_args()
+    saida.configurar_modo(args.saida)
+
     open('respostas_trab_distribuidos_json.txt', 'w').close()
     open('respostas_trab_distribuidos_protbuf.txt', 'w').close()
     open('respostas_trab_distribuidos_string.txt', 'w').close()
 
+    # conecta e autentica os três protocolos enquanto o menu espera o usuário
+    if not args.sem_aquecimento:
+        aquecedor = Aquecedor(AQUECEDORES).iniciar()
+        atexit.register(aquecedor.parar, 1)
+
     while True:
         print('''\nDigite o numero da operações deseja executar:
                 1. Estatisticas
@@ -25,55 +101,35 @@ if __name__=="__main__":
 
             case 1:
 
-                numeros = input("Digite os numeros separados por virgulas: ")
+                numeros = input("Digite os numeros separados por virgulas (ou @arquivo): ")
+
+                if numeros.startswith("@"):
+                    soma_arquivo_protocolos(numeros[1:].strip())
+                    continue
 
-                servidor_string(resp, numeros)
-                print("\n")
-                servidor_json(resp, numeros)
-                print("\n")
-                servidor_protobuf(resp, numeros)
+                executar_protocolos(resp, numeros)
 
             case 2:
 
                 mensagem = input("Digite a mensagem para o eco: ")
 
-                servidor_string(resp, mensagem)
-                print("\n")
-                servidor_json(resp, mensagem)
-                print("\n")
-                servidor_protobuf(resp, mensagem)
+                executar_protocolos(resp, mensagem)
             
             case 3:
 
-                servidor_string(resp)
-                print("\n")
-                servidor_json(resp)
-                print("\n")
-                servidor_protobuf(resp)
+                executar_protocolos(resp)
 
             case 4:
 
-                servidor_string(resp)
-                print("\n")
-                servidor_json(resp)
-                print("\n")
-                servidor_protobuf(resp)
+                executar_protocolos(resp)
 
             case 5:
         
-                servidor_string(resp)
-                print("\n")
-                servidor_json(resp)
-                print("\n")
-                servidor_protobuf(resp)
+                executar_protocolos(resp)
 
             case 6:
 
-                servidor_string(resp)
-                print("\n")
-                servidor_json(resp)
-                print("\n")
-                servidor_protobuf(resp)
+                executar_protocolos(resp)
 
             case 7:
 
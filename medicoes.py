@@ -0,0 +1,153 @@
+"""Medição por fase de cada requisição, com relógio perf_counter_ns.
+
+Os clientes chamam iniciar() no começo de cada requisição, marcar() ao fim de
+cada fase e finalizar() ao término. O registro resultante fica disponível em
+ultimo() e é entregue a cada callback registrado com assinar().
+"""
+import threading
+import time
+
+# ---------------------------------------
+# Fases medidas
+# ---------------------------------------
+FASES = (
+    "conexao",         # socket.connect (só na requisição que abriu a conexão)
+    "codificacao",     # montar e serializar a mensagem
+    "envio",           # sendall
+    "primeiro_byte",   # fim do envio até chegar o primeiro byte da resposta
+    "leitura",         # primeiro byte até a resposta completa
+    "decodificacao",   # bytes -> str/dict/Resposta
+    "formatacao",      # format_*_response
+    "log",             # registrar_respostas
+)
+
+_local = threading.local()
+_observadores = []
+
+
+# ---------------------------------------
+# Registro de uma requisição
+# ---------------------------------------
+class RegistroRequisicao:
+    """Tempos (ns) e tamanhos de uma requisição."""
+
+    __slots__ = ("protocolo", "operacao", "inicio", "inicio_ns", "duracao_ns", "fases",
+                 "bytes_enviados", "bytes_recebidos", "sucesso")
+
+    def __init__(self, protocolo, operacao):
+        self.protocolo = protocolo
+        self.operacao = operacao
+        self.inicio = time.time()
+        self.inicio_ns = time.perf_counter_ns()
+        self.duracao_ns = 0
+        self.fases = dict.fromkeys(FASES, 0)
+        self.bytes_enviados = 0
+        self.bytes_recebidos = 0
+        self.sucesso = None
+
+    @property
+    def total_ns(self):
+        """Duração de ponta a ponta, incluindo o connect quando houve."""
+        return self.duracao_ns + self.fases["conexao"]
+
+    @property
+    def rede_ns(self):
+        """Tempo no fio: envio + espera pelo primeiro byte + leitura."""
+        return self.fases["envio"] + self.fases["primeiro_byte"] + self.fases["leitura"]
+
+    def para_dict(self):
+        return {
+            "protocolo": self.protocolo,
+            "operacao": self.operacao,
+            "inicio": self.inicio,
+            "sucesso": self.sucesso,
+            "bytes_enviados": self.bytes_enviados,
+            "bytes_recebidos": self.bytes_recebidos,
+            "fases_ms": {fase: ns / 1e6 for fase, ns in self.fases.items()},
+            "total_ms": self.total_ns / 1e6,
+        }
+
+
+# ---------------------------------------
+# API usada pelos clientes
+# ---------------------------------------
+def iniciar(protocolo, operacao):
+    registro = RegistroRequisicao(protocolo, operacao)
+    conexao = getattr(_local, "conexao_pendente", 0)
+    if conexao:
+        registro.fases["conexao"] = conexao
+        _local.conexao_pendente = 0
+    _local.atual = registro
+    return registro
+
+
+def registrar_conexao(duracao_ns):
+    """Guarda o tempo de connect para a próxima requisição desta thread."""
+    _local.conexao_pendente = duracao_ns
+
+
+def marcar(fase, inicio_ns):
+    """Soma à fase o tempo decorrido desde inicio_ns (perf_counter_ns) e o devolve."""
+    decorrido = time.perf_counter_ns() - inicio_ns
+    registro = getattr(_local, "atual", None)
+    if registro is not None:
+        registro.fases[fase] += decorrido
+    return decorrido
+
+
+def adicionar(fase, duracao_ns):
+    """Soma uma duração já medida à fase."""
+    registro = getattr(_local, "atual", None)
+    if registro is not None:
+        registro.fases[fase] += duracao_ns
+
+
+def marcar_leitura(inicio_ns, primeiro_byte_ns):
+    """Divide a espera iniciada em inicio_ns entre primeiro_byte e leitura.
+
+    primeiro_byte_ns é o instante em que chegou o primeiro dado; None indica
+    que a resposta já estava no buffer e todo o tempo conta como leitura.
+    """
+    agora = time.perf_counter_ns()
+    if primeiro_byte_ns is None:
+        adicionar("leitura", agora - inicio_ns)
+    else:
+        adicionar("primeiro_byte", primeiro_byte_ns - inicio_ns)
+        adicionar("leitura", agora - primeiro_byte_ns)
+
+
+def contar_bytes(enviados=0, recebidos=0):
+    registro = getattr(_local, "atual", None)
+    if registro is not None:
+        registro.bytes_enviados += enviados
+        registro.bytes_recebidos += recebidos
+
+
+def finalizar(sucesso):
+    registro = getattr(_local, "atual", None)
+    if registro is None:
+        return None
+    registro.duracao_ns = time.perf_counter_ns() - registro.inicio_ns
+    registro.sucesso = sucesso
+    _local.atual = None
+    _local.ultimo = registro
+    for callback in list(_observadores):
+        callback(registro)
+    return registro
+
+
+def ultimo():
+    """Último registro finalizado nesta thread."""
+    return getattr(_local, "ultimo", None)
+
+
+def assinar(callback):
+    """callback(registro) é chamado a cada requisição finalizada, em qualquer thread."""
+    _observadores.append(callback)
+
+
+def cancelar(callback):
+    try:
+        _observadores.remove(callback)
+    except ValueError:
+        pass
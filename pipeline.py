@@ -0,0 +1,77 @@
+"""Pipelining de requisições numa única conexão.
+
+Em vez de esperar cada resposta antes de enviar o próximo comando, mantém até
+`janela` requisições em voo e casa as respostas pela ordem de envio (o servidor
+responde na ordem em que recebeu). Um lote de n operações passa a custar
+aproximadamente um RTT mais o tempo de transferência, e não n RTTs.
+"""
+from collections import deque
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+JANELA_PADRAO = 32
+
+
+def iterar(sock, itens, codificar, leitor, janela=JANELA_PADRAO):
+    """Envia `itens` em rajadas e gera (item, resposta_bruta) na ordem de envio.
+
+    codificar(item) -> bytes monta a requisição; leitor.proxima() devolve a
+    próxima resposta crua. A janela limita as requisições sem resposta,
+    o que evita encher os buffers de envio dos dois lados (backpressure).
+    Os itens são consumidos sob demanda, então o lote pode ser um gerador.
+
+    Se o chamador abandonar o gerador antes do fim, as respostas ainda em voo
+    são lidas e descartadas, para a conexão voltar sincronizada (ex.: ao
+    PoolSessoes). Se isso falhar, ou se o envio/leitura der erro no meio, o
+    socket é fechado: com respostas perdidas no caminho ele não serve mais.
+    """
+    if janela < 1:
+        raise ValueError("janela deve ser >= 1")
+
+    itens = iter(itens)
+    em_voo = deque()
+    esgotado = False
+
+    try:
+        while True:
+            # completa a janela com uma única escrita quando metade já voltou
+            if not esgotado and len(em_voo) <= janela // 2:
+                rajada = []
+                while len(em_voo) < janela:
+                    try:
+                        item = next(itens)
+                    except StopIteration:
+                        esgotado = True
+                        break
+                    em_voo.append(item)
+                    rajada.append(codificar(item))
+                if rajada:
+                    sock.sendall(b"".join(rajada))
+
+            if not em_voo:
+                return
+            yield em_voo.popleft(), leitor.proxima()
+    except GeneratorExit:
+        _drenar(sock, leitor, len(em_voo))
+        raise
+    except BaseException:
+        _invalidar(sock)
+        raise
+
+
+def _drenar(sock, leitor, pendentes):
+    """Lê e descarta `pendentes` respostas; sem conseguir, invalida o socket."""
+    try:
+        for _ in range(pendentes):
+            leitor.proxima()
+    except Exception:
+        _invalidar(sock)
+
+
+def _invalidar(sock):
+    # fechado, o socket falha em Sessao.viva() e o pool o descarta
+    try:
+        sock.close()
+    except OSError:
+        pass
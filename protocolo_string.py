@@ -0,0 +1,46 @@
+"""Escape e leitura dos campos do protocolo de strings ("CMD|chave=valor|...|FIM").
+
+Com o escape, os valores podem ter qualquer texto: "%", "|", "=" e quebras de
+linha viajam como %25, %7C, %3D, %0A e %0D. Assim um echo com "|FIM" no meio
+não corta o quadro (o leitor procura "|FIM" e um valor escapado nunca contém
+"|") e cada resposta ocupa uma linha só no log. As chaves são sempre nomes
+simples.
+
+O escape é uma extensão do servidor_local; o servidor da disciplina não
+desescapa nada. Por isso o cliente (codificadores.CodecString) só escapa
+quando configurado para isso, e ler() desescapa só com escapado=True.
+
+    ler("OK|token=abc|mensagem=a%7Cb|FIM")  -> ("OK", {"token": "abc", "mensagem": "a|b"})
+"""
+
+
+def escapar(valor):
+    """Texto de um valor pronto para ir entre "chave=" e o próximo "|"."""
+    return (valor.replace("%", "%25").replace("|", "%7C").replace("=", "%3D")
+            .replace("\n", "%0A").replace("\r", "%0D"))
+
+
+def desescapar(valor):
+    # todo "%" de um valor escapado abre uma sequência, então substituir
+    # %25 por último não cria sequências novas
+    if "%" not in valor:
+        return valor
+    return (valor.replace("%0D", "\r").replace("%0A", "\n").replace("%3D", "=")
+            .replace("%7C", "|").replace("%25", "%"))
+
+
+def ler(texto, escapado=True):
+    """(comando, campos) de uma mensagem, numa passada só.
+
+    Com escapado, os valores saem desescapados; sem, como vieram. Partes sem
+    "=" entram em campos com valor None, na ordem em que vieram.
+    """
+    valor_de = desescapar if escapado else str
+    partes = texto.split("|")
+    if len(partes) > 1 and partes[-1].strip() == "FIM":
+        partes.pop()
+    campos = {}
+    for parte in partes[1:]:
+        chave, igual, valor = parte.partition("=")
+        campos[chave] = valor_de(valor) if igual else None
+    return partes[0].strip(), campos
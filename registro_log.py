@@ -0,0 +1,180 @@
+"""Log de respostas em segundo plano, compartilhado pelos três clientes.
+
+registrar() só coloca o texto numa fila em memória; uma thread própria
+esvazia a fila em lotes, agrupa por arquivo e grava cada lote com uma única
+escrita, mantendo os arquivos abertos. A thread da requisição nunca espera
+pelo disco. Recursos:
+
+  - rotação por tamanho: arquivo.txt -> arquivo.txt.1 -> ... -> .<copias>
+  - amostragem: sob carga (fila com pelo menos `fila_carga` registros), só
+    1 a cada `amostragem` respostas é gravada
+  - registros em bytes são gravados como estão, sem quebra de linha (usado
+    pelo log binário do protobuf)
+  - descarregar() espera tudo o que já foi enfileirado chegar ao disco; é
+    chamado automaticamente na saída do programa
+"""
+import atexit
+import os
+import queue
+import threading
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+TAMANHO_LOTE = 512                    # registros gravados por rodada
+TAMANHO_MAXIMO = 10 * 1024 * 1024     # rotaciona ao passar disso (bytes); None desliga
+COPIAS = 3                            # arquivos rotacionados mantidos
+AMOSTRAGEM = 1                        # grava 1 a cada N respostas (1 = todas)
+FILA_CARGA = 0                        # amostragem só vale com a fila a partir daqui
+
+
+class RegistradorRespostas:
+    """Fila + thread escritora; uma instância atende qualquer número de arquivos."""
+
+    def __init__(self, tamanho_maximo=TAMANHO_MAXIMO, copias=COPIAS,
+                 amostragem=AMOSTRAGEM, fila_carga=FILA_CARGA, tamanho_lote=TAMANHO_LOTE):
+        self.tamanho_maximo = tamanho_maximo
+        self.copias = copias
+        self.amostragem = amostragem
+        self.fila_carga = fila_carga
+        self.tamanho_lote = tamanho_lote
+        self.descartados = 0
+        self._fila = queue.SimpleQueue()
+        self._contadores = {}
+        self._arquivos = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ---- lado da requisição ----
+    def registrar(self, caminho, texto):
+        """Enfileira uma linha (str) ou registro (bytes) para `caminho`.
+
+        Devolve False se o registro caiu na amostragem.
+        """
+        if self.amostragem > 1 and self._fila.qsize() >= self.fila_carga:
+            # várias threads registram ao mesmo tempo: sem o lock, duas leem o mesmo n
+            with self._lock:
+                n = self._contadores.get(caminho, 0)
+                self._contadores[caminho] = n + 1
+                if n % self.amostragem:
+                    self.descartados += 1
+                    return False
+        self._garantir_thread()
+        self._fila.put((caminho, texto))
+        return True
+
+    def descarregar(self, timeout=None):
+        """Espera a gravação de tudo o que foi enfileirado até agora."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        concluido = threading.Event()
+        self._fila.put((None, concluido))
+        return concluido.wait(timeout)
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar,
+                                                name="registro-respostas", daemon=True)
+                self._thread.start()
+
+    # ---- thread escritora ----
+    def _executar(self):
+        while True:
+            lote = [self._fila.get()]
+            try:
+                while len(lote) < self.tamanho_lote:
+                    lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                pass
+            self._gravar(lote)
+
+    def _gravar(self, lote):
+        por_arquivo = {}
+        avisos = []
+        for caminho, texto in lote:
+            if caminho is None:
+                avisos.append(texto)
+            else:
+                if not isinstance(texto, bytes):
+                    texto = (texto + "\n").encode("utf-8")
+                por_arquivo.setdefault(caminho, []).append(texto)
+
+        for caminho, linhas in por_arquivo.items():
+            try:
+                self._gravar_linhas(caminho, linhas)
+            except OSError as e:
+                print("Erro ao gravar log:", e)
+                self._fechar(caminho)
+
+        for concluido in avisos:
+            concluido.set()
+
+    def _gravar_linhas(self, caminho, linhas):
+        """Grava as linhas com o mínimo de writes, rotacionando quando o arquivo enche."""
+        arquivo = self._abrir(caminho)
+        tamanho = os.fstat(arquivo.fileno()).st_size
+        pendentes = []
+        for linha in linhas:
+            if self.tamanho_maximo and tamanho and tamanho + len(linha) > self.tamanho_maximo:
+                arquivo.write(b"".join(pendentes))
+                pendentes.clear()
+                self._fechar(caminho)
+                self._rotacionar(caminho)
+                arquivo = self._abrir(caminho)
+                tamanho = 0
+            pendentes.append(linha)
+            tamanho += len(linha)
+        arquivo.write(b"".join(pendentes))
+        arquivo.flush()
+
+    def _abrir(self, caminho):
+        arquivo = self._arquivos.get(caminho)
+        if arquivo is None or not os.path.exists(caminho):
+            self._fechar(caminho)
+            arquivo = self._arquivos[caminho] = open(caminho, "ab")
+        return arquivo
+
+    def _fechar(self, caminho):
+        arquivo = self._arquivos.pop(caminho, None)
+        if arquivo is not None:
+            try:
+                arquivo.close()
+            except OSError:
+                pass
+
+    def _rotacionar(self, caminho):
+        if self.copias < 1:
+            os.truncate(caminho, 0)
+            return
+        for i in range(self.copias - 1, 0, -1):
+            if os.path.exists(f"{caminho}.{i}"):
+                os.replace(f"{caminho}.{i}", f"{caminho}.{i + 1}")
+        os.replace(caminho, f"{caminho}.1")
+
+
+# ---------------------------------------
+# Instância compartilhada
+# ---------------------------------------
+_registrador = RegistradorRespostas()
+
+
+def registrar(caminho, texto):
+    return _registrador.registrar(caminho, texto)
+
+
+def descarregar(timeout=None):
+    return _registrador.descarregar(timeout)
+
+
+def configurar(**opcoes):
+    """Ajusta tamanho_maximo, copias, amostragem, fila_carga ou tamanho_lote."""
+    for nome, valor in opcoes.items():
+        if nome not in ("tamanho_maximo", "copias", "amostragem", "fila_carga", "tamanho_lote"):
+            raise TypeError(f"Opção de log desconhecida: {nome}")
+        setattr(_registrador, nome, valor)
+
+
+atexit.register(descarregar)
@@ -0,0 +1,318 @@
+"""Decodificação tipada dos dados das respostas protobuf.
+
+O servidor manda tudo em RespostaOk.dados (map<string, string>): números como
+"1.5", listas como "1.0,2.0" e dicts como "{'cpu_simulado': 33.5}". As
+classes daqui espelham as mensagens de resultado de mensagens.proto
+(ResultadoSoma, ResultadoEcho, ResultadoTimestamp, StatusServidor,
+InfoServidor, HistoricoAluno, DadosAuth) com __slots__, e cada campo é
+convertido para o tipo do .proto uma única vez, no primeiro acesso; campos
+que ninguém lê (ex.: numeros_originais de uma soma grande) nunca são
+convertidos. Listas e dicts no formato do repr() do Python são lidos por um
+leitor próprio (strings, números, True/False/None, listas e dicts), sem
+avaliar o texto que veio do servidor.
+
+    r = resultados.decodificar(resp)     # StatusServidor, ResultadoSoma, ... ou None
+    r.metricas["cpu_simulado"]           # float
+    r.para_mensagem()                    # mensagens_pb2.StatusServidor
+"""
+import re
+
+from google.protobuf.descriptor import FieldDescriptor
+
+import mensagens_pb2
+
+_PENDENTE = object()
+
+# campo do .proto -> chave usada pelo servidor em dados, quando diferem
+_CHAVES = {
+    "HistoricoAluno": {"operacoes": "historico", "total": "total_encontrado"},
+}
+
+_FLUTUANTES = (FieldDescriptor.TYPE_DOUBLE, FieldDescriptor.TYPE_FLOAT)
+_INTEIROS = (FieldDescriptor.TYPE_INT32, FieldDescriptor.TYPE_INT64, FieldDescriptor.TYPE_UINT32,
+             FieldDescriptor.TYPE_UINT64, FieldDescriptor.TYPE_SINT32, FieldDescriptor.TYPE_SINT64)
+PROFUNDIDADE_MAXIMA = 32     # aninhamento aceito nos literais (historico usa 3)
+
+
+# ---------------------------------------
+# Conversores de texto para os tipos do .proto
+# ---------------------------------------
+def _inteiro(valor):
+    try:
+        return int(valor)
+    except ValueError:
+        return int(float(valor))
+
+
+def _booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    return str(valor).strip().lower() in ("true", "1", "sim")
+
+
+# ---------------------------------------
+# Leitor dos literais (repr do Python) que o servidor manda
+# ---------------------------------------
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<numero>[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?|[-+]?inf|nan)
+  | (?P<texto>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+  | (?P<nome>True|False|None)
+  | (?P<sinal>[][{}(),:])
+)""", re.VERBOSE)
+_INTEIRO = re.compile(r"[-+]?\d+")
+_ESCAPE = re.compile(r"\\(x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)")
+_ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "r": "\r", "t": "\t", "0": "\0"}
+_NOMES = {"True": True, "False": False, "None": None}
+_FECHA = {"[": "]", "(": ")", "{": "}"}
+
+
+def _trocar_escape(achado):
+    escape = achado.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    if escape not in _ESCAPES:
+        raise ValueError(f"escape desconhecido: \\{escape}")
+    return _ESCAPES[escape]
+
+
+def _token(texto, posicao):
+    achado = _TOKEN.match(texto, posicao)
+    if achado is None:
+        raise ValueError(f"literal inválido na posição {posicao}: {texto[posicao:posicao + 20]!r}")
+    return achado
+
+
+def _ler_valor(texto, posicao, profundidade):
+    """(valor, posição seguinte) do literal que começa em `posicao`."""
+    achado = _token(texto, posicao)
+    posicao = achado.end()
+    tipo = achado.lastgroup
+    if tipo == "numero":
+        numero = achado.group(tipo)
+        return (int(numero) if _INTEIRO.fullmatch(numero) else float(numero)), posicao
+    if tipo == "texto":
+        return _ESCAPE.sub(_trocar_escape, achado.group(tipo)[1:-1]), posicao
+    if tipo == "nome":
+        return _NOMES[achado.group(tipo)], posicao
+    abre = achado.group(tipo)
+    fecha = _FECHA.get(abre)
+    if fecha is None:
+        raise ValueError(f"{abre!r} inesperado na posição {achado.start(tipo)}")
+    if profundidade >= PROFUNDIDADE_MAXIMA:
+        raise ValueError("literal aninhado demais")
+    itens = []
+    while True:
+        achado = _token(texto, posicao)
+        if achado.group("sinal") == fecha:
+            break
+        item, posicao = _ler_valor(texto, posicao, profundidade + 1)
+        if abre == "{":
+            if isinstance(item, (list, dict)):
+                raise ValueError("chave de dict precisa ser texto ou número")
+            achado = _token(texto, posicao)
+            if achado.group("sinal") != ":":
+                raise ValueError(f"esperado ':' na posição {posicao}")
+            valor, posicao = _ler_valor(texto, achado.end(), profundidade + 1)
+            item = (item, valor)
+        itens.append(item)
+        achado = _token(texto, posicao)
+        if achado.group("sinal") not in (",", fecha):
+            raise ValueError(f"esperado ',' ou {fecha!r} na posição {posicao}")
+        if achado.group("sinal") == fecha:
+            break
+        posicao = achado.end()
+    return (dict(itens) if abre == "{" else itens), achado.end()
+
+
+def _ler_literal(texto):
+    valor, posicao = _ler_valor(texto, 0, 0)
+    if texto[posicao:].strip():
+        raise ValueError(f"texto sobrando depois do literal: {texto[posicao:posicao + 20]!r}")
+    return valor
+
+
+def _literal(valor, tipo):
+    """dict/list já prontos ou o repr Python deles ("{'a': 1}", "[...]")."""
+    if isinstance(valor, tipo):
+        return valor
+    if not valor:
+        return tipo()
+    resultado = _ler_literal(valor)
+    if not isinstance(resultado, tipo):
+        raise ValueError(f"esperado {tipo.__name__}: {valor!r}")
+    return resultado
+
+
+def _sequencia(valor):
+    if isinstance(valor, (list, tuple)):
+        return valor
+    valor = str(valor).strip()
+    if valor.startswith("["):
+        interno = valor[1:-1]
+        if valor.endswith("]") and not any(c in interno for c in "[]{}'\""):
+            valor = interno     # lista só de números: "[1.0, 2.0]" vira "1.0, 2.0"
+        else:
+            return _literal(valor, list)
+    return [x for x in valor.split(",") if x.strip()]
+
+
+def _escalar(campo):
+    if campo.type in _FLUTUANTES:
+        return float
+    if campo.type in _INTEIROS:
+        return _inteiro
+    if campo.type == FieldDescriptor.TYPE_BOOL:
+        return _booleano
+    return str
+
+
+def _conversor(campo):
+    """Função texto -> valor Python para um campo do .proto."""
+    tipo = campo.message_type
+    if tipo is not None and tipo.GetOptions().map_entry:
+        valor = _escalar(tipo.fields_by_name["value"])
+        return lambda bruto: {str(k): valor(v) for k, v in _literal(bruto, dict).items()}
+    if campo.label == FieldDescriptor.LABEL_REPEATED:
+        if tipo is not None:
+            return lambda bruto: tuple(CLASSES[tipo.name](item) for item in _literal(bruto, list))
+        escalar = _escalar(campo)
+        return lambda bruto: tuple(escalar(x) for x in _sequencia(bruto))
+    return _escalar(campo)
+
+
+def _padrao(campo):
+    tipo = campo.message_type
+    if tipo is not None and tipo.GetOptions().map_entry:
+        return {}
+    if campo.label == FieldDescriptor.LABEL_REPEATED:
+        return ()
+    return campo.default_value
+
+
+# ---------------------------------------
+# Classes
+# ---------------------------------------
+class _Campo:
+    """Campo convertido sob demanda; o valor fica guardado no slot `_<nome>`."""
+
+    __slots__ = ("nome", "chave", "converter", "padrao", "slot")
+
+    def __init__(self, nome, chave, converter, padrao, slot):
+        self.nome = nome
+        self.chave = chave
+        self.converter = converter
+        self.padrao = padrao
+        self.slot = slot
+
+    def __get__(self, obj, tipo=None):
+        if obj is None:
+            return self
+        valor = self.slot.__get__(obj)
+        if valor is _PENDENTE:
+            bruto = obj._dados.get(self.chave)
+            valor = self.padrao if bruto is None else self.converter(bruto)
+            self.slot.__set__(obj, valor)
+        return valor
+
+
+class Resultado:
+    """Base das classes geradas a partir de mensagens.proto."""
+
+    __slots__ = ("_dados",)
+    _campos = ()
+    _mensagem = None
+
+    def __init__(self, dados):
+        self._dados = dados
+        for campo in self._campos:
+            campo.slot.__set__(self, _PENDENTE)
+
+    def para_dict(self):
+        saida = {}
+        for campo in self._campos:
+            valor = getattr(self, campo.nome)
+            if isinstance(valor, tuple) and valor and isinstance(valor[0], Resultado):
+                valor = [item.para_dict() for item in valor]
+            saida[campo.nome] = valor
+        return saida
+
+    def para_mensagem(self):
+        """Monta a mensagem protobuf correspondente (ex.: mensagens_pb2.ResultadoSoma)."""
+        mensagem = self._mensagem()
+        for campo in self._campos:
+            valor = getattr(self, campo.nome)
+            if isinstance(valor, dict):
+                getattr(mensagem, campo.nome).update(valor)
+            elif isinstance(valor, tuple):
+                destino = getattr(mensagem, campo.nome)
+                for item in valor:
+                    if isinstance(item, Resultado):
+                        destino.add().CopyFrom(item.para_mensagem())
+                    else:
+                        destino.append(item)
+            else:
+                setattr(mensagem, campo.nome, valor)
+        return mensagem
+
+    def __repr__(self):
+        campos = ", ".join(f"{c.nome}={getattr(self, c.nome)!r}" for c in self._campos)
+        return f"{type(self).__name__}({campos})"
+
+
+def _classe(mensagem):
+    """Cria a classe com __slots__ para uma mensagem de mensagens_pb2."""
+    descritor = mensagem.DESCRIPTOR
+    chaves = _CHAVES.get(descritor.name, {})
+    classe = type(descritor.name, (Resultado,), {
+        "__slots__": tuple("_" + campo.name for campo in descritor.fields),
+        "__doc__": f"Dados de {descritor.name} (mensagens.proto), convertidos sob demanda.",
+        "__module__": __name__,
+    })
+    campos = []
+    for campo in descritor.fields:
+        descritor_campo = _Campo(campo.name, chaves.get(campo.name, campo.name), _conversor(campo),
+                                 _padrao(campo), classe.__dict__["_" + campo.name])
+        setattr(classe, campo.name, descritor_campo)
+        campos.append(descritor_campo)
+    classe._campos = tuple(campos)
+    classe._mensagem = mensagem
+    return classe
+
+
+DadosAuth = _classe(mensagens_pb2.DadosAuth)
+ResultadoEcho = _classe(mensagens_pb2.ResultadoEcho)
+ResultadoSoma = _classe(mensagens_pb2.ResultadoSoma)
+ResultadoTimestamp = _classe(mensagens_pb2.ResultadoTimestamp)
+StatusServidor = _classe(mensagens_pb2.StatusServidor)
+InfoServidor = _classe(mensagens_pb2.InfoServidor)
+HistoricoOperacao = _classe(mensagens_pb2.HistoricoOperacao)
+HistoricoAluno = _classe(mensagens_pb2.HistoricoAluno)
+
+CLASSES = {classe.__name__: classe for classe in (
+    DadosAuth, ResultadoEcho, ResultadoSoma, ResultadoTimestamp, StatusServidor,
+    InfoServidor, HistoricoOperacao, HistoricoAluno)}
+
+# operação (dados["operacao"] nas respostas OP) -> classe
+POR_OPERACAO = {
+    "soma": ResultadoSoma,
+    "echo": ResultadoEcho,
+    "timestamp": ResultadoTimestamp,
+    "status": StatusServidor,
+    "historico": HistoricoAluno,
+}
+POR_COMANDO = {"AUTH": DadosAuth, "INFO": InfoServidor}
+
+
+# ---------------------------------------
+# Interface
+# ---------------------------------------
+def decodificar(resp, operacao=None):
+    """Objeto tipado com os dados de uma Resposta OK, ou None (erro, logout, desconhecida).
+
+    `operacao` força a classe quando a resposta não traz dados["operacao"].
+    """
+    if resp is None or not resp.HasField("ok"):
+        return None
+    ok = resp.ok
+    classe = POR_COMANDO.get(ok.comando) or POR_OPERACAO.get(operacao or ok.dados.get("operacao"))
+    return None if classe is None else classe(ok.dados)
@@ -0,0 +1,175 @@
+"""Saída dos clientes no console: modo de saída e captura do print() por thread.
+
+Modos (configurar_modo() para o processo, usar_modo() para uma chamada):
+  - detalhado: tamanho, tempo de serialização e a resposta formatada de cada
+    requisição (o comportamento original do menu);
+  - resumo: nada por requisição; resumo() devolve contagens e tempos por protocolo;
+  - json: uma linha JSON compacta por requisição, sem formatar a resposta;
+  - silencioso: nada.
+Fora do modo detalhado a resposta não é formatada: transporte.Transporte
+devolve um FormatacaoAdiada, que só chama format_*_response se alguém pedir
+str() dele. Assim lotes e testes de carga medem o protocolo, não o terminal.
+
+Captura: os clientes imprimem direto no stdout; quando os três protocolos
+rodam ao mesmo tempo, as linhas se misturariam. instalar() troca sys.stdout
+por um objeto que, nas threads dentro de capturar(), escreve num buffer
+próprio e, nas demais, no stdout original.
+"""
+import contextlib
+import io
+import json
+import sys
+import threading
+
+MODOS = ("detalhado", "resumo", "json", "silencioso")
+
+_modo = "detalhado"
+_local = threading.local()
+
+
+# ---------------------------------------
+# Modo de saída
+# ---------------------------------------
+def _validar(modo):
+    if modo not in MODOS:
+        raise ValueError(f"Modo de saída inválido: {modo!r} (use {', '.join(MODOS)})")
+    return modo
+
+
+def configurar_modo(modo):
+    """Modo padrão de todas as threads."""
+    global _modo
+    _modo = _validar(modo)
+
+
+def modo_atual():
+    return getattr(_local, "modo", None) or _modo
+
+
+def detalhado():
+    return modo_atual() == "detalhado"
+
+
+@contextlib.contextmanager
+def usar_modo(modo):
+    """Troca o modo só nesta thread, dentro do with (None mantém o atual)."""
+    anterior = getattr(_local, "modo", None)
+    _local.modo = _validar(modo) if modo is not None else anterior
+    try:
+        yield
+    finally:
+        _local.modo = anterior
+
+
+class FormatacaoAdiada:
+    """Resposta formatada sob demanda: formatar(resp, elapsed) roda no primeiro str()."""
+
+    __slots__ = ("_formatar", "_resp", "_elapsed", "_texto")
+
+    def __init__(self, formatar, resp, elapsed):
+        self._formatar = formatar
+        self._resp = resp
+        self._elapsed = elapsed
+        self._texto = None
+
+    def __str__(self):
+        if self._texto is None:
+            self._texto = self._formatar(self._resp, self._elapsed)
+            self._formatar = self._resp = None
+        return self._texto
+
+
+class _Resumo:
+    """Requisições, falhas e tempo total por protocolo, somados de todas as threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totais = {}
+
+    def adicionar(self, registro):
+        with self._lock:
+            totais = self._totais.setdefault(registro.protocolo, [0, 0, 0])
+            totais[0] += 1
+            totais[1] += not registro.sucesso
+            totais[2] += registro.total_ns
+
+    def texto(self, limpar):
+        with self._lock:
+            totais, linhas = self._totais, []
+            if limpar:
+                self._totais = {}
+        for protocolo, (n, falhas, total_ns) in totais.items():
+            linhas.append(f"{protocolo}: {n} requisição(ões), {falhas} falha(s), "
+                          f"média {total_ns / n / 1e6:.3f} ms")
+        return "\n".join(linhas)
+
+
+_resumo = _Resumo()
+
+
+def emitir(registro, titulo, formatado):
+    """Chamado pelo transporte ao fim de cada requisição, conforme o modo da thread."""
+    modo = modo_atual()
+    if modo == "detalhado":
+        print(titulo)
+        print(formatado)
+    elif modo == "resumo":
+        if registro is not None:
+            _resumo.adicionar(registro)
+    elif modo == "json":
+        if registro is not None:
+            sys.stdout.write(json.dumps({
+                "protocolo": registro.protocolo, "operacao": registro.operacao,
+                "sucesso": bool(registro.sucesso), "total_ms": round(registro.total_ns / 1e6, 3),
+                "bytes_enviados": registro.bytes_enviados,
+                "bytes_recebidos": registro.bytes_recebidos}) + "\n")
+
+
+def resumo(limpar=True):
+    """Texto do resumo acumulado no modo "resumo" (uma linha por protocolo)."""
+    return _resumo.texto(limpar)
+
+
+# ---------------------------------------
+# Captura por thread
+# ---------------------------------------
+
+
+class SaidaPorThread(io.TextIOBase):
+    def __init__(self, padrao):
+        self.padrao = padrao
+        self._local = threading.local()
+
+    def write(self, texto):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            return self.padrao.write(texto)
+        return buffer.write(texto)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self.padrao.flush()
+
+    def writable(self):
+        return True
+
+    @contextlib.contextmanager
+    def capturar(self):
+        """Desvia o que esta thread imprimir para um StringIO, devolvido no with."""
+        anterior = getattr(self._local, "buffer", None)
+        buffer = self._local.buffer = io.StringIO()
+        try:
+            yield buffer
+        finally:
+            self._local.buffer = anterior
+
+
+def instalar():
+    """Instala (uma vez) o SaidaPorThread em sys.stdout e o devolve."""
+    if not isinstance(sys.stdout, SaidaPorThread):
+        sys.stdout = SaidaPorThread(sys.stdout)
+    return sys.stdout
+
+
+def capturar():
+    return instalar().capturar()
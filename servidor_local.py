@@ -0,0 +1,561 @@
+"""Servidor local que imita o servidor remoto da disciplina nos três protocolos.
+
+Serve como alvo para testes de carga e medições sem depender de 3.88.99.255:
+  - 8080: strings "CMD|chave=valor|...|FIM"
+  - 8081: JSON delimitado por nova linha
+  - 8082: Protobuf (Requisicao/Resposta) com header de 4 bytes big-endian
+
+Por padrão o protocolo de strings fala o formato do servidor remoto, com os
+valores como estão. Com escapar=True (--escapar) os valores vão e voltam
+escapados por protocolo_string; configurar_clientes() liga o mesmo escape no
+cliente de strings.
+
+Uso: python servidor_local.py [--host 127.0.0.1] [--porta-string 8080] ...
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import mensagens_pb2
+import protocolo_string
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+HOST = "127.0.0.1"
+PORTA_STRING = 8080
+PORTA_JSON = 8081
+PORTA_PROTOBUF = 8082
+TIMEOUT_TOKEN = 3600
+VERSAO = "1.0.0"
+LIMITE_MENSAGEM = 16 * 1024 * 1024   # maior requisição aceita (bytes)
+LIMITE_HISTORICO = 10
+BACKLOG = 4096
+
+ALUNOS = {"554229": "ANTONIO MATHEUS MONTEIRO DA SILVA"}
+OPERACOES = ["soma", "echo", "timestamp", "status", "historico"]
+
+
+# ---------------------------------------
+# Exceções
+# ---------------------------------------
+class ErroServidor(Exception):
+    """Erro de negócio devolvido ao cliente como resposta de erro."""
+    pass
+
+
+# ---------------------------------------
+# Estado compartilhado entre os protocolos
+# ---------------------------------------
+class EstadoServidor:
+    """Sessões, histórico por aluno e contadores, comuns aos três protocolos."""
+
+    def __init__(self):
+        self.segredo = secrets.token_bytes(32)
+        self.sessoes = {}
+        self.historicos = {}
+        self.operacoes_processadas = 0
+        self.inicio = time.time()
+
+    # ---- sessões ----
+    def autenticar(self, aluno_id, ip):
+        aluno_id = str(aluno_id or "")
+        if aluno_id not in ALUNOS:
+            raise ErroServidor(f"Aluno {aluno_id!r} não encontrado")
+
+        emitido = int(time.time())
+        base = f"{aluno_id}:{ip}:{emitido}"
+        # o nonce diferencia sessões abertas no mesmo segundo pelo mesmo IP
+        nonce = secrets.token_hex(8)
+        assinatura = hmac.new(self.segredo, f"{base}:{nonce}".encode("utf-8"),
+                              hashlib.sha256).hexdigest()
+        token = f"{base}:{assinatura}"
+
+        self.sessoes[token] = (aluno_id, emitido + TIMEOUT_TOKEN)
+        self._registrar(aluno_id, "autenticar", True)
+        return {
+            "token": token,
+            "nome": ALUNOS[aluno_id],
+            "matricula": aluno_id,
+            "timeout_segundos": TIMEOUT_TOKEN,
+        }
+
+    def validar_token(self, token):
+        sessao = self.sessoes.get(token)
+        if sessao is None:
+            raise ErroServidor("Token inválido ou expirado")
+        aluno_id, expira_em = sessao
+        if time.time() >= expira_em:
+            del self.sessoes[token]
+            raise ErroServidor("Token inválido ou expirado")
+        return aluno_id
+
+    def logout(self, token):
+        aluno_id = self.validar_token(token)
+        del self.sessoes[token]
+        self._registrar(aluno_id, "logout", True)
+        return {"msg": "Logout realizado com sucesso"}
+
+    # ---- operações ----
+    def executar(self, token, operacao, parametros):
+        aluno_id = self.validar_token(token)
+        try:
+            if operacao == "soma":
+                resultado = self._soma(parametros.get("numeros"))
+            elif operacao == "echo":
+                resultado = self._echo(parametros.get("mensagem", ""))
+            elif operacao == "timestamp":
+                resultado = self._timestamp()
+            elif operacao == "status":
+                resultado = self._status()
+            elif operacao == "historico":
+                resultado = self._historico(aluno_id, parametros.get("limite"))
+            else:
+                raise ErroServidor(f"Operação {operacao!r} não suportada")
+        except ErroServidor:
+            self._registrar(aluno_id, operacao, False)
+            raise
+        self._registrar(aluno_id, operacao, True)
+        return resultado
+
+    def info(self, protocolo, porta, formato):
+        return {
+            "nome": f"Servidor de Validação SD - {protocolo.capitalize()}",
+            "versao": VERSAO,
+            "host": HOST,
+            "port": porta,
+            "protocolo": protocolo,
+            "formato": formato,
+            "operacoes_disponiveis": OPERACOES,
+        }
+
+    def _soma(self, numeros):
+        if numeros is None:
+            raise ErroServidor("Parâmetro 'numeros' é obrigatório")
+        if isinstance(numeros, str):
+            numeros = [x for x in numeros.split(",") if x.strip()]
+        try:
+            valores = [float(x) for x in numeros]
+        except (TypeError, ValueError):
+            raise ErroServidor("Parâmetro 'numeros' deve conter apenas números")
+        if not valores:
+            raise ErroServidor("Lista de números vazia")
+
+        total = sum(valores)
+        return {
+            "numeros_originais": valores,
+            "quantidade": len(valores),
+            "soma": total,
+            "media": total / len(valores),
+            "maximo": max(valores),
+            "minimo": min(valores),
+            "timestamp_calculo": datetime.now().isoformat(),
+        }
+
+    def _echo(self, mensagem):
+        mensagem = str(mensagem)
+        return {
+            "mensagem_original": mensagem,
+            "mensagem_eco": mensagem,
+            "hash_md5": hashlib.md5(mensagem.encode("utf-8")).hexdigest(),
+            "tamanho_mensagem": len(mensagem),
+            "timestamp_servidor": datetime.now().isoformat(),
+        }
+
+    def _timestamp(self):
+        agora = datetime.now()
+        return {
+            "timestamp_unix": agora.timestamp(),
+            "timestamp_iso": agora.isoformat(),
+            "timestamp_formatado": agora.strftime("%d/%m/%Y %H:%M:%S"),
+            "ano": agora.year,
+            "mes": agora.month,
+            "dia": agora.day,
+            "hora": agora.hour,
+            "minuto": agora.minute,
+            "segundo": agora.second,
+            "microsegundo": agora.microsecond,
+        }
+
+    def _status(self):
+        return {
+            "status": "ATIVO",
+            "timestamp_consulta": datetime.now().isoformat(),
+            "operacoes_processadas": self.operacoes_processadas,
+            "sessoes_ativas": len(self.sessoes),
+            "tempo_ativo": round(time.time() - self.inicio, 3),
+            "versao": VERSAO,
+            "estatisticas_banco": {},
+            "sessoes_detalhes": {},
+            "metricas": {
+                "cpu_simulado": round(random.uniform(5, 95), 2),
+                "memoria_simulada": round(random.uniform(5, 95), 2),
+                "latencia_simulada": round(random.uniform(1, 10), 2),
+            },
+        }
+
+    def _historico(self, aluno_id, limite=None):
+        try:
+            limite = int(limite) if limite is not None else LIMITE_HISTORICO
+        except (TypeError, ValueError):
+            limite = LIMITE_HISTORICO
+        registros = list(self.historicos.get(aluno_id, ()))[-limite:][::-1]
+        sucesso = sum(1 for r in registros if r["sucesso"])
+        return {
+            "aluno_id": aluno_id,
+            "historico": registros,
+            "estatisticas": {
+                "total_operacoes": len(registros),
+                "operacoes_sucesso": sucesso,
+                "operacoes_erro": len(registros) - sucesso,
+                "taxa_sucesso": round(100.0 * sucesso / len(registros), 2) if registros else 0.0,
+            },
+            "limite_solicitado": limite,
+            "total_encontrado": len(registros),
+            "timestamp_consulta": datetime.now().isoformat(),
+        }
+
+    def _registrar(self, aluno_id, operacao, sucesso):
+        self.operacoes_processadas += 1
+        historico = self.historicos.setdefault(aluno_id, deque(maxlen=100))
+        historico.append({
+            "operacao": operacao[:8],
+            "sucesso": sucesso,
+            "timestamp": datetime.now().isoformat()[:16],
+        })
+
+
+def _texto(valor):
+    """Converte um valor de resultado para o texto usado nos protocolos string/protobuf."""
+    if isinstance(valor, list) and all(isinstance(v, float) for v in valor):
+        return ",".join(str(v) for v in valor)
+    return str(valor)
+
+
+def _ip(writer):
+    peer = writer.get_extra_info("peername")
+    return peer[0] if peer else "0.0.0.0"
+
+
+def _porta(writer):
+    return writer.get_extra_info("sockname")[1]
+
+
+# ---------------------------------------
+# Protocolo Strings (porta 8080)
+# ---------------------------------------
+def _resposta_string(campos, ok=True, escapar=False):
+    valor = protocolo_string.escapar if escapar else str
+    partes = ["OK" if ok else "ERRO"]
+    partes.extend(f"{k}={valor(_texto(v))}" for k, v in campos.items())
+    partes.append(f"timestamp={datetime.now().isoformat()}")
+    partes.append("FIM")
+    return ("|".join(partes) + "\n").encode("utf-8")
+
+
+def _campos_string(texto, escapado=False):
+    """Separa "CMD|chave=valor|...|FIM" em (comando, dict de campos), desescapando se escapado."""
+    comando, campos = protocolo_string.ler(texto.strip(), escapado)
+    return comando.upper(), campos
+
+
+def _processar_string(estado, texto, ip, porta, escapado=False):
+    comando, campos = _campos_string(texto, escapado)
+    if comando == "AUTH":
+        return estado.autenticar(campos.get("aluno_id"), ip)
+    if comando == "OP":
+        operacao = campos.pop("operacao", "")
+        token = campos.pop("token", "")
+        if "nums" in campos:
+            campos["numeros"] = campos.pop("nums")
+        resultado = estado.executar(token, operacao, campos)
+        return {"operacao": operacao, **resultado}
+    if comando == "INFO":
+        return estado.info("string", porta, "texto puro terminado em FIM")
+    if comando == "LOGOUT":
+        return estado.logout(campos.get("token", ""))
+    raise ErroServidor(f"Comando {comando!r} desconhecido")
+
+
+async def _atender_string(estado, reader, writer, escapar=False):
+    ip, porta = _ip(writer), _porta(writer)
+    try:
+        while True:
+            try:
+                bruto = await reader.readuntil(b"|FIM")
+            except asyncio.IncompleteReadError:
+                break
+            try:
+                campos = _processar_string(estado, bruto.decode("utf-8"), ip, porta, escapar)
+                writer.write(_resposta_string(campos, escapar=escapar))
+            except ErroServidor as e:
+                writer.write(_resposta_string({"msg": str(e)}, ok=False, escapar=escapar))
+            await writer.drain()
+    except (asyncio.LimitOverrunError, ConnectionError, UnicodeDecodeError):
+        pass
+    finally:
+        writer.close()
+
+
+# ---------------------------------------
+# Protocolo JSON (porta 8081)
+# ---------------------------------------
+def _resposta_json(campos, ok=True):
+    if ok:
+        resposta = {"sucesso": True, "status": "sucesso", **campos}
+    else:
+        resposta = {"sucesso": False, "status": "erro", **campos}
+    resposta["timestamp"] = datetime.now().isoformat()
+    return json.dumps(resposta).encode("utf-8") + b"\n"
+
+
+def _processar_json(estado, req, ip, porta):
+    if not isinstance(req, dict):
+        raise ErroServidor("Requisição JSON deve ser um objeto")
+    tipo = req.get("tipo")
+
+    if tipo == "autenticar":
+        dados = estado.autenticar(req.get("aluno_id"), ip)
+        return {"mensagem": "Autenticação realizada com sucesso", **dados}
+    if tipo == "operacao":
+        operacao = req.get("operacao", "")
+        resultado = estado.executar(req.get("token", ""), operacao, req.get("parametros") or {})
+        return {"operacao": operacao, "resultado": resultado}
+    if tipo == "info":
+        return {"resultado": estado.info("json", porta, "JSON + \\n")}
+    if tipo == "logout":
+        estado.logout(req.get("token", ""))
+        return {"mensagem": "Logout realizado com sucesso"}
+    raise ErroServidor(f"Tipo {tipo!r} desconhecido")
+
+
+async def _atender_json(estado, reader, writer):
+    ip, porta = _ip(writer), _porta(writer)
+    try:
+        while True:
+            linha = await reader.readline()
+            if not linha:
+                break
+            if not linha.strip():
+                continue
+            try:
+                campos = _processar_json(estado, json.loads(linha), ip, porta)
+                writer.write(_resposta_json(campos))
+            except (ErroServidor, ValueError) as e:
+                writer.write(_resposta_json({"mensagem": str(e)}, ok=False))
+            await writer.drain()
+    except (ValueError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+# ---------------------------------------
+# Protocolo Protobuf (porta 8082)
+# ---------------------------------------
+COMANDOS_PROTOBUF = {"auth": "AUTH", "operacao": "OP", "info": "INFO", "logout": "LOGOUT"}
+
+
+def _resposta_protobuf(comando, campos, ok=True):
+    resp = mensagens_pb2.Resposta()
+    if ok:
+        resp.ok.comando = comando
+        for k, v in campos.items():
+            resp.ok.dados[k] = _texto(v)
+        resp.ok.timestamp = datetime.now().isoformat()
+    else:
+        resp.erro.comando = comando
+        resp.erro.mensagem = campos["mensagem"]
+        resp.erro.timestamp = datetime.now().isoformat()
+    saida = resp.SerializeToString()
+    return struct.pack(">I", len(saida)) + saida
+
+
+def _processar_protobuf(estado, req, ip, porta):
+    tipo = req.WhichOneof("tipo")
+    if tipo == "auth":
+        return estado.autenticar(req.auth.aluno_id, ip)
+    if tipo == "operacao":
+        op = req.operacao
+        resultado = estado.executar(op.token, op.operacao, dict(op.parametros))
+        return {"operacao": op.operacao, **resultado}
+    if tipo == "info":
+        return estado.info("protobuf", porta, "[tamanho:4bytes][dados_protobuf:N bytes]")
+    if tipo == "logout":
+        return estado.logout(req.logout.token)
+    raise ErroServidor("Requisição sem comando")
+
+
+async def _atender_protobuf(estado, reader, writer):
+    ip, porta = _ip(writer), _porta(writer)
+    try:
+        while True:
+            try:
+                header = await reader.readexactly(4)
+            except asyncio.IncompleteReadError:
+                break
+            tamanho = struct.unpack(">I", header)[0]
+            if tamanho > LIMITE_MENSAGEM:
+                break
+            payload = await reader.readexactly(tamanho)
+
+            req = mensagens_pb2.Requisicao()
+            comando = "DESCONHECIDO"
+            try:
+                req.ParseFromString(payload)
+                comando = COMANDOS_PROTOBUF.get(req.WhichOneof("tipo"), comando)
+                dados = _processar_protobuf(estado, req, ip, porta)
+                writer.write(_resposta_protobuf(comando, dados))
+            except ErroServidor as e:
+                writer.write(_resposta_protobuf(comando, {"mensagem": str(e)}, ok=False))
+            except Exception:
+                writer.write(_resposta_protobuf(comando, {"mensagem": "Mensagem protobuf inválida"},
+                                                ok=False))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+# ---------------------------------------
+# Inicialização
+# ---------------------------------------
+async def _acompanhar(conexoes, atender, estado, reader, writer):
+    conexoes.add(writer)
+    try:
+        await atender(estado, reader, writer)
+    finally:
+        conexoes.discard(writer)
+
+
+async def iniciar_servidores(host=HOST, porta_string=PORTA_STRING, porta_json=PORTA_JSON,
+                             porta_protobuf=PORTA_PROTOBUF, estado=None, conexoes=None,
+                             escapar=False):
+    """Abre os três servidores e devolve a lista de asyncio.Server.
+
+    Se conexoes (set) for informado, os writers abertos são mantidos nele.
+    escapar: o servidor de strings escapa e desescapa os valores (protocolo_string).
+    """
+    estado = estado or EstadoServidor()
+    conexoes = conexoes if conexoes is not None else set()
+    servidores = []
+    for porta, atender in ((porta_string, functools.partial(_atender_string, escapar=escapar)),
+                           (porta_json, _atender_json),
+                           (porta_protobuf, _atender_protobuf)):
+        servidor = await asyncio.start_server(
+            lambda r, w, a=atender: _acompanhar(conexoes, a, estado, r, w),
+            host, porta, limit=LIMITE_MENSAGEM, backlog=BACKLOG)
+        servidores.append(servidor)
+    return servidores
+
+
+class ServidorLocal:
+    """Executa os servidores locais num event loop em thread separada.
+
+    Com portas 0 o sistema escolhe portas livres, expostas em self.portas
+    como {"string": ..., "json": ..., "protobuf": ...}. escapar: ver
+    iniciar_servidores().
+    """
+
+    def __init__(self, host=HOST, porta_string=0, porta_json=0, porta_protobuf=0,
+                 escapar=False):
+        self.host = host
+        self.escapar = escapar
+        self._portas_pedidas = (porta_string, porta_json, porta_protobuf)
+        self.portas = {}
+        self._conexoes = set()
+        self._loop = None
+        self._thread = None
+
+    def iniciar(self):
+        pronto = threading.Event()
+        erros = []
+
+        def executar():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                servidores = self._loop.run_until_complete(
+                    iniciar_servidores(self.host, *self._portas_pedidas,
+                                       conexoes=self._conexoes, escapar=self.escapar))
+            except Exception as e:
+                erros.append(e)
+                pronto.set()
+                return
+            for nome, servidor in zip(("string", "json", "protobuf"), servidores):
+                self.portas[nome] = servidor.sockets[0].getsockname()[1]
+            pronto.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                for servidor in servidores:
+                    servidor.close()
+                # fechar os transports encerra os handlers pelo caminho normal de EOF
+                for writer in list(self._conexoes):
+                    writer.close()
+                pendentes = asyncio.all_tasks(self._loop)
+                if pendentes:
+                    self._loop.run_until_complete(asyncio.wait(pendentes, timeout=1))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=executar, name="servidor-local", daemon=True)
+        self._thread.start()
+        pronto.wait()
+        if erros:
+            raise erros[0]
+        return self
+
+    def opcoes_cliente(self, protocolo):
+        """Argumentos extras de configurar_servidor() para o cliente de `protocolo`."""
+        return {"escapar": self.escapar} if protocolo == "string" else {}
+
+    def configurar_clientes(self, modulos):
+        """Aponta os clientes {protocolo: módulo trabalho_distribuidos_*} para este servidor."""
+        for protocolo, modulo in modulos.items():
+            modulo.configurar_servidor(self.host, self.portas[protocolo],
+                                       **self.opcoes_cliente(protocolo))
+
+    def parar(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+async def _main(args):
+    servidores = await iniciar_servidores(args.host, args.porta_string, args.porta_json,
+                                          args.porta_protobuf, escapar=args.escapar)
+    for nome, servidor in zip(("string", "json", "protobuf"), servidores):
+        print(f"Servidor {nome} ouvindo em {args.host}:{servidor.sockets[0].getsockname()[1]}")
+    await asyncio.gather(*(s.serve_forever() for s in servidores))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local dos protocolos string/JSON/protobuf.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--porta-string", type=int, default=PORTA_STRING)
+    parser.add_argument("--porta-json", type=int, default=PORTA_JSON)
+    parser.add_argument("--porta-protobuf", type=int, default=PORTA_PROTOBUF)
+    parser.add_argument("--escapar", action="store_true",
+                        help="escapa os valores do protocolo de strings (o servidor remoto não escapa)")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        print("Parando o servidor local!")
@@ -0,0 +1,205 @@
+import select
+import threading
+import time
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+VALIDADE_PADRAO = 3600      # timeout_segundos informado pelo servidor no AUTH
+MARGEM_EXPIRACAO = 30       # renova o token um pouco antes do servidor expirá-lo
+MAXIMO_OCIOSAS = 4
+
+
+# ---------------------------------------
+# Sessão autenticada
+# ---------------------------------------
+class Sessao:
+    """Conexão TCP já autenticada, mantida aberta entre operações.
+
+    persistente: o token está no cache em disco (cache_tokens) e deve continuar
+    válido depois do programa, então o pool não faz logout dele; esquecer() o
+    tira do cache quando o servidor o recusa. do_cache: a sessão foi aberta com
+    o token do cache, sem AUTH.
+    """
+
+    def __init__(self, sock, token, validade_segundos=VALIDADE_PADRAO):
+        self.sock = sock
+        self.token = token
+        self.expira_em = time.monotonic() + max(validade_segundos - MARGEM_EXPIRACAO, 0)
+        self.reutilizada = False
+        self.persistente = False
+        self.do_cache = False
+        self.ao_esquecer = None
+
+    def expirada(self):
+        return time.monotonic() >= self.expira_em
+
+    def esquecer(self):
+        if self.ao_esquecer is not None:
+            self.ao_esquecer()
+
+    def viva(self):
+        """Conexão ociosa ainda utilizável: nada para ler (nem EOF do servidor) no socket."""
+        try:
+            legiveis, _, _ = select.select([self.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not legiveis
+
+    def fechar(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+# ---------------------------------------
+# Pool de sessões por protocolo
+# ---------------------------------------
+class PoolSessoes:
+    """Reaproveita sessões autenticadas enquanto o token for válido.
+
+    abrir() -> Sessao conecta e autentica; encerrar(sessao) faz o logout.
+    Se o socket cair ou o servidor recusar o token de uma sessão reaproveitada
+    (inclusive uma aberta com token do cache em disco), a operação é repetida
+    uma vez em uma sessão nova.
+
+    aquecer() abre sessões antes de alguém precisar delas (ver aquecimento.py);
+    quem chega em adquirir() durante um aquecimento espera por essa sessão em
+    vez de abrir outra conexão. Sessões ociosas que o servidor fechou são
+    descartadas antes de serem entregues.
+    """
+
+    def __init__(self, abrir, encerrar, erros_rede, token_rejeitado=None,
+                 maximo_ociosas=MAXIMO_OCIOSAS):
+        self._abrir = abrir
+        self._encerrar = encerrar
+        self._erros_rede = erros_rede
+        self._token_rejeitado = token_rejeitado
+        self._maximo_ociosas = maximo_ociosas
+        self._ociosas = []
+        self._lock = threading.Lock()
+        self._aquecida = threading.Condition(self._lock)
+        self._aquecendo = 0
+
+    def adquirir(self):
+        expiradas = []
+        sessao = None
+        with self._lock:
+            while True:
+                while self._ociosas:
+                    candidata = self._ociosas.pop()
+                    if candidata.expirada() or not candidata.viva():
+                        expiradas.append(candidata)
+                    else:
+                        sessao = candidata
+                        break
+                if sessao is not None or not self._aquecendo:
+                    break
+                self._aquecida.wait()
+        for antiga in expiradas:
+            antiga.fechar()
+        if sessao is not None:
+            sessao.reutilizada = True
+            return sessao
+        return self._abrir()
+
+    def aquecer(self, quantidade=1):
+        """Abre sessões até haver `quantidade` ociosas; devolve quantas abriu.
+
+        Antes, descarta as ociosas expiradas ou fechadas pelo servidor. Erros de
+        abrir() são propagados.
+        """
+        self.verificar_ociosas()
+        with self._lock:
+            faltam = min(quantidade, self._maximo_ociosas) - len(self._ociosas) - self._aquecendo
+            if faltam <= 0:
+                return 0
+            self._aquecendo += faltam
+        abertas = 0
+        try:
+            for _ in range(faltam):
+                sessao = self._abrir()
+                with self._lock:
+                    self._ociosas.append(sessao)
+                    self._aquecendo -= 1
+                    self._aquecida.notify_all()
+                abertas += 1
+        finally:
+            with self._lock:
+                self._aquecendo -= faltam - abertas
+                self._aquecida.notify_all()
+        return abertas
+
+    def verificar_ociosas(self):
+        """Fecha as sessões ociosas expiradas ou que o servidor já fechou; devolve quantas."""
+        with self._lock:
+            vivas, mortas = [], []
+            for sessao in self._ociosas:
+                (mortas if sessao.expirada() or not sessao.viva() else vivas).append(sessao)
+            self._ociosas = vivas
+        for sessao in mortas:
+            sessao.fechar()
+        return len(mortas)
+
+    def devolver(self, sessao):
+        with self._lock:
+            if len(self._ociosas) < self._maximo_ociosas:
+                self._ociosas.append(sessao)
+                return
+        self._finalizar(sessao)
+
+    def descartar(self, sessao):
+        sessao.fechar()
+
+    def executar(self, operacao):
+        """Executa operacao(sessao) e devolve seu resultado.
+
+        Repete no máximo uma vez, sempre numa sessão recém-aberta (não em outra
+        ociosa, que pode estar no mesmo estado da que falhou).
+        """
+        sessao = self.adquirir()
+        pode_repetir = True
+        while True:
+            try:
+                resultado = operacao(sessao)
+            except self._erros_rede:
+                self.descartar(sessao)
+                if not (pode_repetir and sessao.reutilizada):
+                    raise
+                if sessao.do_cache:
+                    # a próxima sessão faz um AUTH de verdade em vez de reusar o token
+                    sessao.esquecer()
+                pode_repetir = False
+                sessao = self._abrir()
+                continue
+            except BaseException:
+                self.descartar(sessao)
+                raise
+
+            if (pode_repetir and sessao.reutilizada and self._token_rejeitado is not None
+                    and self._token_rejeitado(resultado)):
+                sessao.esquecer()
+                self.descartar(sessao)
+                pode_repetir = False
+                sessao = self._abrir()
+                continue
+
+            self.devolver(sessao)
+            return resultado
+
+    def fechar(self):
+        """Faz logout e fecha todas as sessões ociosas."""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for sessao in ociosas:
+            self._finalizar(sessao)
+
+    def _finalizar(self, sessao):
+        try:
+            if not sessao.expirada() and not sessao.persistente:
+                self._encerrar(sessao)
+        except Exception:
+            pass
+        finally:
+            sessao.fechar()
@@ -0,0 +1,199 @@
+"""Estatísticas (soma) sobre arquivos de números grandes demais para o input().
+
+O arquivo é mapeado em memória (mmap) e lido em blocos; os valores vão para
+arrays('d') compactos de no máximo `por_requisicao` números, e cada array vira
+uma requisição soma enviada em pipeline pela sessão do pool do protocolo.
+As parciais (quantidade/soma/mínimo/máximo) de cada resposta são combinadas
+localmente. Só alguns blocos existem ao mesmo tempo, então a memória não
+cresce com o tamanho do arquivo.
+
+Uso:
+    python soma_arquivo.py numeros.txt --protocolo json --por-requisicao 10000
+"""
+import argparse
+import math
+import mmap
+import os
+from array import array
+
+import resultados
+import trabalho_distribuidos_json
+import trabalho_distribuidos_protobuff
+import trabalho_distribuidos_string
+
+# ---------------------------------------
+# Configurações gerais
+# ---------------------------------------
+POR_REQUISICAO = 10_000          # números por requisição soma
+TAMANHO_LEITURA = 1024 * 1024    # bytes lidos do mmap por vez
+JANELA = 4                       # requisições soma em voo (cada resposta ecoa os números)
+
+PROTOCOLOS = {
+    "string": trabalho_distribuidos_string,
+    "json": trabalho_distribuidos_json,
+    "protobuf": trabalho_distribuidos_protobuff,
+}
+
+# vírgula, ponto e vírgula e espaços em branco separam os números
+_SEPARADORES = bytes.maketrans(b",;\t\r\n\v\f", b"       ")
+
+
+# ---------------------------------------
+# Leitura do arquivo
+# ---------------------------------------
+def _valores(mm, tamanho_leitura):
+    """Gera um array('d') por bloco do mmap, sem cortar números na divisa."""
+    inicio, fim = 0, len(mm)
+    while inicio < fim:
+        bloco = mm[inicio:inicio + tamanho_leitura].translate(_SEPARADORES)
+        if inicio + len(bloco) < fim:
+            corte = bloco.rfind(b" ")
+            if corte < 0:
+                raise ValueError(f"Valor com mais de {tamanho_leitura} bytes na posição {inicio}.")
+            bloco = bloco[:corte + 1]
+        inicio += len(bloco)
+        try:
+            yield array("d", map(float, bloco.split()))
+        except ValueError as e:
+            raise ValueError(f"Número inválido no arquivo perto da posição {inicio}: {e}")
+
+
+def blocos_de_numeros(caminho, por_requisicao=POR_REQUISICAO, tamanho_leitura=TAMANHO_LEITURA):
+    """Gera arrays('d') com até `por_requisicao` números lidos de `caminho`."""
+    if por_requisicao < 1:
+        raise ValueError("por_requisicao deve ser >= 1")
+    with open(caminho, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            atual = array("d")
+            for valores in _valores(mm, tamanho_leitura):
+                i = 0
+                while i < len(valores):
+                    falta = por_requisicao - len(atual)
+                    atual.extend(valores[i:i + falta])
+                    i += falta
+                    if len(atual) == por_requisicao:
+                        yield atual
+                        atual = array("d")
+            if atual:
+                yield atual
+
+
+# ---------------------------------------
+# Combinação das parciais
+# ---------------------------------------
+class Estatisticas:
+    """Acumula quantidade, soma, mínimo e máximo de várias respostas soma."""
+
+    __slots__ = ("quantidade", "soma", "minimo", "maximo", "requisicoes")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.requisicoes = 0
+
+    def combinar(self, quantidade, soma, minimo, maximo):
+        self.quantidade += quantidade
+        self.soma += soma
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+        self.requisicoes += 1
+
+    @property
+    def media(self):
+        return self.soma / self.quantidade if self.quantidade else 0.0
+
+    def para_dict(self):
+        vazio = not self.quantidade
+        return {
+            "quantidade": self.quantidade,
+            "soma": self.soma,
+            "media": self.media,
+            "minimo": None if vazio else self.minimo,
+            "maximo": None if vazio else self.maximo,
+            "requisicoes": self.requisicoes,
+        }
+
+
+def _campos_string(resp):
+    if not resp.startswith("OK|"):
+        raise trabalho_distribuidos_string.ErroProtocolo(f"Soma recusada (strings): {resp}")
+    return resp.campos
+
+
+def _campos_json(resp):
+    if not trabalho_distribuidos_json._resposta_ok(resp):
+        raise trabalho_distribuidos_json.ErroProtocolo(f"Soma recusada (json): {resp}")
+    return resp.get("resultado", resp)
+
+
+def _campos_protobuf(resp):
+    if not resp.HasField("ok"):
+        raise trabalho_distribuidos_protobuff.ErroProtocolo(
+            f"Soma recusada (protobuf): {resp.erro.mensagem}")
+    # só os quatro campos usados são convertidos; numeros_originais fica como veio
+    soma = resultados.ResultadoSoma(resp.ok.dados)
+    return {"quantidade": soma.quantidade, "soma": soma.soma, "minimo": soma.minimo,
+            "maximo": soma.maximo}
+
+
+_EXTRATORES = {"string": _campos_string, "json": _campos_json, "protobuf": _campos_protobuf}
+
+
+def _parcial(campos, modulo):
+    try:
+        return (int(campos["quantidade"]), float(campos["soma"]),
+                float(campos["minimo"]), float(campos["maximo"]))
+    except (KeyError, TypeError, ValueError) as e:
+        raise modulo.ErroProtocolo(f"Resposta soma sem quantidade/soma/minimo/maximo: {e!r}")
+
+
+# ---------------------------------------
+# Interface
+# ---------------------------------------
+def soma_arquivo(caminho, protocolo="json", por_requisicao=POR_REQUISICAO, janela=JANELA):
+    """Calcula quantidade/soma/média/mínimo/máximo dos números de `caminho` via servidor.
+
+    Usa a sessão do pool do protocolo; se ela cair e for refeita, o arquivo é
+    reprocessado desde o início. Devolve um objeto Estatisticas.
+    """
+    modulo = PROTOCOLOS[protocolo]
+    extrair = _EXTRATORES[protocolo]
+
+    def calcular(sessao):
+        estatisticas = Estatisticas()
+        operacoes = (("soma", bloco) for bloco in blocos_de_numeros(caminho, por_requisicao))
+        for resp in modulo.iterar_pipeline(sessao.sock, sessao.token, operacoes, janela):
+            estatisticas.combinar(*_parcial(extrair(resp), modulo))
+        return estatisticas
+
+    return modulo.executar_na_sessao(calcular)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soma em streaming dos números de um arquivo.")
+    parser.add_argument("arquivo")
+    parser.add_argument("--protocolo", choices=PROTOCOLOS, default="json")
+    parser.add_argument("--por-requisicao", type=int, default=POR_REQUISICAO,
+                        help="números enviados em cada requisição soma")
+    parser.add_argument("--janela", type=int, default=JANELA)
+    parser.add_argument("--host", help="servidor alternativo (ex.: servidor_local.py)")
+    parser.add_argument("--porta", type=int)
+    args = parser.parse_args(argv)
+
+    modulo = PROTOCOLOS[args.protocolo]
+    if args.host or args.porta:
+        padrao = (modulo.SERVER_IP, modulo.SERVER_PORT) if hasattr(modulo, "SERVER_IP") \
+            else (modulo.server_ip, modulo.server_port)
+        modulo.configurar_servidor(args.host or padrao[0], args.porta or padrao[1])
+
+    estatisticas = soma_arquivo(args.arquivo, args.protocolo, args.por_requisicao, args.janela)
+    for chave, valor in estatisticas.para_dict().items():
+        print(f"{chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
-import socket
+import atexit
+import contextlib
+import os
 import json
-import time
 from datetime import datetime
 
+import pipeline
+import registro_log
+import saida
+from codificadores import ALUNO_ID, CodecJSON
+from sessoes import PoolSessoes
+from transporte import Transporte
+
 server_ip = '3.88.99.255'
 server_port = 8081
 LOG_FILE = 'respostas_trab_distribuidos_json.txt'
 TIMEOUT = 4
+TAMANHO_MAXIMO_RESPOSTA = 16 * 1024 * 1024
 
 # ================================
 # EXCEÇÕES PERSONALIZADAS
@@ -21,11 +30,21 @@ class ErroProtocolo(Exception):
 # UTILITÁRIOS
 # --------------------------
 def registrar_respostas(resposta_str):
+    """Enfileira a resposta para o log; a gravação acontece em segundo plano."""
+    registro_log.registrar(LOG_FILE, resposta_str)
+
+@contextlib.contextmanager
+def logs_desviados(destino=os.devnull):
+    """Grava as respostas em `destino` (padrão: descarta) dentro do with."""
+    global LOG_FILE
+    anterior, LOG_FILE = LOG_FILE, destino
     try:
-        with open(LOG_FILE, 'a', encoding='utf-8') as documento:
-            documento.write(resposta_str + "\n")
-    except Exception as e:
-        print(f"Falha ao registrar no arquivo: {e}")
+        yield
+    finally:
+        LOG_FILE = anterior
+
+def registrar_resposta(rotulo, resp, bruto=None):
+    registrar_respostas(f"{rotulo}=" + json.dumps(resp))
 
 def format_json_response(resposta, elapsed=None):
     """Recebe o dict de resposta e retorna string formatada legível (com tempo se fornecido)."""
@@ -62,170 +81,162 @@ def format_json_response(resposta, elapsed=None):
 # --------------------------
 # COMUNICAÇÃO (enviar/receber)
 # --------------------------
-def enviar_mensagem(sock, mensagem_obj):
-    try:
-
-        t_inicio = time.time()
-        texto = json.dumps(mensagem_obj) + '\n'
-        t_fim = time.time()
-        tempo_serializacao_ms = (t_fim - t_inicio) * 1000
-
-        print(f'Tamanho da mensagem JSON: {len(texto)} bytes')
-        print(f"Tempo de serialização JSON: {tempo_serializacao_ms:.2f} ms")
+_codec = CodecJSON()
+_transporte = Transporte(_codec, ErroRede, ErroProtocolo)
 
-        sock.sendall(texto.encode('utf-8'))
-        
-    except Exception as e:
-        raise ErroRede(f"Erro ao enviar (json): {e}")
+def enviar_mensagem(sock, mensagem_obj):
+    _transporte.enviar(sock, mensagem_obj)
 
 def receber_resposta(sock):
-    try:
-        sock.settimeout(TIMEOUT)
-        data = sock.recv(4096).decode('utf-8')
-        if not data:
-            raise ErroRede("Nenhum dado recebido (socket fechado).")
-    except socket.timeout:
-        raise ErroRede("Timeout ao receber resposta do servidor.")
-    except Exception as e:
-        raise ErroRede(f"Erro ao receber dados: {e}")
+    return _transporte.receber(sock, TIMEOUT, TAMANHO_MAXIMO_RESPOSTA)[0]
 
-    try:
-        resposta = json.loads(data)
-    except Exception:
-        raise ErroProtocolo(f"JSON inválido recebido: {data!r}")
+def _resposta_ok(resp):
+    return _codec.sucesso(resp)
 
-    if not isinstance(resposta, dict):
-        raise ErroProtocolo("Resposta JSON malformada (esperado objeto).")
-
-    return resposta
+def _requisitar(sock, msg, rotulo, titulo):
+    """Envia msg, recebe a resposta, registra no log e mostra conforme o modo de saída; devolve o dict da resposta."""
+    resp, _ = _transporte.requisitar(sock, msg, rotulo, TIMEOUT, TAMANHO_MAXIMO_RESPOSTA,
+                                     registrar_resposta, format_json_response, titulo)
+    return resp
 
 # --------------------------
 # OPERACOES (mantendo estrutura original)
 # --------------------------
+def _autenticar(sock, timestamp):
+    """Autentica e devolve (token, validade em segundos)."""
+    msg = _codec.montar_auth(ALUNO_ID, timestamp)
+    resp = _requisitar(sock, msg, "autenticacao", "=== AUTENTICACAO ===")
+    return _transporte.extrair_autenticacao(resp)
+
 def autenticar(sock, timestamp):
-    msg = {'tipo':'autenticar','aluno_id':'554229','timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    formatted = format_json_response(resp, elapsed)
-    registrar_respostas("autenticacao=" + json.dumps(resp))
-    print("=== AUTENTICACAO ===")
-    print(formatted)
-    return resp.get('token')
+    return _autenticar(sock, timestamp)[0]
+
+def montar_requisicao(token, operacao, param=None, timestamp=None):
+    """Monta o dict de uma operação: soma, echo, timestamp, status, historico, info ou logout."""
+    return _codec.montar(token, operacao, param, timestamp)
 
 def soma(sock, token, timestamp, numeros):
-    msg = {'tipo':'operacao','token':token,'operacao':'soma','parametros':{'numeros': numeros},'timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("soma=" + json.dumps(resp))
-    print("=== SOMA ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'soma', numeros, timestamp)
+    return _requisitar(sock, msg, "soma", "=== SOMA ===")
 
 def echo(sock, token, timestamp, texto):
-    msg = {'tipo':'operacao','token':token,'operacao':'echo','parametros':{'mensagem': texto},'timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("echo=" + json.dumps(resp))
-    print("=== ECHO ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'echo', texto, timestamp)
+    return _requisitar(sock, msg, "echo", "=== ECHO ===")
 
 def op_timestamp(sock, token, timestamp):
-    msg = {'tipo':'operacao','token':token,'operacao':'timestamp','timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("timestamp=" + json.dumps(resp))
-    print("=== TIMESTAMP ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'timestamp', timestamp=timestamp)
+    return _requisitar(sock, msg, "timestamp", "=== TIMESTAMP ===")
 
 def status(sock, token, timestamp):
-    msg = {'tipo':'operacao','token':token,'operacao':'status','timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("status=" + json.dumps(resp))
-    print("=== STATUS ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'status', timestamp=timestamp)
+    return _requisitar(sock, msg, "status", "=== STATUS ===")
 
 def historico(sock, token, timestamp):
-    msg = {'tipo':'operacao','token':token,'operacao':'historico','timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("historico=" + json.dumps(resp))
-    print("=== HISTORICO ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'historico', timestamp=timestamp)
+    return _requisitar(sock, msg, "historico", "=== HISTORICO ===")
 
 def info(sock, token, timestamp):
-    msg = {'tipo':'info','token':token,'timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("info=" + json.dumps(resp))
-    print("=== INFO ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'info', timestamp=timestamp)
+    return _requisitar(sock, msg, "info", "=== INFO ===")
 
 def logout(sock, token, timestamp):
-    msg = {'tipo':'logout','token':token,'timestamp': timestamp}
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("logout=" + json.dumps(resp))
-    print("=== LOGOUT ===")
-    print(format_json_response(resp, elapsed))
+    msg = _codec.preparar(token, 'logout', timestamp=timestamp)
+    return _requisitar(sock, msg, "logout", "=== LOGOUT ===")
+
+# --------------------------
+# PIPELINE
+# --------------------------
+def iterar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Envia várias operações sem esperar cada resposta e gera os dicts de resposta na ordem.
+
+    operacoes: iterável de (operacao, parametro), ex. [('echo', 'oi'), ('soma', [1, 2])].
+    É consumido sob demanda, então lotes grandes não ficam inteiros na memória.
+    Não imprime nada, apenas registra no log.
+    """
+    return _transporte.iterar_pipeline(sock, token, operacoes, janela, TIMEOUT,
+                                       TAMANHO_MAXIMO_RESPOSTA, registrar_resposta)
+
+def executar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Como iterar_pipeline, mas devolve a lista de dicts de resposta."""
+    return list(iterar_pipeline(sock, token, operacoes, janela))
+
+# --------------------------
+# SESSOES REUTILIZADAS
+# --------------------------
+def _abrir_sessao():
+    return _transporte.abrir_sessao((server_ip, server_port), TIMEOUT,
+                                    lambda sock: _autenticar(sock, datetime.now().isoformat()),
+                                    ALUNO_ID)
+
+def _encerrar_sessao(sessao):
+    logout(sessao.sock, sessao.token, datetime.now().isoformat())
+
+_pool = PoolSessoes(_abrir_sessao, _encerrar_sessao, ErroRede, _codec.token_rejeitado)
+
+def encerrar_sessoes():
+    """Faz logout das sessões mantidas abertas pelo pool."""
+    _pool.fechar()
+
+def aquecer_sessoes(quantidade=1):
+    """Conecta e autentica antes da primeira operação (sem imprimir nada); ver aquecimento.py."""
+    with saida.usar_modo("silencioso"):
+        return _pool.aquecer(quantidade)
+
+def configurar_servidor(host, porta):
+    """Aponta o cliente para outro servidor (ex.: servidor_local.py)."""
+    global server_ip, server_port
+    _pool.fechar()
+    server_ip, server_port = host, porta
+
+atexit.register(encerrar_sessoes)
 
 # --------------------------
 # FUNCAO INTERFACE PARA O MENU
 # --------------------------
-def servidor_json(op_code, param=None):
-    """op_code: 1=estatisticas(soma),2=echo,3=timestamp,4=status,5=historico,6=info"""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+def executar_operacao(sock, token, op_code, param=None):
+    """Executa uma operação do menu numa sessão já autenticada e devolve a resposta."""
+    timestamp = datetime.now().isoformat()
+
+    if op_code == 1:
+        nums = param
+        if isinstance(nums, str):
+            nums = [float(x.strip()) for x in nums.split(",") if x.strip()]
+        return soma(sock, token, timestamp, nums)
+    elif op_code == 2:
+        msg = param if param is not None else "Hello"
+        return echo(sock, token, timestamp, msg)
+    elif op_code == 3:
+        return op_timestamp(sock, token, timestamp)
+    elif op_code == 4:
+        return status(sock, token, timestamp)
+    elif op_code == 5:
+        return historico(sock, token, timestamp)
+    elif op_code == 6:
+        return info(sock, token, timestamp)
+    else:
+        print("Operação desconhecida.")
+
+def executar_na_sessao(operacao):
+    """Executa operacao(sessao) numa sessão do pool e devolve o resultado.
+
+    Se a sessão reaproveitada tiver caído, repete uma vez numa nova; erros de
+    rede e de protocolo são propagados.
+    """
+    return _pool.executar(operacao)
+
+def executar_operacao_pool(op_code, param=None):
+    """executar_operacao numa sessão do pool, sem tratar erros (ver servidor_json)."""
+    return executar_na_sessao(
+        lambda sessao: executar_operacao(sessao.sock, sessao.token, op_code, param))
+
+def servidor_json(op_code, param=None, modo_saida=None):
+    """op_code: 1=estatisticas(soma),2=echo,3=timestamp,4=status,5=historico,6=info
+
+    modo_saida: um de saida.MODOS só para esta chamada (None mantém o modo atual)."""
     try:
-        sock.connect((server_ip, server_port))
-        timestamp = datetime.now().isoformat()
-
-        token = autenticar(sock, timestamp)
-        if not token:
-            print("Autenticação falhou.")
-            return
-
-        if op_code == 1:
-      
-            nums = param
-            if isinstance(nums, str):
-                nums = [float(x.strip()) for x in nums.split(",") if x.strip()]
-            soma(sock, token, timestamp, nums)
-        elif op_code == 2:
-            msg = param if param is not None else "Hello"
-            echo(sock, token, timestamp, msg)
-        elif op_code == 3:
-            op_timestamp(sock, token, timestamp)
-        elif op_code == 4:
-            status(sock, token, timestamp)
-        elif op_code == 5:
-            historico(sock, token, timestamp)
-        elif op_code == 6:
-            info(sock, token, timestamp)
-        else:
-            print("Operação desconhecida.")
-
-        logout(sock, token, timestamp)
+        with saida.usar_modo(modo_saida):
+            return executar_operacao_pool(op_code, param)
     except (ErroRede, ErroProtocolo) as e:
         print("Erro crítico:", e)
     except Exception as e:
         print("Erro desconhecido:", e)
-    finally:
-        try:
-            sock.close()
-        except:
-            pass
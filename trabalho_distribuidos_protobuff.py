@@ -1,8 +1,16 @@
-import socket
-import struct
+import atexit
+import contextlib
+import os
 import time
 from datetime import datetime
-import mensagens_pb2
+import log_binario
+import pipeline
+import registro_log
+import saida
+import resultados
+from codificadores import ALUNO_ID, CodecProtobuf
+from sessoes import PoolSessoes
+from transporte import Transporte
 
 # ---------------------------------------
 # Configurações gerais
@@ -10,7 +18,10 @@ import mensagens_pb2
 SERVER_IP = "3.88.99.255"
 SERVER_PORT = 8082
 LOG_FILE = "respostas_trab_distribuidos_protobuf.txt"
+LOG_FILE_BINARIO = "respostas_trab_distribuidos_protobuf.bin"
+LOG_FORMATO = "texto"     # "texto" (str(resp) em LOG_FILE) ou "binario" (log_binario em LOG_FILE_BINARIO)
 TIMEOUT = 5
+TAMANHO_MAXIMO_FRAME = 16 * 1024 * 1024
 
 
 # ---------------------------------------
@@ -28,12 +39,29 @@ class ErroProtocolo(Exception):
 # Utilidades
 # ---------------------------------------
 def registrar_respostas(texto):
-    """Salva resposta crua no arquivo de log."""
+    """Enfileira a resposta para o log; a gravação acontece em segundo plano."""
+    registro_log.registrar(LOG_FILE, texto)
+
+
+@contextlib.contextmanager
+def logs_desviados(destino=os.devnull):
+    """Grava as respostas em `destino` (padrão: descarta) dentro do with, nos dois formatos."""
+    global LOG_FILE, LOG_FILE_BINARIO
+    anteriores = LOG_FILE, LOG_FILE_BINARIO
+    LOG_FILE = LOG_FILE_BINARIO = destino
     try:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(texto + "\n")
-    except Exception as e:
-        print("Erro ao registrar log (protobuf):", e)
+        yield
+    finally:
+        LOG_FILE, LOG_FILE_BINARIO = anteriores
+
+
+def registrar_resposta(rotulo, resp, payload):
+    """Registra uma Resposta no formato de LOG_FORMATO; payload são os bytes recebidos."""
+    if LOG_FORMATO == "binario":
+        registro = log_binario.codificar(rotulo, time.time_ns(), resp.HasField("ok"), payload)
+        registro_log.registrar(LOG_FILE_BINARIO, registro)
+    else:
+        registrar_respostas(f"{rotulo}=" + str(resp))
 
 
 def format_protobuf_response(resp, elapsed=None):
@@ -82,53 +110,29 @@ def format_protobuf_response(resp, elapsed=None):
 # ---------------------------------------
 # Comunicação via Protobuf
 # ---------------------------------------
-def enviar(sock, msg):
-    """Envia mensagem protobuf com framing de 4 bytes."""
-    try:
+_codec = CodecProtobuf()
+_transporte = Transporte(_codec, ErroRede, ErroProtocolo)
 
-        t_inicio = time.time()
-        payload = msg.SerializeToString()
-        header = struct.pack(">I", len(payload))
-        t_fim = time.time()
-        tempo_serializacao_ms = (t_fim - t_inicio) * 1000
 
-        print(f'Tamanho da mensagem PROTOBUF: {len(payload)} bytes')
-        print(f"Tempo de serialização PROTOBUF: {tempo_serializacao_ms:.2f} ms")
-
-        sock.sendall(header + payload)
-    except Exception as e:
-        raise ErroRede(f"Erro ao enviar (protobuf): {e}")
+def enviar(sock, msg):
+    """Envia mensagem protobuf com framing de 4 bytes."""
+    _transporte.enviar(sock, msg)
 
 
 def receber(sock):
     """Recebe resposta protobuf usando framing de 4 bytes."""
-    try:
-        sock.settimeout(TIMEOUT)
-
-        header = sock.recv(4)
-        if len(header) < 4:
-            raise ErroRede("Header incompleto ao receber (protobuf).")
+    return _receber_com_payload(sock)[0]
 
-        tamanho = struct.unpack(">I", header)[0]
-        buffer = b""
 
-        while len(buffer) < tamanho:
-            parte = sock.recv(tamanho - len(buffer))
-            if not parte:
-                raise ErroRede("Conexão fechada antes de completar payload.")
-            buffer += parte
+def _receber_com_payload(sock):
+    """Como receber, mas devolve (Resposta, payload); o payload só vale até a próxima leitura."""
+    return _transporte.receber(sock, TIMEOUT, TAMANHO_MAXIMO_FRAME)
 
-    except socket.timeout:
-        raise ErroRede("Timeout ao receber resposta (protobuf).")
-    except Exception as e:
-        raise ErroRede(f"Erro ao receber (protobuf): {e}")
-
-    resp = mensagens_pb2.Resposta()
-    try:
-        resp.ParseFromString(buffer)
-    except Exception:
-        raise ErroProtocolo("Falha ao decodificar protobuf (payload inválido).")
 
+def _requisitar(sock, req, rotulo, titulo):
+    """Envia req, recebe a Resposta, registra no log e mostra conforme o modo de saída; devolve a Resposta."""
+    resp, _ = _transporte.requisitar(sock, req, rotulo, TIMEOUT, TAMANHO_MAXIMO_FRAME,
+                                     registrar_resposta, format_protobuf_response, titulo)
     return resp
 
 
@@ -136,184 +140,170 @@ def receber(sock):
 # Comandos do Protocolo
 # ---------------------------------------
 
-def autenticar(sock, timestamp):
-    req = mensagens_pb2.Requisicao()
-    req.auth.aluno_id = "554229"
-    req.auth.timestamp_cliente = timestamp
+def _autenticar(sock, timestamp):
+    """Autentica e devolve (token, validade em segundos)."""
+    req = _codec.montar_auth(ALUNO_ID, timestamp)
+    resp = _requisitar(sock, req, "autenticacao", "\n=== AUTENTICAÇÃO (PROTOBUF) ===")
+    return _transporte.extrair_autenticacao(resp)
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
 
-    registrar_respostas("autenticacao=" + str(resp))
+def autenticar(sock, timestamp):
+    return _autenticar(sock, timestamp)[0]
 
-    print("\n=== AUTENTICAÇÃO (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
 
-    if not resp.HasField("ok"):
-        raise ErroProtocolo("Resposta AUTH não possui campo OK.")
+def montar_requisicao(token, operacao, param=None):
+    """Monta a Requisicao de uma operação: soma, echo, timestamp, status, historico, info ou logout."""
+    return _codec.montar(token, operacao, param)
 
-    dados = resp.ok.dados
-    if "token" not in dados:
-        raise ErroProtocolo("Token não encontrado na resposta de autenticação.")
 
-    return dados["token"]
+def soma(sock, token, numeros):
+    req = _codec.preparar(token, "soma", numeros)
+    return _requisitar(sock, req, "soma", "\n=== SOMA (PROTOBUF) ===")
 
 
-def soma(sock, token, numeros):
-    req = mensagens_pb2.Requisicao()
-    req.operacao.token = token
-    req.operacao.operacao = "soma"
-    req.operacao.parametros["numeros"] = ",".join(str(n) for n in numeros)
+def echo(sock, token, texto):
+    req = _codec.preparar(token, "echo", texto)
+    return _requisitar(sock, req, "echo", "\n=== ECHO (PROTOBUF) ===")
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
 
-    registrar_respostas("soma=" + str(resp))
+def op_timestamp(sock, token):
+    req = _codec.preparar(token, "timestamp")
+    return _requisitar(sock, req, "timestamp", "\n=== TIMESTAMP (PROTOBUF) ===")
 
-    print("\n=== SOMA (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
 
+def status(sock, token):
+    req = _codec.preparar(token, "status")
+    return _requisitar(sock, req, "status", "\n=== STATUS (PROTOBUF) ===")
 
-def echo(sock, token, texto):
-    req = mensagens_pb2.Requisicao()
-    req.operacao.token = token
-    req.operacao.operacao = "echo"
-    req.operacao.parametros["mensagem"] = texto
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
+def historico(sock, token):
+    req = _codec.preparar(token, "historico")
+    return _requisitar(sock, req, "historico", "\n=== HISTÓRICO (PROTOBUF) ===")
 
-    registrar_respostas("echo=" + str(resp))
 
-    print("\n=== ECHO (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
+def info(sock):
+    req = _codec.preparar(None, "info")
+    return _requisitar(sock, req, "info", "\n=== INFO (PROTOBUF) ===")
 
 
-def op_timestamp(sock, token):
-    req = mensagens_pb2.Requisicao()
-    req.operacao.token = token
-    req.operacao.operacao = "timestamp"
+def logout(sock, token):
+    req = _codec.preparar(token, "logout")
+    return _requisitar(sock, req, "logout", "\n=== LOGOUT (PROTOBUF) ===")
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
 
-    registrar_respostas("timestamp=" + str(resp))
+def resultado(resp, operacao=None):
+    """Dados da Resposta já tipados (ResultadoSoma, StatusServidor, HistoricoAluno, ...); ver resultados.py."""
+    return resultados.decodificar(resp, operacao)
 
-    print("\n=== TIMESTAMP (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
 
+# ---------------------------------------
+# Pipeline
+# ---------------------------------------
 
-def status(sock, token):
-    req = mensagens_pb2.Requisicao()
-    req.operacao.token = token
-    req.operacao.operacao = "status"
+def iterar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Envia várias operações sem esperar cada resposta e gera as Respostas na ordem.
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
+    operacoes: iterável de (operacao, parametro), ex. [("echo", "oi"), ("soma", [1, 2])].
+    É consumido sob demanda, então lotes grandes não ficam inteiros na memória.
+    Não imprime nada, apenas registra no log.
+    """
+    return _transporte.iterar_pipeline(sock, token, operacoes, janela, TIMEOUT,
+                                       TAMANHO_MAXIMO_FRAME, registrar_resposta)
 
-    registrar_respostas("status=" + str(resp))
 
-    print("\n=== STATUS (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
+def executar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Como iterar_pipeline, mas devolve a lista de Respostas."""
+    return list(iterar_pipeline(sock, token, operacoes, janela))
 
 
-def historico(sock, token):
-    req = mensagens_pb2.Requisicao()
-    req.operacao.token = token
-    req.operacao.operacao = "historico"
+# ---------------------------------------
+# Sessões reutilizadas
+# ---------------------------------------
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
+def _abrir_sessao():
+    return _transporte.abrir_sessao((SERVER_IP, SERVER_PORT), TIMEOUT,
+                                    lambda sock: _autenticar(sock, datetime.now().isoformat()),
+                                    ALUNO_ID)
 
-    registrar_respostas("historico=" + str(resp))
 
-    print("\n=== HISTÓRICO (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
+def _encerrar_sessao(sessao):
+    logout(sessao.sock, sessao.token)
 
 
-def info(sock):
-    req = mensagens_pb2.Requisicao()
-    req.info.tipo = "basico"
+_pool = PoolSessoes(_abrir_sessao, _encerrar_sessao, ErroRede, _codec.token_rejeitado)
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
 
-    registrar_respostas("info=" + str(resp))
+def encerrar_sessoes():
+    """Faz logout das sessões mantidas abertas pelo pool."""
+    _pool.fechar()
 
-    print("\n=== INFO (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
 
+def aquecer_sessoes(quantidade=1):
+    """Conecta e autentica antes da primeira operação (sem imprimir nada); ver aquecimento.py."""
+    with saida.usar_modo("silencioso"):
+        return _pool.aquecer(quantidade)
 
-def logout(sock, token):
-    req = mensagens_pb2.Requisicao()
-    req.logout.token = token
 
-    enviar(sock, req)
-    t0 = time.time()
-    resp = receber(sock)
-    elapsed = time.time() - t0
+def configurar_servidor(host, porta):
+    """Aponta o cliente para outro servidor (ex.: servidor_local.py)."""
+    global SERVER_IP, SERVER_PORT
+    _pool.fechar()
+    SERVER_IP, SERVER_PORT = host, porta
 
-    registrar_respostas("logout=" + str(resp))
 
-    print("\n=== LOGOUT (PROTOBUF) ===")
-    print(format_protobuf_response(resp, elapsed))
+atexit.register(encerrar_sessoes)
 
 
 # ---------------------------------------
 # Interface para o MENU
 # ---------------------------------------
 
-def servidor_protobuf(op_code, param=None):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+def executar_operacao(sock, token, op_code, param=None):
+    """Executa uma operação do menu numa sessão já autenticada e devolve a resposta."""
+    if op_code == 1:
+        nums = param
+        if isinstance(nums, str):
+            nums = [float(x.strip()) for x in nums.split(",") if x.strip()]
+        return soma(sock, token, nums)
 
-    try:
-        sock.connect((SERVER_IP, SERVER_PORT))
-        timestamp = datetime.now().isoformat()
+    elif op_code == 2:
+        return echo(sock, token, param or "Hello")
+
+    elif op_code == 3:
+        return op_timestamp(sock, token)
 
-        token = autenticar(sock, timestamp)
+    elif op_code == 4:
+        return status(sock, token)
 
-        if op_code == 1:
-            nums = param
-            if isinstance(nums, str):
-                nums = [float(x.strip()) for x in nums.split(",") if x.strip()]
-            soma(sock, token, nums)
+    elif op_code == 5:
+        return historico(sock, token)
 
-        elif op_code == 2:
-            echo(sock, token, param or "Hello")
+    elif op_code == 6:
+        return info(sock)
 
-        elif op_code == 3:
-            op_timestamp(sock, token)
+    else:
+        print("Operação inválida.")
 
-        elif op_code == 4:
-            status(sock, token)
 
-        elif op_code == 5:
-            historico(sock, token)
+def executar_na_sessao(operacao):
+    """Executa operacao(sessao) numa sessão do pool e devolve o resultado.
 
-        elif op_code == 6:
-            info(sock)
+    Se a sessão reaproveitada tiver caído, repete uma vez numa nova; erros de
+    rede e de protocolo são propagados.
+    """
+    return _pool.executar(operacao)
 
-        else:
-            print("Operação inválida.")
 
-        logout(sock, token)
+def executar_operacao_pool(op_code, param=None):
+    """executar_operacao numa sessão do pool, sem tratar erros (ver servidor_protobuf)."""
+    return executar_na_sessao(
+        lambda sessao: executar_operacao(sessao.sock, sessao.token, op_code, param))
+
+
+def servidor_protobuf(op_code, param=None, modo_saida=None):
+    try:
+        with saida.usar_modo(modo_saida):
+            return executar_operacao_pool(op_code, param)
 
     except (ErroRede, ErroProtocolo) as e:
         print("Erro (protobuf):", e)
-
-    finally:
-        sock.close()
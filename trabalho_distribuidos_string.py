@@ -1,11 +1,20 @@
-import socket
-import time
+import atexit
+import contextlib
+import os
 from datetime import datetime
 
+import pipeline
+import registro_log
+import saida
+from codificadores import ALUNO_ID, CodecString, RespostaString
+from sessoes import PoolSessoes
+from transporte import Transporte
+
 server_ip = '3.88.99.255'
 server_port = 8080
 LOG_FILE = 'respostas_trab_distribuidos_string.txt'
 TIMEOUT = 4
+TAMANHO_MAXIMO_RESPOSTA = 16 * 1024 * 1024
 
 class ErroRede(Exception):
     pass
@@ -15,203 +24,200 @@ class ErroProtocolo(Exception):
 
 # --------------------------
 def registrar_respostas(resposta_str):
+    """Enfileira a resposta para o log; a gravação acontece em segundo plano."""
+    registro_log.registrar(LOG_FILE, resposta_str)
+
+@contextlib.contextmanager
+def logs_desviados(destino=os.devnull):
+    """Grava as respostas em `destino` (padrão: descarta) dentro do with."""
+    global LOG_FILE
+    anterior, LOG_FILE = LOG_FILE, destino
     try:
-        with open(LOG_FILE, 'a', encoding='utf-8') as f:
-            f.write(resposta_str + "\n")
-    except Exception as e:
-        print("Erro ao gravar log (string):", e)
+        yield
+    finally:
+        LOG_FILE = anterior
+
+def registrar_resposta(rotulo, resp, bruto=None):
+    registrar_respostas(f"{rotulo}=" + resp)
 
 def format_string_response(raw, elapsed=None):
     """Recebe a string no formato do servidor strings e retorna versão legível."""
 
     if not raw:
         return "Resposta vazia"
-    raw = raw.strip()
-
-    if raw.endswith("|FIM"):
-        raw = raw[:-4]
-    parts = raw.split("|")
-
-    out = []
-    if parts:
-        out.append(f"Status: {parts[0]}")
-
-    for p in parts[1:]:
-        if '=' in p:
-            k,v = p.split("=",1)
-            out.append(f"{k}: {v}")
-        else:
-            out.append(p)
+    if not isinstance(raw, RespostaString):
+        raw = RespostaString(raw.strip())
+
+    out = [f"Status: {raw.comando}"]
+    for k, v in raw.campos.items():
+        out.append(k if v is None else f"{k}: {v}")
     if elapsed is not None:
         out.append(f"Tempo (ms): {round(elapsed*1000,2)}")
     return "\n".join(out)
 
-def enviar_mensagem(sock, mensagem):
-    try:
-
-        t_inicio = time.time()
-        texto = mensagem + "\n"
-        texto = texto.encode('utf-8')
-        t_fim = time.time()
-        tempo_serializacao_ms = (t_fim - t_inicio) * 1000
+_codec = CodecString()
+_transporte = Transporte(_codec, ErroRede, ErroProtocolo)
 
-        print(f'Tamanho da mensagem STRING: {len(texto)} bytes')
-        print(f"Tempo de serialização STRING: {tempo_serializacao_ms:.2f} ms")
-
-        sock.sendall(texto)
-
-    except Exception as e:
-        raise ErroRede(f"Erro ao enviar (strings): {e}")
+def enviar_mensagem(sock, mensagem):
+    _transporte.enviar(sock, mensagem)
 
 def receber_resposta(sock):
-    try:
-        sock.settimeout(TIMEOUT)
-        data = sock.recv(4096).decode('utf-8')
-        if not data:
-            raise ErroRede("Nenhum dado recebido (strings).")
-    except Exception as e:
-        raise ErroRede(f"Erro ao receber (strings): {e}")
-    if "|FIM" not in data:
+    return _transporte.receber(sock, TIMEOUT, TAMANHO_MAXIMO_RESPOSTA)[0]
 
-        raise ErroProtocolo(f"Resposta strings sem terminador FIM: {data!r}")
-    return data.strip()
+def _requisitar(sock, msg, rotulo, titulo):
+    """Envia msg, recebe a resposta, registra no log e mostra conforme o modo de saída; devolve a resposta crua."""
+    resp, _ = _transporte.requisitar(sock, msg, rotulo, TIMEOUT, TAMANHO_MAXIMO_RESPOSTA,
+                                     registrar_resposta, format_string_response, titulo)
+    return resp
 
 # --------------------------
 # comandos
 # --------------------------
+def _autenticar(sock, timestamp):
+    """Autentica e devolve (token, validade em segundos)."""
+    msg = _codec.montar_auth(ALUNO_ID, timestamp)
+    resp = _requisitar(sock, msg, "autenticar", "=== AUTENTICACAO (STRINGS) ===")
+    return _transporte.extrair_autenticacao(resp)
+
 def autenticar(sock, timestamp):
-    chave = '554229'
-    msg = f'AUTH|aluno_id={chave}|TIMESTAMP={timestamp}|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("autenticar=" + resp)
-    print("=== AUTENTICACAO (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
- 
-    parts = resp.split("|")
-    if len(parts) < 2:
-        raise ErroProtocolo("AUTH malformado (strings).")
-
-    token_field = parts[1]
-    if '=' in token_field:
-        return token_field.split("=",1)[1]
-    return token_field
+    return _autenticar(sock, timestamp)[0]
+
+def montar_requisicao(token, operacao, param=None):
+    """Monta a mensagem (com |FIM) de uma operação: soma, echo, timestamp, status, historico, info ou logout."""
+    return _codec.montar(token, operacao, param)
 
 def soma(sock, token, numeros):
-    nums = numeros if isinstance(numeros, str) else ",".join(str(n) for n in numeros)
-    msg = f'OP|token={token}|operacao=soma|nums={nums}|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("soma=" + resp)
-    print("=== SOMA (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'soma', numeros)
+    return _requisitar(sock, msg, "soma", "=== SOMA (STRINGS) ===")
 
 def echo(sock, token, conteudo):
-    msg = f'OP|token={token}|operacao=echo|mensagem={conteudo}|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("echo=" + resp)
-    print("=== ECHO (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'echo', conteudo)
+    return _requisitar(sock, msg, "echo", "=== ECHO (STRINGS) ===")
 
 def op_timestamp(sock, token):
-    msg = f'OP|token={token}|operacao=timestamp|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("timestamp=" + resp)
-    print("=== TIMESTAMP (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'timestamp')
+    return _requisitar(sock, msg, "timestamp", "=== TIMESTAMP (STRINGS) ===")
 
 def status(sock, token):
-    msg = f'OP|token={token}|operacao=status|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("status=" + resp)
-    print("=== STATUS (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'status')
+    return _requisitar(sock, msg, "status", "=== STATUS (STRINGS) ===")
 
 def historico(sock, token):
-    msg = f'OP|token={token}|operacao=historico|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("historico=" + resp)
-    print("=== HISTORICO (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'historico')
+    return _requisitar(sock, msg, "historico", "=== HISTORICO (STRINGS) ===")
 
 def info(sock, token, tipo='basico'):
-    msg = f'INFO|token={token}|tipo={tipo}|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("info=" + resp)
-    print("=== INFO (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'info', tipo)
+    return _requisitar(sock, msg, "info", "=== INFO (STRINGS) ===")
 
 def logout(sock, token):
-    msg = f'LOGOUT|token={token}|FIM'
-    enviar_mensagem(sock, msg)
-    t0 = time.time()
-    resp = receber_resposta(sock)
-    elapsed = time.time() - t0
-    registrar_respostas("logout=" + resp)
-    print("=== LOGOUT (STRINGS) ===")
-    print(format_string_response(resp, elapsed))
+    msg = _codec.preparar(token, 'logout')
+    return _requisitar(sock, msg, "logout", "=== LOGOUT (STRINGS) ===")
+
+# --------------------------
+# PIPELINE
+# --------------------------
+def iterar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Envia várias operações sem esperar cada resposta e gera as respostas cruas na ordem.
+
+    operacoes: iterável de (operacao, parametro), ex. [('echo', 'oi'), ('soma', '1,2')].
+    É consumido sob demanda, então lotes grandes não ficam inteiros na memória.
+    Não imprime nada, apenas registra no log.
+    """
+    return _transporte.iterar_pipeline(sock, token, operacoes, janela, TIMEOUT,
+                                       TAMANHO_MAXIMO_RESPOSTA, registrar_resposta)
+
+def executar_pipeline(sock, token, operacoes, janela=pipeline.JANELA_PADRAO):
+    """Como iterar_pipeline, mas devolve a lista de respostas cruas."""
+    return list(iterar_pipeline(sock, token, operacoes, janela))
+
+# --------------------------
+# SESSOES REUTILIZADAS
+# --------------------------
+def _abrir_sessao():
+    return _transporte.abrir_sessao((server_ip, server_port), TIMEOUT,
+                                    lambda sock: _autenticar(sock, datetime.now().isoformat()),
+                                    ALUNO_ID)
+
+def _encerrar_sessao(sessao):
+    logout(sessao.sock, sessao.token)
+
+_pool = PoolSessoes(_abrir_sessao, _encerrar_sessao, ErroRede, _codec.token_rejeitado)
+
+def encerrar_sessoes():
+    """Faz logout das sessões mantidas abertas pelo pool."""
+    _pool.fechar()
+
+def aquecer_sessoes(quantidade=1):
+    """Conecta e autentica antes da primeira operação (sem imprimir nada); ver aquecimento.py."""
+    with saida.usar_modo("silencioso"):
+        return _pool.aquecer(quantidade)
+
+def configurar_servidor(host, porta, escapar=False):
+    """Aponta o cliente para outro servidor (ex.: servidor_local.py).
+
+    escapar: escapa os valores com protocolo_string, o que só o servidor_local
+    entende; o servidor da disciplina recebe os valores como estão.
+    """
+    global server_ip, server_port
+    _pool.fechar()
+    server_ip, server_port = host, porta
+    _codec.configurar_escape(escapar)
+
+@contextlib.contextmanager
+def usando_escape(escapar):
+    """Liga ou desliga o escape só dentro do with (ex.: reproduzir uma captura)."""
+    anterior = _codec.escapar
+    _codec.configurar_escape(escapar)
+    try:
+        yield
+    finally:
+        _codec.configurar_escape(anterior)
+
+atexit.register(encerrar_sessoes)
 
 # --------------------------
 # FUNCAO INTERFACE PARA O MENU
 # --------------------------
-def servidor_string(op_code, param=None):
-    """op_code: 1=estatisticas(soma),2=echo,3=timestamp,4=status,5=historico,6=info"""
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+def executar_operacao(sock, token, op_code, param=None):
+    """Executa uma operação do menu numa sessão já autenticada e devolve a resposta."""
+    if op_code == 1:
+        return soma(sock, token, param)
+    elif op_code == 2:
+        msg = param if param is not None else "Hello"
+        return echo(sock, token, msg)
+    elif op_code == 3:
+        return op_timestamp(sock, token)
+    elif op_code == 4:
+        return status(sock, token)
+    elif op_code == 5:
+        return historico(sock, token)
+    elif op_code == 6:
+        return info(sock, token, 'basico')
+    else:
+        print("Operação desconhecida (strings).")
+
+def executar_na_sessao(operacao):
+    """Executa operacao(sessao) numa sessão do pool e devolve o resultado.
+
+    Se a sessão reaproveitada tiver caído, repete uma vez numa nova; erros de
+    rede e de protocolo são propagados.
+    """
+    return _pool.executar(operacao)
+
+def executar_operacao_pool(op_code, param=None):
+    """executar_operacao numa sessão do pool, sem tratar erros (ver servidor_string)."""
+    return executar_na_sessao(
+        lambda sessao: executar_operacao(sessao.sock, sessao.token, op_code, param))
+
+def servidor_string(op_code, param=None, modo_saida=None):
+    """op_code: 1=estatisticas(soma),2=echo,3=timestamp,4=status,5=historico,6=info
+
+    modo_saida: um de saida.MODOS só para esta chamada (None mantém o modo atual)."""
     try:
-        sock.connect((server_ip, server_port))
-        timestamp = datetime.now().isoformat()
-
-        token = autenticar(sock, timestamp)
-        if not token:
-            print("Autenticação falhou (strings).")
-            return
-
-        if op_code == 1:
-            nums = param
-            if isinstance(nums, str):
-                nums = nums
-            soma(sock, token, nums)
-        elif op_code == 2:
-            msg = param if param is not None else "Hello"
-            echo(sock, token, msg)
-        elif op_code == 3:
-            op_timestamp(sock, token)
-        elif op_code == 4:
-            status(sock, token)
-        elif op_code == 5:
-            historico(sock, token)
-        elif op_code == 6:
-            info(sock, token, 'basico')
-        else:
-            print("Operação desconhecida (strings).")
-
-        logout(sock, token)
+        with saida.usar_modo(modo_saida):
+            return executar_operacao_pool(op_code, param)
     except (ErroRede, ErroProtocolo) as e:
         print("Erro crítico (strings):", e)
     except Exception as e:
         print("Erro desconhecido (strings):", e)
-    finally:
-        try:
-            sock.close()
-        except:
-            pass
-
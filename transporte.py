@@ -0,0 +1,205 @@
+"""Camada de transporte comum aos três clientes.
+
+Conexão, envio, leitura com o leitor persistente da conexão, timeouts,
+medições (medicoes), tradução de erros e o ciclo requisição/resposta ficam
+aqui, uma vez só; o que muda entre strings, JSON e protobuf é o codec
+(codificadores.py). Os módulos trabalho_distribuidos_* criam um Transporte
+com o codec e as exceções deles e mantêm as funções públicas como
+invólucros finos.
+"""
+import functools
+import socket
+import time
+
+import cache_tokens
+import gravacao
+import medicoes
+import pipeline
+import saida
+from codificadores import ErroDecodificacao
+from leitores import LinhaJSONInvalida, MensagemGrandeDemais
+from sessoes import Sessao
+
+
+def enviar_partes(sock, partes):
+    """Envia os buffers sem concatená-los (scatter-gather quando disponível)."""
+    if len(partes) == 1 or not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(partes))
+        return
+    enviados = sock.sendmsg(partes)
+    total = sum(len(p) for p in partes)
+    if enviados < total:
+        sock.sendall(memoryview(b"".join(partes))[enviados:])
+
+
+class Transporte:
+    """Fala um protocolo sobre TCP usando `codec`; erros saem como erro_rede/erro_protocolo."""
+
+    def __init__(self, codec, erro_rede, erro_protocolo):
+        self.codec = codec
+        self.erro_rede = erro_rede
+        self.erro_protocolo = erro_protocolo
+
+    # ---------------------------------------
+    # Envio e recebimento
+    # ---------------------------------------
+    def enviar(self, sock, mensagem):
+        codec = self.codec
+        try:
+            t_inicio = time.perf_counter_ns()
+            partes = codec.codificar(mensagem)
+            tempo_serializacao_ms = medicoes.marcar("codificacao", t_inicio) / 1e6
+
+            if saida.detalhado():
+                print(f'Tamanho da mensagem {codec.nome}: {codec.tamanho_exibido(partes)} bytes')
+                print(f"Tempo de serialização {codec.nome}: {tempo_serializacao_ms:.4f} ms")
+
+            t_envio = time.perf_counter_ns()
+            enviar_partes(sock, partes)
+            medicoes.marcar("envio", t_envio)
+            medicoes.contar_bytes(enviados=sum(len(p) for p in partes))
+        except Exception as e:
+            raise self.erro_rede(f"Erro ao enviar ({codec.descricao}): {e}")
+
+    def receber(self, sock, timeout, tamanho_maximo):
+        """Devolve (resposta, bruto); `bruto` só vale até a próxima leitura no socket."""
+        codec = self.codec
+        leitor = codec.leitor(sock, tamanho_maximo)
+        try:
+            sock.settimeout(timeout)
+            t_espera = time.perf_counter_ns()
+            bruto = leitor.proxima()
+            medicoes.marcar_leitura(t_espera, leitor.primeiro_recv_ns)
+            medicoes.contar_bytes(recebidos=codec.bytes_recebidos(bruto, leitor))
+        except MensagemGrandeDemais as e:
+            raise self.erro_protocolo(f"Resposta {codec.descricao} inválida: {e}")
+        except LinhaJSONInvalida as e:
+            raise self.erro_protocolo(str(e))
+        except socket.timeout:
+            raise self.erro_rede(f"Timeout ao receber resposta ({codec.descricao}).")
+        except Exception as e:
+            raise self.erro_rede(f"Erro ao receber ({codec.descricao}): {e}")
+
+        medicoes.adicionar("decodificacao", codec.ns_decodificacao_na_leitura(leitor))
+        t_decod = time.perf_counter_ns()
+        try:
+            resp = codec.decodificar(bruto)
+        except ErroDecodificacao as e:
+            raise self.erro_protocolo(str(e))
+        finally:
+            medicoes.marcar("decodificacao", t_decod)
+        return resp, bruto
+
+    def requisitar(self, sock, mensagem, rotulo, timeout, tamanho_maximo, registrar, formatar,
+                   titulo=None):
+        """Um ciclo completo medido; devolve (resposta, saida.FormatacaoAdiada).
+
+        registrar(rotulo, resp, bruto) grava o log; formatar(resp, elapsed) monta o texto,
+        só no modo de saída detalhado ou quando alguém pedir str() da formatação. Com
+        `titulo`, o resultado vai para o console conforme o modo (saida.emitir).
+        """
+        medicoes.iniciar(self.codec.protocolo, rotulo)
+        try:
+            self.enviar(sock, mensagem)
+            t0 = time.perf_counter_ns()
+            resp, bruto = self.receber(sock, timeout, tamanho_maximo)
+            elapsed = (time.perf_counter_ns() - t0) / 1e9
+
+            t_log = time.perf_counter_ns()
+            registrar(rotulo, resp, bruto)
+            medicoes.marcar("log", t_log)
+
+            formatado = saida.FormatacaoAdiada(formatar, resp, elapsed)
+            if saida.detalhado():
+                t_formato = time.perf_counter_ns()
+                str(formatado)
+                medicoes.marcar("formatacao", t_formato)
+        except BaseException:
+            medicoes.finalizar(False)
+            raise
+        registro = medicoes.finalizar(self.codec.sucesso(resp))
+        if titulo is not None:
+            saida.emitir(registro, titulo, formatado)
+        return resp, formatado
+
+    def extrair_autenticacao(self, resp):
+        try:
+            return self.codec.extrair_autenticacao(resp)
+        except ErroDecodificacao as e:
+            raise self.erro_protocolo(str(e))
+
+    # ---------------------------------------
+    # Pipeline
+    # ---------------------------------------
+    def iterar_pipeline(self, sock, token, operacoes, janela, timeout, tamanho_maximo, registrar):
+        """Gera as respostas de `operacoes` enviadas em rajadas (ver pipeline.iterar)."""
+        codec = self.codec
+        modelo = codec.modelo(token)
+
+        def codificar(item):
+            operacao, param = item
+            return b"".join(modelo.codificar(operacao, param))
+
+        respostas = None
+        try:
+            sock.settimeout(timeout)
+            leitor = codec.leitor(sock, tamanho_maximo)
+            respostas = pipeline.iterar(sock, operacoes, codificar, leitor, janela)
+            for (operacao, _), bruto in respostas:
+                resp = codec.decodificar(bruto)
+                registrar(operacao, resp, bruto)
+                yield resp
+        except MensagemGrandeDemais as e:
+            raise self.erro_protocolo(f"Resposta {codec.descricao} inválida: {e}")
+        except (LinhaJSONInvalida, ErroDecodificacao) as e:
+            raise self.erro_protocolo(str(e))
+        except OSError as e:
+            raise self.erro_rede(f"Erro no pipeline ({codec.descricao}): {e}")
+        finally:
+            # abandonado no meio, o pipeline.iterar drena as respostas em voo agora
+            if respostas is not None:
+                respostas.close()
+
+    # ---------------------------------------
+    # Conexão
+    # ---------------------------------------
+    def abrir_sessao(self, endereco, timeout, autenticar, aluno_id=None):
+        """Conecta em `endereco` e autentica; autenticar(sock) -> (token, validade).
+
+        Com `aluno_id`, tenta antes o token do cache em disco (cache_tokens); a
+        sessão sai marcada como reutilizada, para o pool autenticar de novo se
+        o servidor recusar o token.
+        """
+        protocolo = self.codec.protocolo
+        cache = cache_tokens.atual() if aluno_id is not None else None
+        guardado = cache.obter(aluno_id, protocolo, endereco) if cache is not None else None
+
+        sock = gravacao.envolver(socket.socket(socket.AF_INET, socket.SOCK_STREAM), protocolo,
+                                 getattr(self.codec, "escapar", False))
+        try:
+            sock.settimeout(timeout)
+            t_conexao = time.perf_counter_ns()
+            try:
+                sock.connect(endereco)
+            except OSError as e:
+                raise self.erro_rede(f"Erro ao conectar ({self.codec.descricao}): {e}")
+            medicoes.registrar_conexao(time.perf_counter_ns() - t_conexao)
+            token, validade = guardado or autenticar(sock)
+        except BaseException:
+            sock.close()
+            raise
+        if not token:
+            sock.close()
+            raise self.erro_protocolo(f"Autenticação falhou ({self.codec.descricao}).")
+
+        sessao = Sessao(sock, token, validade)
+        sessao.reutilizada = sessao.do_cache = guardado is not None
+        if cache is not None:
+            if guardado is None:
+                try:
+                    cache.guardar(aluno_id, protocolo, endereco, token, validade)
+                except OSError:
+                    return sessao       # cache indisponível: segue como antes, com logout
+            sessao.persistente = True
+            sessao.ao_esquecer = functools.partial(cache.remover, aluno_id, protocolo, endereco, token)
+        return sessao